@@ -5,6 +5,9 @@
 # and NOT compatible with Guardian Wallet v3 APIs.
 #
 # Kept for reference and historical analysis only.
+# To measure how candidate GuardianConfig thresholds change v3 outcomes on
+# real traffic, use the replay harness instead:
+#   python -m dgb_wallet_guardian.replay corpus.jsonl --configs candidates.json
 # Guardian Wallet v2 — Simulation Script (Scenario GW-SIM-001)
 
 Save the following code as **`simulate_guardian_wallet_scenario_1.py`** in the root of your  
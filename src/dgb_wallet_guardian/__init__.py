@@ -7,7 +7,24 @@ This package provides a reference skeleton for:
 - integration with Sentinel AI v2 + ADN
 """
 
-from .client import WalletGuardian  # convenience re-export
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .client import WalletGuardian
 
 __all__ = ["WalletGuardian"]
 __version__ = "0.1.0"
+
+
+def __getattr__(name: str) -> Any:
+    # Lazy convenience re-export: `import dgb_wallet_guardian` stays cheap for
+    # embedders that only need the v3 gate.
+    if name == "WalletGuardian":
+        from .client import WalletGuardian
+
+        return WalletGuardian
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list:
+    return sorted(list(globals()) + __all__)
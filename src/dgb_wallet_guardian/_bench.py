@@ -0,0 +1,34 @@
+"""
+Shared command line for the in-memory stores' micro-benchmarks.
+
+Each store module exposes `benchmark(n) -> dict` and a `main()` that hands
+it to `bench_main`, so `python -m dgb_wallet_guardian.<store> --bench N`
+parses and reports the same way everywhere.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from typing import Any, Callable, Dict, Optional, Sequence
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Print a benchmark or inspection result as stable, human-readable JSON."""
+    print(json.dumps(report, indent=2, sort_keys=True))
+
+
+def bench_main(
+    benchmark: Callable[[int], Dict[str, Any]],
+    *,
+    description: str,
+    unit: str,
+    argv: Optional[Sequence[str]] = None,
+    default: int = 1_000_000,
+) -> int:
+    """Parse `--bench N` (number of `unit`), run `benchmark(N)` and print its report."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--bench", type=int, metavar="N", default=default, help=f"number of {unit}")
+    args = parser.parse_args(argv)
+    print_report(benchmark(args.bench))
+    return 0
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import threading
+from typing import Dict, Optional, Tuple
+
+from .contracts.v3_codec import Buffer
+from .contracts.v3_reason_codes import ReasonCode
+
+# JSON insignificant whitespace (RFC 8259)
+_JSON_WS = b" \t\n\r"
+
+# First significant byte of a JSON value that can never decode to an object.
+# Encoding-agnostic: for UTF-16/32 LE input the first byte is still the ASCII
+# character, and BOM / NUL-led input is left to the real parser.
+_NON_OBJECT_STARTS = frozenset(b'["-0123456789tfnNI')
+
+OVERFLOW_SOURCE = "__other__"
+
+
+def sniff_reject(buf: Buffer, size_bytes: int, max_bytes: int) -> Optional[str]:
+    """
+    Cheap pre-parse guard for raw request bodies.
+
+    Returns the reason code the full gate would produce for bodies that can
+    be classified without parsing (oversize, empty, clearly not a JSON
+    object), or None when the body must go through the normal path. Every
+    code returned here is paired with request_id "unknown", exactly as the
+    full path would report it.
+    """
+    if size_bytes > max_bytes:
+        return ReasonCode.GW_ERROR_OVERSIZE.value
+
+    view = memoryview(buf).cast("B")
+    i = 0
+    # Only the first few bytes are inspected; long whitespace runs fall through.
+    while i < size_bytes and i < 64 and view[i] in _JSON_WS:
+        i += 1
+    if i == size_bytes:
+        return ReasonCode.GW_ERROR_INVALID_REQUEST.value
+    if i < 64 and view[i] in _NON_OBJECT_STARTS:
+        return ReasonCode.GW_ERROR_INVALID_REQUEST.value
+    return None
+
+
+class RejectCounters:
+    """
+    Thread-safe per-source counters of fail-closed rejects, keyed by reason code.
+
+    The number of distinct sources is capped; once `max_sources` is reached
+    new sources are folded into OVERFLOW_SOURCE so a flood of spoofed source
+    ids cannot grow memory without bound.
+    """
+
+    def __init__(self, max_sources: int = 10_000) -> None:
+        if max_sources <= 0:
+            raise ValueError("max_sources must be positive")
+        self.max_sources = max_sources
+        self._counts: Dict[Tuple[str, str], int] = {}
+        self._sources: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, source: Optional[str], reason_code: str) -> None:
+        src = "unknown" if source is None else str(source)
+        with self._lock:
+            if src not in self._sources:
+                if len(self._sources) >= self.max_sources:
+                    src = OVERFLOW_SOURCE
+                self._sources[src] = self._sources.get(src, 0)
+            self._sources[src] += 1
+            key = (src, reason_code)
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def total(self, source: Optional[str] = None) -> int:
+        with self._lock:
+            if source is None:
+                return sum(self._sources.values())
+            return self._sources.get(str(source), 0)
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Return {source: {reason_code: count}} as plain dicts."""
+        out: Dict[str, Dict[str, int]] = {}
+        with self._lock:
+            for (src, code), n in sorted(self._counts.items()):
+                out.setdefault(src, {})[code] = n
+        return out
+
+    def top_sources(self, n: int = 10) -> Tuple[Tuple[str, int], ...]:
+        with self._lock:
+            ranked = sorted(self._sources.items(), key=lambda kv: (-kv[1], kv[0]))
+        return tuple(ranked[:n])
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self._sources.clear()
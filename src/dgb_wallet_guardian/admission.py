@@ -0,0 +1,200 @@
+"""
+Admission control in front of the v3 gate.
+
+    admission = AdmissionController(source_rate=200, wallet_rate=5, max_in_flight=64)
+    gate = GuardianWalletV3(admission=admission)
+    gate.evaluate(request, source="client-7", wallet_id="w1")
+
+Each request takes one token from its caller's bucket and, with
+`wallet_id=`, one from the wallet's bucket; both must have a token or
+neither is charged. Independently, at most `max_in_flight` evaluations run
+at once (queue-depth shedding). A request that is not admitted fails closed
+with GW_ERROR_OVERLOADED before parsing.
+
+Buckets live in a `BucketMap`: key -> slot in two flat float arrays, in
+least-recently-used order. A bucket idle long enough to refill completely is
+indistinguishable from a new one, so such entries are dropped as they reach
+the cold end; once `max_keys` live buckets exist, new keys share one
+overflow bucket (as RejectCounters does) so spoofed ids cannot grow memory.
+
+    python -m dgb_wallet_guardian.admission --bench 1000000
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from array import array
+from typing import Callable, Dict, List, Optional, Sequence
+
+from ._bench import bench_main
+from .abuse import OVERFLOW_SOURCE
+from .contracts.v3_reason_codes import ReasonCode
+
+SHED_REASONS = ("source", "wallet", "in_flight")
+
+
+class BucketMap:
+    """
+    Token buckets (`rate` tokens/s, capacity `burst`) keyed by string.
+
+    Not thread-safe on its own; AdmissionController serialises access.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 100_000) -> None:
+        if rate <= 0 or burst < 1 or max_keys <= 0:
+            raise ValueError("rate must be positive, burst >= 1 and max_keys positive")
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.max_keys = max_keys
+        # Seconds after which an untouched bucket is full again (and forgettable).
+        self.idle_seconds = self.burst / self.rate
+        self._slots: Dict[str, int] = {}  # insertion order == recency order
+        self._tokens = array("d")
+        self._stamps = array("d")
+        self._free: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _slot(self, key: str, now: float) -> int:
+        slots = self._slots
+        slot = slots.pop(key, None)
+        if slot is None:
+            self._evict_idle(now)
+            if len(slots) >= self.max_keys:
+                key = OVERFLOW_SOURCE
+                slot = slots.pop(key, None)
+            if slot is None:
+                slot = self._free.pop() if self._free else self._grow()
+                self._tokens[slot] = self.burst
+                self._stamps[slot] = now
+        slots[key] = slot
+        return slot
+
+    def _grow(self) -> int:
+        self._tokens.append(0.0)
+        self._stamps.append(0.0)
+        return len(self._tokens) - 1
+
+    def _evict_idle(self, now: float) -> None:
+        # Amortised O(1): every key is inserted once and evicted at most once.
+        slots = self._slots
+        while slots:
+            key = next(iter(slots))
+            slot = slots[key]
+            if now - self._stamps[slot] < self.idle_seconds:
+                return
+            del slots[key]
+            self._free.append(slot)
+
+    def available(self, key: str, now: float) -> int:
+        """Refill `key`'s bucket up to `now`; returns its slot if a token is available, else -1."""
+        slot = self._slot(key, now)
+        tokens = self._tokens[slot] + (now - self._stamps[slot]) * self.rate
+        self._tokens[slot] = tokens if tokens < self.burst else self.burst
+        self._stamps[slot] = now
+        return slot if self._tokens[slot] >= 1.0 else -1
+
+    def take(self, slot: int) -> None:
+        self._tokens[slot] -= 1.0
+
+    def tokens(self, key: str) -> Optional[float]:
+        """Token count as of the last touch (None if the key is not tracked)."""
+        slot = self._slots.get(key)
+        return None if slot is None else self._tokens[slot]
+
+
+class AdmissionController:
+    """Thread-safe per-source / per-wallet token buckets plus an in-flight cap."""
+
+    def __init__(
+        self,
+        source_rate: float = 500.0,
+        source_burst: float = 1_000.0,
+        wallet_rate: float = 10.0,
+        wallet_burst: float = 20.0,
+        max_in_flight: int = 256,
+        max_keys: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_in_flight <= 0:
+            raise ValueError("max_in_flight must be positive")
+        self.sources = BucketMap(source_rate, source_burst, max_keys)
+        self.wallets = BucketMap(wallet_rate, wallet_burst, max_keys)
+        self.max_in_flight = max_in_flight
+        self.clock = clock
+        self._in_flight = 0
+        self._admitted = 0
+        self._shed: Dict[str, int] = {reason: 0 for reason in SHED_REASONS}
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def enter(self, source: Optional[str], wallet_id: Optional[str] = None) -> Optional[str]:
+        """
+        Try to admit one request.
+
+        Returns None when admitted (the caller must then call `leave()`), or
+        the GW_ERROR_OVERLOADED reason code when the request is shed.
+        """
+        src = "unknown" if source is None else str(source)
+        with self._lock:
+            if self._in_flight >= self.max_in_flight:
+                return self._reject("in_flight")
+            now = self.clock()
+            source_slot = self.sources.available(src, now)
+            if source_slot < 0:
+                return self._reject("source")
+            if wallet_id is not None:
+                wallet_slot = self.wallets.available(wallet_id, now)
+                if wallet_slot < 0:
+                    return self._reject("wallet")
+                self.wallets.take(wallet_slot)
+            self.sources.take(source_slot)
+            self._in_flight += 1
+            self._admitted += 1
+        return None
+
+    def leave(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def _reject(self, reason: str) -> str:
+        self._shed[reason] += 1
+        return ReasonCode.GW_ERROR_OVERLOADED.value
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            out = {"admitted": self._admitted, "in_flight": self._in_flight}
+            out.update({f"shed_{reason}": n for reason, n in self._shed.items()})
+            out["tracked_sources"] = len(self.sources)
+            out["tracked_wallets"] = len(self.wallets)
+        return out
+
+
+def benchmark(n: int = 1_000_000, sources: int = 1_000, wallets: int = 100_000) -> Dict[str, float]:
+    """Per-request cost of `enter()` + `leave()` over a rotating source / wallet mix."""
+    controller = AdmissionController(source_rate=1e9, source_burst=1e9, wallet_rate=1e9, wallet_burst=1e9, max_keys=wallets)
+    source_ids = [f"s{i}" for i in range(sources)]
+    wallet_ids = [f"w{i}" for i in range(wallets)]
+    enter, leave = controller.enter, controller.leave
+
+    start = time.perf_counter()
+    for i in range(n):
+        enter(source_ids[i % sources], wallet_ids[i % wallets])
+        leave()
+    elapsed = time.perf_counter() - start
+    return {"requests": n, "seconds": elapsed, "us_per_request": elapsed / n * 1e6, **controller.stats()}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    return bench_main(
+        benchmark, description="Benchmark the admission check.", unit="requests", argv=argv
+    )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,243 @@
+"""
+Threshold and rule-weight calibration against labeled outcomes (requires NumPy).
+
+The rule predicates are evaluated once per sample into a hit matrix. Since
+a sample's score depends only on *which* rules hit, samples are collapsed
+into distinct hit patterns with positive/negative label counts (at most
+2**len(RULE_KEYS) rows, usually a few dozen). Sweeping weight vectors and
+threshold triples is then a handful of matrix products over that tiny
+matrix, independent of the number of samples.
+
+Labels are truthy for "should have been stopped" (fraud / drain / abuse).
+"deny" means score >= threshold_high (HIGH/CRITICAL); "flag" means
+score >= threshold_elevated (escalate or deny).
+
+Note: vectorised scores sum weights in column order; at an exact threshold
+boundary, float rounding can differ from the engine's match-order sum.
+"""
+
+from __future__ import annotations
+
+import itertools
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None  # type: ignore[assignment]
+
+from .client import WalletGuardian
+from .config import GuardianConfig
+from .contracts.v3_types import GWv3Request
+from .guardian_engine import RULE_WEIGHTS
+
+RULE_KEYS: Tuple[str, ...] = tuple(RULE_WEIGHTS)
+METRICS: Tuple[str, ...] = (
+    "deny_precision",
+    "deny_recall",
+    "flag_precision",
+    "flag_recall",
+    "deny_rate",
+    "escalate_rate",
+    "critical_rate",
+)
+
+# Upper bound on the boolean block materialised per sweep step (patterns x grid points).
+_BLOCK_CELLS = 1 << 22
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("calibration requires numpy: pip install 'dgb-wallet-guardian[analytics]'")
+
+
+def _expand_masks(masks: Any, width: int) -> Any:
+    bits = np.left_shift(np.ones(1, dtype=np.int64), np.arange(width, dtype=np.int64))
+    return ((masks[:, None] & bits[None, :]) != 0).astype(np.uint8).reshape(len(masks), width)
+
+
+def _weight_key(rule_id: str, extra_signals: Mapping[str, Any]) -> str:
+    if rule_id == "SENTINEL_ALERT":
+        return f"SENTINEL_ALERT_{extra_signals.get('sentinel_status')}"
+    return rule_id
+
+
+@dataclass(frozen=True)
+class HitMatrix:
+    """Distinct rule-hit patterns (P x R, 0/1) with per-pattern label counts."""
+
+    patterns: Any  # np.ndarray[uint8], shape (P, R)
+    positives: Any  # np.ndarray[int64], shape (P,)
+    negatives: Any  # np.ndarray[int64], shape (P,)
+    skipped: int = 0
+    rule_keys: Tuple[str, ...] = RULE_KEYS
+
+    @property
+    def samples(self) -> int:
+        return int(self.positives.sum() + self.negatives.sum())
+
+    @classmethod
+    def from_arrays(cls, hits: Any, labels: Any, rule_keys: Sequence[str] = RULE_KEYS) -> "HitMatrix":
+        """Collapse a per-sample (N x R) boolean hit array and N labels into patterns."""
+        _require_numpy()
+        hits = np.asarray(hits, dtype=bool)
+        labels = np.asarray(labels, dtype=bool)
+        if hits.ndim != 2 or hits.shape[1] != len(rule_keys) or hits.shape[0] != labels.shape[0]:
+            raise ValueError("hits must be (N, R) with R == len(rule_keys) and N labels")
+
+        bits = np.left_shift(np.ones(1, dtype=np.int64), np.arange(len(rule_keys), dtype=np.int64))
+        codes = hits.astype(np.int64) @ bits
+        uniq, inverse = np.unique(codes, return_inverse=True)
+        pos = np.bincount(inverse, weights=labels, minlength=len(uniq)).astype(np.int64)
+        tot = np.bincount(inverse, minlength=len(uniq)).astype(np.int64)
+        return cls(patterns=_expand_masks(uniq, len(rule_keys)), positives=pos, negatives=tot - pos,
+                   rule_keys=tuple(rule_keys))
+
+
+def build_hit_matrix(
+    samples: Iterable[Tuple[Dict[str, Any], Any]],
+    config: Optional[GuardianConfig] = None,
+) -> HitMatrix:
+    """
+    Evaluate the engine's rule predicates once per labeled v3 request.
+
+    `samples` yields (request, label). Requests that fail v3 parsing or the
+    v2 adapter are skipped and counted, never guessed.
+    """
+    _require_numpy()
+    guardian = WalletGuardian(config=config)
+    column = {key: i for i, key in enumerate(RULE_KEYS)}
+    counts: Dict[int, List[int]] = {}
+    skipped = 0
+
+    for request, label in samples:
+        try:
+            req = GWv3Request.from_dict(request)
+            guardian.evaluate_transaction(req.wallet_ctx, req.tx_ctx, req.extra_signals)
+        except (ValueError, TypeError):
+            skipped += 1
+            continue
+        mask = 0
+        for match in guardian.engine.get_last_matches():
+            mask |= 1 << column[_weight_key(match.rule_id, req.extra_signals)]
+        slot = counts.setdefault(mask, [0, 0])
+        slot[1 if label else 0] += 1
+
+    order = sorted(counts)
+    return HitMatrix(
+        patterns=_expand_masks(np.array(order, dtype=np.int64), len(RULE_KEYS)),
+        positives=np.array([counts[m][1] for m in order], dtype=np.int64),
+        negatives=np.array([counts[m][0] for m in order], dtype=np.int64),
+        skipped=skipped,
+    )
+
+
+def weight_grid(**values: Sequence[float]) -> Any:
+    """
+    Cartesian product of per-rule weight candidates -> (G, R) array.
+
+    Rules not mentioned keep their current RULE_WEIGHTS value.
+    """
+    _require_numpy()
+    unknown = set(values) - set(RULE_KEYS)
+    if unknown:
+        raise ValueError(f"unknown rule keys: {sorted(unknown)}")
+    axes = [list(values.get(key, (RULE_WEIGHTS[key],))) for key in RULE_KEYS]
+    return np.array(list(itertools.product(*axes)), dtype=np.float64).reshape(-1, len(RULE_KEYS))
+
+
+def threshold_grid(
+    elevated: Sequence[float],
+    high: Sequence[float],
+    critical: Sequence[float],
+) -> Any:
+    """All (elevated, high, critical) triples with elevated <= high <= critical -> (G, 3) array."""
+    _require_numpy()
+    triples = [t for t in itertools.product(elevated, high, critical) if t[0] <= t[1] <= t[2]]
+    return np.array(triples, dtype=np.float64).reshape(-1, 3)
+
+
+@dataclass(frozen=True)
+class CalibrationResult:
+    """Metrics for every (weight vector, threshold triple); each metric is a (Gw, Gt) array."""
+
+    rule_keys: Tuple[str, ...]
+    weights: Any
+    thresholds: Any
+    metrics: Dict[str, Any]
+
+    def record(self, wi: int, ti: int) -> Dict[str, Any]:
+        rec: Dict[str, Any] = {
+            "weights": dict(zip(self.rule_keys, map(float, self.weights[wi]))),
+            "threshold_elevated": float(self.thresholds[ti, 0]),
+            "threshold_high": float(self.thresholds[ti, 1]),
+            "threshold_critical": float(self.thresholds[ti, 2]),
+        }
+        for name in METRICS:
+            rec[name] = float(self.metrics[name][wi, ti])
+        return rec
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        for wi in range(self.weights.shape[0]):
+            for ti in range(self.thresholds.shape[0]):
+                yield self.record(wi, ti)
+
+    def best(self, by: str = "deny_recall", *, max_deny_rate: Optional[float] = None) -> Dict[str, Any]:
+        """Grid point maximising `by`, optionally subject to a deny-rate budget."""
+        if by not in self.metrics:
+            raise ValueError(f"unknown metric {by!r}")
+        score = self.metrics[by]
+        if max_deny_rate is not None:
+            score = np.where(self.metrics["deny_rate"] <= max_deny_rate, score, -np.inf)
+        if not np.isfinite(score).any():
+            raise ValueError("no grid point satisfies the constraints")
+        wi, ti = np.unravel_index(int(np.argmax(score)), score.shape)
+        return self.record(int(wi), int(ti))
+
+
+def _safe_div(num: Any, den: Any) -> Any:
+    out = np.zeros_like(num, dtype=np.float64)
+    np.divide(num, den, out=out, where=den > 0)
+    return out
+
+
+def sweep(hits: HitMatrix, weights: Any, thresholds: Any) -> CalibrationResult:
+    """Score every pattern under every weight vector and threshold triple."""
+    _require_numpy()
+    weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+    thresholds = np.atleast_2d(np.asarray(thresholds, dtype=np.float64))
+    if weights.shape[1] != len(hits.rule_keys) or thresholds.shape[1] != 3:
+        raise ValueError("weights must be (Gw, R) and thresholds (Gt, 3)")
+    if not np.all((thresholds[:, 0] <= thresholds[:, 1]) & (thresholds[:, 1] <= thresholds[:, 2])):
+        raise ValueError("thresholds must satisfy elevated <= high <= critical")
+
+    pos = hits.positives.astype(np.float64)
+    neg = hits.negatives.astype(np.float64)
+    total = float(pos.sum() + neg.sum())
+    total_pos = float(pos.sum())
+
+    scores = hits.patterns.astype(np.float64) @ weights.T  # (P, Gw)
+    gw, gt = weights.shape[0], thresholds.shape[0]
+    counts = {name: np.zeros((gw, gt)) for name in ("deny_tp", "deny_n", "flag_tp", "flag_n", "crit_n")}
+
+    block = max(1, _BLOCK_CELLS // max(1, scores.shape[0] * gt))
+    for start in range(0, gw, block):
+        s = scores[:, start:start + block, None]  # (P, B, 1)
+        for name, col in (("deny", 1), ("flag", 0), ("crit", 2)):
+            mask = (s >= thresholds[None, None, :, col]).astype(np.float64)  # (P, B, Gt)
+            n = np.tensordot(pos + neg, mask, axes=(0, 0))
+            counts[f"{name}_n"][start:start + block] = n
+            if name != "crit":
+                counts[f"{name}_tp"][start:start + block] = np.tensordot(pos, mask, axes=(0, 0))
+
+    metrics = {
+        "deny_precision": _safe_div(counts["deny_tp"], counts["deny_n"]),
+        "deny_recall": counts["deny_tp"] / total_pos if total_pos else np.zeros((gw, gt)),
+        "flag_precision": _safe_div(counts["flag_tp"], counts["flag_n"]),
+        "flag_recall": counts["flag_tp"] / total_pos if total_pos else np.zeros((gw, gt)),
+        "deny_rate": counts["deny_n"] / total if total else np.zeros((gw, gt)),
+        "escalate_rate": (counts["flag_n"] - counts["deny_n"]) / total if total else np.zeros((gw, gt)),
+        "critical_rate": counts["crit_n"] / total if total else np.zeros((gw, gt)),
+    }
+    return CalibrationResult(rule_keys=hits.rule_keys, weights=weights, thresholds=thresholds, metrics=metrics)
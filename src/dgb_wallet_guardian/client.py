@@ -1,22 +1,60 @@
 from __future__ import annotations
 
-from dataclasses import fields
-from typing import Any, Dict, Optional
+from dataclasses import MISSING, fields
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Mapping, Optional
 
 from .config import GuardianConfig
-from .guardian_engine import GuardianEngine
+from .guardian_engine import EvaluationHandle, GuardianEngine
 from .models import WalletContext, TransactionContext, GuardianDecision, RiskLevel
 
+if TYPE_CHECKING:  # pragma: no cover
+    from .profiler import RuleProfiler
+    from .sentinel_feed import SentinelStatusBoard
 
-def _filter_to_model_fields(model_type: type, raw: Dict[str, Any]) -> Dict[str, Any]:
+
+def compile_adapter(model_type: type) -> Callable[[Mapping[str, Any]], Any]:
     """
-    Filter an input dict down to only the keyword fields accepted by a dataclass model.
+    Generate a `raw mapping -> model_type` constructor, once per model.
 
-    This prevents adapter crashes when newer contract layers (v3) include
-    additional allowed context keys not used by the v2 model.
+    The adapter reads only the dataclass's init fields by key, so newer
+    contract layers (v3) may carry extra allowed context keys. Absent fields
+    take the model default; an absent required field raises TypeError as the
+    constructor would. No intermediate dict is built.
     """
-    allowed = {f.name for f in fields(model_type)}
-    return {k: v for k, v in raw.items() if k in allowed}
+    env: Dict[str, Any] = {"_cls": model_type, "_missing": _missing_field}
+    args: List[str] = []
+    kwargs: List[str] = []
+    for f in fields(model_type):
+        if not f.init:
+            continue
+        name = f.name
+        if f.default is not MISSING:
+            env[f"_d_{name}"] = f.default
+            fallback = f"_d_{name}"
+        elif f.default_factory is not MISSING:
+            env[f"_f_{name}"] = f.default_factory
+            fallback = f"_f_{name}()"
+        else:
+            fallback = f"_missing({model_type.__name__!r}, {name!r})"
+        value = f"raw[{name!r}] if {name!r} in raw else {fallback}"
+        # Positional where possible: keyword calls to a class build a kwargs dict.
+        if f.kw_only:
+            kwargs.append(f"{name}={value}")
+        else:
+            args.append(value)
+    source = "def adapt(raw):\n    return _cls(\n        " + ",\n        ".join(args + kwargs) + ",\n    )\n"
+    exec(compile(source, f"<adapter {model_type.__name__}>", "exec"), env)
+    adapt = env["adapt"]
+    adapt.__qualname__ = f"adapt_{model_type.__name__}"
+    return adapt
+
+
+def _missing_field(model: str, name: str) -> Any:
+    raise TypeError(f"{model}.__init__() missing 1 required argument: {name!r}")
+
+
+wallet_context_from = compile_adapter(WalletContext)
+transaction_context_from = compile_adapter(TransactionContext)
 
 
 class WalletGuardian:
@@ -38,9 +76,14 @@ class WalletGuardian:
         )
     """
 
-    def __init__(self, config: Optional[GuardianConfig] = None) -> None:
+    def __init__(
+        self,
+        config: Optional[GuardianConfig] = None,
+        sentinel_board: Optional[SentinelStatusBoard] = None,
+        profiler: Optional[RuleProfiler] = None,
+    ) -> None:
         self.config = config or GuardianConfig()
-        self.engine = GuardianEngine(config=self.config)
+        self.engine = GuardianEngine(config=self.config, sentinel_board=sentinel_board, profiler=profiler)
 
     # ------------------------------------------------------------------ #
     # Public API
@@ -57,21 +100,39 @@ class WalletGuardian:
 
         NOTE:
         - v3 contract may provide additional allowed keys (e.g., wallet_age_days, tx_count_24h).
-        - This adapter filters inputs to the actual WalletContext / TransactionContext fields
-          to preserve backward compatibility and avoid TypeError crashes.
+        - The precompiled adapters read only the WalletContext / TransactionContext fields,
+          preserving backward compatibility and avoiding TypeError crashes on extra keys.
         """
-        safe_wallet_ctx = _filter_to_model_fields(WalletContext, wallet_ctx)
-        safe_tx_ctx = _filter_to_model_fields(TransactionContext, tx_ctx)
-
-        wallet = WalletContext(**safe_wallet_ctx)
-        tx = TransactionContext(**safe_tx_ctx)
-
         return self.engine.evaluate_transaction(
-            wallet_ctx=wallet,
-            tx_ctx=tx,
+            wallet_ctx=wallet_context_from(wallet_ctx),
+            tx_ctx=transaction_context_from(tx_ctx),
             extra_signals=extra_signals or {},
         )
 
+    def prepare_context(
+        self,
+        wallet_ctx: Dict[str, Any],
+        tx_ctx: Dict[str, Any],
+        *,
+        sats: bool = False,
+    ) -> EvaluationHandle:
+        """
+        Convert raw dictionaries and run only the context rule groups.
+
+        Returns a handle for `reevaluate_signals`, so callers can re-apply
+        changed external signals without re-running the other rules.
+        `sats=True` marks the amount fields as integer satoshis.
+        """
+        return self.engine.prepare_context(wallet_context_from(wallet_ctx), transaction_context_from(tx_ctx), sats=sats)
+
+    def reevaluate_signals(
+        self,
+        handle: EvaluationHandle,
+        new_signals: Optional[Dict[str, Any]] = None,
+    ) -> GuardianDecision:
+        """Apply (new) external signals to a prepared handle."""
+        return self.engine.reevaluate_signals(handle, new_signals or {})
+
     def is_safe_to_send(
         self,
         wallet_ctx: Dict[str, Any],
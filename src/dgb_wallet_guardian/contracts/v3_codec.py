@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+import math
+import re
+from typing import Any, Iterable, Optional, Union
+
+# Optional fast backend; the stdlib path below is the reference. orjson pulls
+# in datetime/uuid/zoneinfo, so it is imported on first use (warmup() does
+# that), not when the gate is imported.
+HAS_FAST_JSON = importlib.util.find_spec("orjson") is not None
+_UNLOADED: Any = object()
+_orjson: Any = _UNLOADED
+
+
+def _fast() -> Any:
+    global _orjson
+    if _orjson is _UNLOADED:
+        try:
+            import orjson
+        except ImportError:  # pragma: no cover - exercised only without orjson
+            orjson = None
+        _orjson = orjson
+    return _orjson
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+# orjson turns integer literals outside 64-bit range into floats; any such
+# literal has at least 19 digits, so a cheap byte scan routes it to stdlib.
+_LONG_DIGIT_RUN = re.compile(rb"[0-9]{19}")
+
+
+def _stdlib_canonical_bytes(obj: Any) -> bytes:
+    # Must stay byte-identical to contracts.v3_hash._canonical_json
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _float_is_portable(x: float) -> bool:
+    # orjson and repr() agree on fixed notation only; repr switches to
+    # exponent form outside [1e-4, 1e16), orjson formats those differently.
+    if x == 0.0:
+        return True
+    if not math.isfinite(x):
+        return False
+    return 1e-4 <= abs(x) < 1e16
+
+
+def _tree_is_portable(obj: Any) -> bool:
+    t = type(obj)
+    if t is float:
+        return _float_is_portable(obj)
+    if t is dict:
+        return all(type(k) is str and _tree_is_portable(v) for k, v in obj.items())
+    if t is list or t is tuple:
+        return all(_tree_is_portable(v) for v in obj)
+    return t is str or t is int or t is bool or obj is None
+
+
+def canonical_json_bytes(obj: Any, *, floats: Optional[Iterable[float]] = None) -> bytes:
+    """
+    Canonical JSON (sorted keys, compact, UTF-8) as bytes.
+
+    Output is identical whichever backend runs. When orjson is installed it
+    is used for values it formats the same way as the stdlib; everything
+    else falls back. Callers that already know every float inside `obj`
+    may pass them as `floats` to skip the structural scan.
+    """
+    fast = _fast()
+    if fast is not None:
+        if floats is not None:
+            portable = all(_float_is_portable(float(f)) for f in floats)
+        else:
+            portable = _tree_is_portable(obj)
+        if portable:
+            try:
+                return fast.dumps(obj, option=fast.OPT_SORT_KEYS)
+            except TypeError:
+                pass
+    return _stdlib_canonical_bytes(obj)
+
+
+def loads_json(buf: Buffer) -> Any:
+    """
+    Parse JSON bytes with stdlib semantics.
+
+    The fast backend is tried first; anything it refuses (NaN/Infinity
+    literals, >64-bit integers, lone surrogates, non UTF-8 encodings) is
+    parsed by `json.loads` instead so callers see the same values either way.
+    """
+    fast = _fast()
+    if fast is not None and _LONG_DIGIT_RUN.search(buf) is None:
+        try:
+            return fast.loads(buf)
+        except fast.JSONDecodeError:
+            pass
+    if isinstance(buf, (memoryview, bytearray)):
+        buf = bytes(buf)
+    return json.loads(buf)
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .v3_hash import _canonical_json
+
+# Domain separation (RFC 6962 style): leaves and inner nodes never collide.
+_LEAF_PREFIX = b"\x00"
+_NODE_PREFIX = b"\x01"
+
+
+def merkle_leaf_hash(request_id: str, context_hash: str) -> bytes:
+    """Leaf digest binding a request_id to its envelope context_hash."""
+    data = _canonical_json({"context_hash": str(context_hash), "request_id": str(request_id)})
+    return hashlib.sha256(_LEAF_PREFIX + data.encode("utf-8")).digest()
+
+
+def _node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(_NODE_PREFIX + left + right).digest()
+
+
+@dataclass(frozen=True)
+class InclusionProof:
+    """
+    O(log n) inclusion proof for one request_id in a `ContextHashTree`.
+
+    `ContextHashBatcher.proof` serves these for sealed batches only: the
+    root of an open batch is not published yet, so nothing can verify it.
+
+    `path` lists sibling digests bottom-up as (side, hex) pairs, where side
+    is "L" when the sibling sits to the left of the running hash.
+    """
+
+    request_id: str
+    context_hash: str
+    leaf_index: int
+    tree_size: int
+    path: Tuple[Tuple[str, str], ...]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "request_id": self.request_id,
+            "context_hash": self.context_hash,
+            "leaf_index": self.leaf_index,
+            "tree_size": self.tree_size,
+            "path": [[side, digest] for side, digest in self.path],
+        }
+
+
+def verify_inclusion(proof: InclusionProof, root: str) -> bool:
+    """Orchestrator-side check: recompute the root from a proof, no batch needed."""
+    try:
+        acc = merkle_leaf_hash(proof.request_id, proof.context_hash)
+        for side, digest in proof.path:
+            sibling = bytes.fromhex(digest)
+            if side == "L":
+                acc = _node_hash(sibling, acc)
+            elif side == "R":
+                acc = _node_hash(acc, sibling)
+            else:
+                return False
+    except (TypeError, ValueError):
+        return False
+    return acc.hex() == root
+
+
+class ContextHashTree:
+    """
+    Append-only Merkle tree over v3 `context_hash` values.
+
+    Only completed pairs are stored per level, so an append touches at most
+    one node per level (O(log n)) and never rehashes earlier leaves. An odd
+    node at the end of a level is promoted unchanged; the root and proofs
+    fold those right-edge nodes in O(log n) without rescanning the batch.
+    """
+
+    def __init__(self) -> None:
+        self._levels: List[List[bytes]] = []
+        self._index: Dict[str, int] = {}
+        self._context_hashes: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._context_hashes)
+
+    def __contains__(self, request_id: object) -> bool:
+        return request_id in self._index
+
+    def append(self, request_id: str, context_hash: str) -> int:
+        """Add one verdict; returns its leaf index. Duplicate request_ids are rejected."""
+        rid = str(request_id)
+        if rid in self._index:
+            raise ValueError("duplicate request_id")
+
+        node = merkle_leaf_hash(rid, context_hash)
+        level = 0
+        while True:
+            if level == len(self._levels):
+                self._levels.append([])
+            nodes = self._levels[level]
+            nodes.append(node)
+            if len(nodes) % 2:
+                break
+            node = _node_hash(nodes[-2], nodes[-1])
+            level += 1
+
+        index = len(self._context_hashes)
+        self._index[rid] = index
+        self._context_hashes.append(str(context_hash))
+        return index
+
+    def append_envelope(self, envelope: Dict[str, Any]) -> int:
+        """Convenience: append straight from a GuardianWalletV3 envelope."""
+        return self.append(envelope["request_id"], envelope["context_hash"])
+
+    def _carries(self) -> List[Optional[bytes]]:
+        # carries[k] is the promoted/partial node entering level k from below.
+        carries: List[Optional[bytes]] = [None] * (len(self._levels) + 1)
+        carry: Optional[bytes] = None
+        for k, nodes in enumerate(self._levels):
+            carries[k] = carry
+            if len(nodes) % 2:
+                carry = nodes[-1] if carry is None else _node_hash(nodes[-1], carry)
+        carries[len(self._levels)] = carry
+        return carries
+
+    def root(self) -> str:
+        """Hex root of the current batch (sha256 of empty input when empty)."""
+        if not self._levels:
+            return hashlib.sha256(b"").hexdigest()
+        carries = self._carries()
+        top = self._levels[-1]
+        carry = carries[len(self._levels) - 1]
+        if carry is None:
+            return top[0].hex()
+        return _node_hash(top[0], carry).hex()
+
+    def proof(self, request_id: str) -> InclusionProof:
+        """Build an inclusion proof for `request_id` (KeyError if absent)."""
+        index = self._index[str(request_id)]
+        carries = self._carries()
+
+        path: List[Tuple[str, str]] = []
+        idx = index
+        for k, nodes in enumerate(self._levels):
+            sib = idx ^ 1
+            if sib < len(nodes):
+                sibling: Optional[bytes] = nodes[sib]
+            elif sib == len(nodes):
+                sibling = carries[k]
+            else:
+                sibling = None
+            if sibling is not None:
+                path.append(("L" if sib < idx else "R", sibling.hex()))
+            idx //= 2
+
+        return InclusionProof(
+            request_id=str(request_id),
+            context_hash=self._context_hashes[index],
+            leaf_index=index,
+            tree_size=len(self),
+            path=tuple(path),
+        )
+
+
+@dataclass(frozen=True)
+class SealedBatch:
+    """Published result of one batch: its root plus enough to serve proofs."""
+
+    batch_id: int
+    root: str
+    size: int
+    opened_at: float
+    sealed_at: float
+
+
+class ContextHashBatcher:
+    """
+    Rolls context hashes into per-window / per-size Merkle batches.
+
+    A batch is sealed when it reaches `max_leaves` or when `window_seconds`
+    has elapsed since it was opened. Sealed roots are passed to `on_seal`
+    (e.g. a publisher) and the sealed trees are kept for proof serving.
+    `clock` is injectable so tests stay deterministic.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_leaves: int = 4096,
+        window_seconds: float = 60.0,
+        keep_batches: int = 64,
+        on_seal: Optional[Callable[[SealedBatch], None]] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_leaves <= 0 or window_seconds <= 0 or keep_batches <= 0:
+            raise ValueError("batcher limits must be positive")
+        self.max_leaves = max_leaves
+        self.window_seconds = window_seconds
+        self.keep_batches = keep_batches
+        self._on_seal = on_seal
+        self._clock = clock
+
+        self._batch_id = 0
+        self._tree = ContextHashTree()
+        self._opened_at = clock()
+        self._sealed: Dict[int, Tuple[SealedBatch, ContextHashTree]] = {}
+        self._request_batch: Dict[str, int] = {}
+
+    @property
+    def current_batch_id(self) -> int:
+        return self._batch_id
+
+    def add(self, request_id: str, context_hash: str) -> int:
+        """
+        Append to the open batch (sealing first if its window expired); returns batch id.
+
+        A request_id still held by the open or a retained sealed batch is
+        rejected (ValueError), so every retained proof stays reachable.
+        """
+        self._maybe_seal_expired()
+        if str(request_id) in self._request_batch:
+            raise ValueError("duplicate request_id")
+        self._tree.append(request_id, context_hash)
+        batch_id = self._batch_id
+        self._request_batch[str(request_id)] = batch_id
+        if len(self._tree) >= self.max_leaves:
+            self.seal()
+        return batch_id
+
+    def add_envelope(self, envelope: Dict[str, Any]) -> int:
+        return self.add(envelope["request_id"], envelope["context_hash"])
+
+    def seal(self) -> Optional[SealedBatch]:
+        """Seal the open batch now. Empty batches are not published."""
+        if not len(self._tree):
+            self._opened_at = self._clock()
+            return None
+
+        sealed = SealedBatch(
+            batch_id=self._batch_id,
+            root=self._tree.root(),
+            size=len(self._tree),
+            opened_at=self._opened_at,
+            sealed_at=self._clock(),
+        )
+        self._sealed[sealed.batch_id] = (sealed, self._tree)
+        self._evict()
+
+        self._batch_id += 1
+        self._tree = ContextHashTree()
+        self._opened_at = self._clock()
+
+        if self._on_seal is not None:
+            self._on_seal(sealed)
+        return sealed
+
+    def sealed_batch(self, batch_id: int) -> Optional[SealedBatch]:
+        entry = self._sealed.get(batch_id)
+        return entry[0] if entry else None
+
+    def proof(self, request_id: str) -> Tuple[int, InclusionProof]:
+        """Return (batch_id, proof) for a request in a retained sealed batch."""
+        rid = str(request_id)
+        batch_id = self._request_batch[rid]
+        entry = self._sealed.get(batch_id)
+        if entry is None:
+            raise KeyError(rid)
+        return batch_id, entry[1].proof(rid)
+
+    def _maybe_seal_expired(self) -> None:
+        if len(self._tree) and self._clock() - self._opened_at >= self.window_seconds:
+            self.seal()
+
+    def _evict(self) -> None:
+        while len(self._sealed) > self.keep_batches:
+            oldest = min(self._sealed)
+            _, tree = self._sealed.pop(oldest)
+            for rid in tree._index:
+                if self._request_batch.get(rid) == oldest:
+                    del self._request_batch[rid]
@@ -13,8 +13,16 @@ class ReasonCode(str, Enum):
     GW_ERROR_UNKNOWN_SIGNAL_KEY = "GW_ERROR_UNKNOWN_SIGNAL_KEY"
     GW_ERROR_BAD_NUMBER = "GW_ERROR_BAD_NUMBER"
     GW_ERROR_OVERSIZE = "GW_ERROR_OVERSIZE"
+    GW_ERROR_UNKNOWN_TENANT = "GW_ERROR_UNKNOWN_TENANT"
+    GW_ERROR_TIMEOUT = "GW_ERROR_TIMEOUT"
+    GW_ERROR_OVERLOADED = "GW_ERROR_OVERLOADED"
+    GW_ERROR_ENRICHMENT_UNAVAILABLE = "GW_ERROR_ENRICHMENT_UNAVAILABLE"
 
     # Outcomes
     GW_OK_HEALTHY_ALLOW = "GW_OK_HEALTHY_ALLOW"
     GW_ESCALATE_ELEVATED = "GW_ESCALATE_ELEVATED"
     GW_DENY_HIGH_OR_CRITICAL = "GW_DENY_HIGH_OR_CRITICAL"
+
+    # Stateful denials (fail-closed envelope; decided before the engine runs)
+    GW_DENY_WALLET_LOCKED = "GW_DENY_WALLET_LOCKED"
+    GW_DENY_DUPLICATE_SEND = "GW_DENY_DUPLICATE_SEND"
@@ -1,7 +1,18 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, List
+from typing import Any, Dict, FrozenSet, List
+
+_TOP_LEVEL_KEYS: FrozenSet[str] = frozenset(
+    {
+        "contract_version",
+        "component",
+        "request_id",
+        "wallet_ctx",
+        "tx_ctx",
+        "extra_signals",
+    }
+)
 
 
 @dataclass(frozen=True)
@@ -18,15 +29,7 @@ class GWv3Request:
         if not isinstance(raw, dict):
             raise ValueError("GW_ERROR_INVALID_REQUEST")
 
-        allowed = {
-            "contract_version",
-            "component",
-            "request_id",
-            "wallet_ctx",
-            "tx_ctx",
-            "extra_signals",
-        }
-        unknown = set(raw.keys()) - allowed
+        unknown = raw.keys() - _TOP_LEVEL_KEYS
         if unknown:
             raise ValueError("GW_ERROR_UNKNOWN_TOP_LEVEL_KEY")
 
@@ -0,0 +1,267 @@
+"""
+Per-wallet cooldowns / temporary locks on a hierarchical timing wheel.
+
+`arm()` records a wallet's lock expiry, `remaining()` is a dict lookup, and
+expired entries are reclaimed by turning the wheel as the clock advances:
+level k has `2**slot_bits` buckets of `2**(slot_bits*k)` ticks each, entries cascade one
+level down per rotation, and each tick touches one bucket. A lock sits in
+the bucket of the tick its expiry falls in, so `expire()` gets an exact
+count by draining just the current tick's bucket. Re-arming leaves the old
+wheel entry in place; it is recognised as stale (expiry mismatch) and
+dropped when its bucket comes round. All operations are O(1) amortised.
+
+    python -m dgb_wallet_guardian.cooldown --bench 1000000
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from ._bench import bench_main
+from .snapshot import ColdTier, SnapshotFile, chunked, pack_f64, unpack_f64, write_snapshot
+
+_Entry = Tuple[str, float]
+SNAPSHOT_KIND = "cooldown"
+
+
+class CooldownTracker:
+    """Thread-safe wallet -> lock expiry map with timing-wheel reclamation."""
+
+    def __init__(
+        self,
+        lock_seconds: float = 900.0,
+        *,
+        tick_seconds: float = 1.0,
+        slot_bits: int = 8,
+        levels: int = 4,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if lock_seconds < 0 or tick_seconds <= 0 or slot_bits <= 0 or levels <= 0:
+            raise ValueError("lock_seconds must be >= 0; tick_seconds, slot_bits and levels positive")
+        # Default lock for LOCK_WALLET_TEMPORARILY (CRITICAL decisions)
+        self.lock_seconds = float(lock_seconds)
+        self.tick_seconds = float(tick_seconds)
+        self.clock = clock
+        self._bits = slot_bits
+        self._mask = (1 << slot_bits) - 1
+        self._levels = levels
+        self._wheel: List[List[List[_Entry]]] = [[[] for _ in range(1 << slot_bits)] for _ in range(levels)]
+        self._expiry: Dict[str, float] = {}
+        self._tick = self._tick_of(clock())
+        self._cold: Optional[ColdTier] = None  # see open_snapshot()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._expiry) + (len(self._cold) if self._cold is not None else 0)
+
+    def _tick_of(self, t: float) -> int:
+        return int(t // self.tick_seconds)
+
+    # ---- public API -------------------------------------------------------
+
+    def arm(self, wallet_id: str, seconds: Optional[float] = None) -> float:
+        """
+        Lock `wallet_id` for `seconds` (default `lock_seconds`) from now.
+
+        An existing longer lock is kept. Returns the effective expiry.
+        """
+        seconds = self.lock_seconds if seconds is None else float(seconds)
+        if not math.isfinite(seconds) or seconds < 0:
+            raise ValueError("seconds must be finite and >= 0")
+        now = self.clock()
+        expiry = now + seconds
+        with self._lock:
+            self._turn(now)
+            current = self._expiry.get(wallet_id)
+            if current is None and self._cold is not None:
+                current = self._thaw_locked(wallet_id, now)
+            if current is not None and current >= expiry:
+                return current
+            if expiry <= now:
+                return expiry
+            self._expiry[wallet_id] = expiry
+            self._insert((wallet_id, expiry), self._tick_of(expiry))
+        return expiry
+
+    def remaining(self, wallet_id: str) -> float:
+        """Seconds until `wallet_id` unlocks (0.0 when not locked)."""
+        expiry = self._expiry.get(wallet_id)
+        if expiry is None:
+            if self._cold is None:
+                return 0.0
+            with self._lock:
+                expiry = self._thaw_locked(wallet_id, self.clock())
+            if expiry is None:
+                return 0.0
+        now = self.clock()
+        if self._tick_of(now) > self._tick:
+            with self._lock:
+                self._turn(now)
+        return max(0.0, expiry - now)
+
+    def is_locked(self, wallet_id: str) -> bool:
+        return self.remaining(wallet_id) > 0.0
+
+    def release(self, wallet_id: str) -> bool:
+        """Lift a lock early. Returns False if the wallet was not locked."""
+        with self._lock:
+            if self._expiry.pop(wallet_id, None) is not None:
+                return True
+            return self._cold is not None and self._cold.take(wallet_id) is not None
+
+    def expire(self) -> int:
+        """Turn the wheel up to now; returns the number of live locks."""
+        now = self.clock()
+        with self._lock:
+            self._turn(now)
+            self._drain(now)
+            return len(self._expiry)
+
+    def expiries(self) -> Dict[str, float]:
+        """Copy of the wallet -> expiry map, including locks not yet read back from a snapshot."""
+        with self._lock:
+            out: Dict[str, float] = {}
+            if self._cold is not None:
+                records, _ = self._cold.records(0, len(self._cold.snap))
+                out.update((wallet_id, unpack_f64(payload)[0]) for wallet_id, payload in records)
+            out.update(self._expiry)
+            return out
+
+    # ---- snapshots --------------------------------------------------------
+
+    def save_snapshot(self, path: str) -> int:
+        """Write a binary snapshot (see snapshot.py) without blocking checks; returns locks written."""
+
+        def encode(wallet_id: str) -> Optional[bytes]:
+            expiry = self._expiry.get(wallet_id)
+            return pack_f64(expiry) if expiry is not None else None
+
+        meta = {"kind": SNAPSHOT_KIND}
+        return write_snapshot(path, meta, chunked(self._lock, lambda: self._cold, lambda: list(self._expiry), encode))
+
+    @classmethod
+    def open_snapshot(cls, path: str, *, verify: bool = True, **kwargs: object) -> "CooldownTracker":
+        """
+        Open a binary snapshot lazily; `kwargs` are passed to the constructor.
+
+        Expiries are absolute clock values, so the restored tracker's clock
+        must be the same wall clock. Locks that expired while the process
+        was down are dropped when first looked up.
+        """
+        snap = SnapshotFile(path, verify=verify)
+        if snap.meta.get("kind") != SNAPSHOT_KIND:
+            snap.close()
+            raise ValueError(f"{path}: not a cooldown snapshot")
+        tracker = cls(**kwargs)  # type: ignore[arg-type]
+        tracker._cold = ColdTier(snap)
+        return tracker
+
+    def _thaw_locked(self, wallet_id: str, now: float) -> Optional[float]:
+        # Move a snapshot lock into the wheel on first lookup (another thread may have done it).
+        expiry = self._expiry.get(wallet_id)
+        if expiry is not None or self._cold is None:
+            return expiry
+        payload = self._cold.take(wallet_id)
+        if payload is None:
+            return None
+        expiry = unpack_f64(payload)[0]
+        if expiry <= now:
+            return None
+        self._expiry[wallet_id] = expiry
+        self._insert((wallet_id, expiry), self._tick_of(expiry))
+        return expiry
+
+    # ---- wheel ------------------------------------------------------------
+
+    def _insert(self, entry: _Entry, expiry_tick: int) -> None:
+        delta = expiry_tick - self._tick
+        if delta <= 0:
+            # Expires within the current tick: the current bucket is drained as it ends (or by expire()).
+            self._wheel[0][self._tick & self._mask].append(entry)
+            return
+        level = 0
+        while level < self._levels - 1 and delta >> (self._bits * (level + 1)):
+            level += 1
+        # Beyond the top level's span the entry parks in the top level and is re-cascaded.
+        slot = (min(expiry_tick, self._tick + (1 << (self._bits * self._levels)) - 1) >> (self._bits * level)) & self._mask
+        self._wheel[level][slot].append(entry)
+
+    def _turn(self, now: float) -> None:
+        target = self._tick_of(now)
+        if target <= self._tick:
+            return
+        if not self._expiry:
+            # Nothing live: clear stale entries and jump instead of ticking through idle time.
+            for level in self._wheel:
+                for bucket in level:
+                    bucket.clear()
+            self._tick = target
+            return
+        while self._tick < target:
+            self._drain(now)  # the tick is over: everything left in its bucket has expired
+            self._tick += 1
+            tick = self._tick
+            for level in range(1, self._levels):
+                if tick & ((1 << (self._bits * level)) - 1):
+                    break
+                bucket = self._wheel[level][(tick >> (self._bits * level)) & self._mask]
+                if bucket:
+                    entries, bucket[:] = list(bucket), []
+                    for wallet_id, expiry in entries:
+                        if self._expiry.get(wallet_id) == expiry:
+                            self._insert((wallet_id, expiry), self._tick_of(expiry))
+        self._drain(now)
+
+    def _drain(self, now: float) -> None:
+        # Drop the current tick's locks that have lapsed and its stale entries; keep the rest.
+        bucket = self._wheel[0][self._tick & self._mask]
+        if not bucket:
+            return
+        keep: List[_Entry] = []
+        for entry in bucket:
+            wallet_id, expiry = entry
+            if self._expiry.get(wallet_id) != expiry:
+                continue
+            if expiry <= now:
+                del self._expiry[wallet_id]
+            else:
+                keep.append(entry)
+        bucket[:] = keep
+
+
+def benchmark(n: int = 1_000_000, lock_seconds: float = 3600.0) -> Dict[str, float]:
+    """Arm `n` cooldowns, check them all, then expire them all on a simulated clock."""
+    now = [0.0]
+    tracker = CooldownTracker(clock=lambda: now[0])
+    wallets = [f"w{i}" for i in range(n)]
+
+    start = time.perf_counter()
+    for i, w in enumerate(wallets):
+        tracker.arm(w, lock_seconds + (i % 600))
+    armed = time.perf_counter()
+    locked = sum(1 for w in wallets if tracker.is_locked(w))
+    checked = time.perf_counter()
+    now[0] = lock_seconds + 600.0
+    left = tracker.expire()
+    expired = time.perf_counter()
+    return {
+        "cooldowns": n,
+        "locked": locked,
+        "left_after_expiry": left,
+        "arm_per_s": n / (armed - start),
+        "check_per_s": n / (checked - armed),
+        "expire_s": expired - checked,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    return bench_main(
+        benchmark, description="Benchmark the cooldown timing wheel.", unit="cooldowns to arm", argv=argv
+    )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Stage names used by GuardianWalletV3, in evaluation order.
+STAGES: Tuple[str, ...] = ("parse", "validate", "providers", "context", "enrich", "score")
+
+
+@dataclass(frozen=True)
+class StageSpan:
+    stage: str
+    seconds: float
+    status: str  # "ok" | "skipped" | "late"
+
+
+class Budget:
+    """
+    Time budget for one evaluation, against an absolute `time.monotonic()` deadline.
+
+    The gate closes each stage with `mark()`; a mandatory stage that ends
+    past the deadline fails the request closed. Optional stages first ask
+    `allows(reserve)` and are skipped when less than `reserve` seconds would
+    be left for the mandatory stages.
+    """
+
+    def __init__(self, deadline: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.deadline = float(deadline)
+        self._clock = clock
+        self._last = clock()
+        self.spans: List[StageSpan] = []
+
+    def remaining(self) -> float:
+        return self.deadline - self._clock()
+
+    def expired(self) -> bool:
+        return self._clock() > self.deadline
+
+    def allows(self, reserve: float) -> bool:
+        return self.remaining() > reserve
+
+    def mark(self, stage: str) -> bool:
+        """Close `stage`; returns False if it ended past the deadline."""
+        now = self._clock()
+        on_time = now <= self.deadline
+        self.spans.append(StageSpan(stage, now - self._last, "ok" if on_time else "late"))
+        self._last = now
+        return on_time
+
+    def skip(self, stage: str) -> None:
+        self.spans.append(StageSpan(stage, 0.0, "skipped"))
+        self._last = self._clock()
+
+
+class StageStats:
+    """
+    Aggregated per-stage budget consumption across deadline-bound evaluations.
+
+    Monitoring only; never affects outcomes.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, float]] = {}
+        self._evaluations = 0
+        self._timeouts = 0
+
+    def record(self, budget: Budget, timed_out: bool) -> None:
+        with self._lock:
+            self._evaluations += 1
+            if timed_out:
+                self._timeouts += 1
+            for span in budget.spans:
+                s = self._stages.setdefault(
+                    span.stage, {"count": 0, "total_s": 0.0, "max_s": 0.0, "skipped": 0, "late": 0}
+                )
+                if span.status == "skipped":
+                    s["skipped"] += 1
+                    continue
+                s["count"] += 1
+                s["total_s"] += span.seconds
+                s["max_s"] = max(s["max_s"], span.seconds)
+                if span.status == "late":
+                    s["late"] += 1
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            stages = {
+                name: dict(s, mean_s=(s["total_s"] / s["count"]) if s["count"] else 0.0)
+                for name, s in self._stages.items()
+            }
+            return {"evaluations": self._evaluations, "timeouts": self._timeouts, "stages": stages}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._evaluations = 0
+            self._timeouts = 0
+
+
+def deadline_in(seconds: float, clock: Optional[Callable[[], float]] = None) -> float:
+    """Absolute deadline `seconds` from now, for `GuardianWalletV3.evaluate(deadline=...)`."""
+    return (clock or time.monotonic)() + seconds
@@ -1,5 +1,8 @@
+from __future__ import annotations
+
 from dataclasses import dataclass
 from enum import Enum
+from typing import Any, Dict
 
 
 class GuardianDecisionType(str, Enum):
@@ -10,9 +13,27 @@ class GuardianDecisionType(str, Enum):
     REQUIRE_EXTRA_AUTH = "require_extra_auth"
 
 
-@dataclass
+# Strictness order used when several policy triggers disagree (strictest wins).
+DECISION_SEVERITY: Dict[GuardianDecisionType, int] = {
+    GuardianDecisionType.ALLOW: 0,
+    GuardianDecisionType.WARN: 1,
+    GuardianDecisionType.DELAY: 2,
+    GuardianDecisionType.REQUIRE_EXTRA_AUTH: 3,
+    GuardianDecisionType.BLOCK: 4,
+}
+
+
+@dataclass(frozen=True)
 class GuardianResult:
     decision: GuardianDecisionType
     reason: str
     cooldown_seconds: int = 0
     require_second_factor: bool = False
+
+    def audit_dict(self) -> Dict[str, Any]:
+        return {
+            "decision": self.decision.value,
+            "reason": self.reason,
+            "cooldown_seconds": self.cooldown_seconds,
+            "require_second_factor": self.require_second_factor,
+        }
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .snapshot import ColdTier, SnapshotFile, chunked, pack_strs, unpack_strs, write_snapshot
+
+SNAPSHOT_KIND = "device_baseline"
+
+
+@dataclass(frozen=True)
+class DeviceCheck:
+    """Result of comparing one request's device against the wallet's baseline."""
+
+    known: bool
+    mismatch: bool
+    # What this check changed in the baseline (for `DeviceBaselineStore.forget`)
+    enrolled: bool = field(default=False, compare=False)
+    displaced: Optional[str] = field(default=None, compare=False)
+
+    def audit_dict(self) -> Dict[str, Any]:
+        return {"known": self.known, "mismatch": self.mismatch}
+
+
+class DeviceBaselineStore:
+    """
+    Bounded per-wallet device baseline feeding the DEVICE_MISMATCH rule.
+
+    Each wallet keeps its `per_wallet` most recently seen device
+    fingerprints (LRU); wallets themselves are LRU-evicted beyond
+    `max_wallets`. Lookups and updates are O(1).
+
+    Baseline policy:
+    - a wallet's first fingerprint is enrolled (bootstrap, no mismatch)
+    - a known fingerprint is refreshed (no mismatch)
+    - an unknown fingerprint is a mismatch unless `trusted_device` is true;
+      trusted devices are enrolled, untrusted ones only if `learn_untrusted`
+    - requests without a fingerprint are not checked
+    """
+
+    def __init__(self, max_wallets: int = 1_000_000, per_wallet: int = 4, learn_untrusted: bool = False) -> None:
+        if max_wallets <= 0 or per_wallet <= 0:
+            raise ValueError("max_wallets and per_wallet must be positive")
+        self.max_wallets = max_wallets
+        self.per_wallet = per_wallet
+        self.learn_untrusted = learn_untrusted
+        self._wallets: "OrderedDict[str, OrderedDict[str, None]]" = OrderedDict()
+        self._cold: Optional[ColdTier] = None  # see open_snapshot()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._wallets) + (len(self._cold) if self._cold is not None else 0)
+
+    def _get_locked(self, wallet_id: str) -> "Optional[OrderedDict[str, None]]":
+        devices = self._wallets.get(wallet_id)
+        if devices is None and self._cold is not None:
+            payload = self._cold.take(wallet_id)
+            if payload is not None:
+                devices = OrderedDict.fromkeys(unpack_strs(payload))
+                self._wallets[wallet_id] = devices
+        return devices
+
+    def observe(self, wallet_id: str, fingerprint: Optional[str], trusted: Optional[bool] = None) -> Optional[DeviceCheck]:
+        """Check a device against the baseline and update it. Returns None if not checkable."""
+        if not wallet_id or not fingerprint:
+            return None
+        fp = str(fingerprint)
+        with self._lock:
+            devices = self._get_locked(wallet_id)
+            if devices is None:
+                self._enroll_locked(wallet_id, fp)
+                return DeviceCheck(known=False, mismatch=False, enrolled=True)
+
+            self._wallets.move_to_end(wallet_id)
+            if fp in devices:
+                devices.move_to_end(fp)
+                return DeviceCheck(known=True, mismatch=False)
+
+            mismatch = trusted is not True
+            if not mismatch or self.learn_untrusted:
+                displaced = self._enroll_locked(wallet_id, fp)
+                return DeviceCheck(known=False, mismatch=mismatch, enrolled=True, displaced=displaced)
+            return DeviceCheck(known=False, mismatch=mismatch)
+
+    def forget(self, wallet_id: str, fingerprint: Optional[str], check: DeviceCheck) -> bool:
+        """
+        Undo the enrollment made by the `observe` that returned `check`
+        (e.g. the request failed closed later); a device it displaced is
+        put back as the least recently used one.
+        """
+        if not check.enrolled or not fingerprint:
+            return False
+        fp = str(fingerprint)
+        with self._lock:
+            devices = self._wallets.get(wallet_id)
+            if devices is None or fp not in devices:
+                return False
+            del devices[fp]
+            if check.displaced is not None and check.displaced not in devices and len(devices) < self.per_wallet:
+                devices[check.displaced] = None
+                devices.move_to_end(check.displaced, last=False)
+            if not devices:
+                del self._wallets[wallet_id]
+        return True
+
+    def enroll(self, wallet_id: str, fingerprint: str) -> None:
+        """Explicitly add a device (e.g. after the user confirmed it out of band)."""
+        with self._lock:
+            self._enroll_locked(wallet_id, str(fingerprint))
+
+    def devices(self, wallet_id: str) -> List[str]:
+        """Baseline fingerprints for a wallet, least recently used first."""
+        with self._lock:
+            devices = self._wallets.get(wallet_id)
+            if devices is None and self._cold is not None:
+                payload = self._cold.peek(wallet_id)
+                return unpack_strs(payload) if payload is not None else []
+            return list(devices or ())
+
+    def _enroll_locked(self, wallet_id: str, fp: str) -> Optional[str]:
+        # Returns the device pushed out of the wallet's baseline, if any.
+        devices = self._get_locked(wallet_id)
+        if devices is None:
+            devices = OrderedDict()
+            self._wallets[wallet_id] = devices
+            while len(self) > self.max_wallets:
+                # Wallets still only in the snapshot are older than any in memory.
+                if self._cold is None or not self._cold.pop_oldest():
+                    self._wallets.popitem(last=False)
+        self._wallets.move_to_end(wallet_id)
+        devices[fp] = None
+        devices.move_to_end(fp)
+        displaced = None
+        while len(devices) > self.per_wallet:
+            displaced = devices.popitem(last=False)[0]
+        return displaced
+
+    # ------------------------------------------------------------------ #
+    # Snapshot support
+    # ------------------------------------------------------------------ #
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serialisable copy of the store, preserving LRU order."""
+        with self._lock:
+            wallets: List[Any] = []
+            if self._cold is not None:
+                records, _ = self._cold.records(0, len(self._cold.snap))
+                wallets = [[w, unpack_strs(payload)] for w, payload in records]
+            wallets.extend([w, list(devs)] for w, devs in self._wallets.items())
+            return {
+                "version": 1,
+                "per_wallet": self.per_wallet,
+                "wallets": wallets,
+            }
+
+    @classmethod
+    def restore(cls, snap: Dict[str, Any], *, max_wallets: int = 1_000_000, learn_untrusted: bool = False) -> "DeviceBaselineStore":
+        if not isinstance(snap, dict) or snap.get("version") != 1:
+            raise ValueError("unsupported device baseline snapshot")
+        store = cls(max_wallets=max_wallets, per_wallet=int(snap["per_wallet"]), learn_untrusted=learn_untrusted)
+        for wallet_id, fingerprints in snap["wallets"]:
+            for fp in fingerprints:
+                store._enroll_locked(str(wallet_id), str(fp))
+        return store
+
+    def save_snapshot(self, path: str) -> int:
+        """Write a binary snapshot (see snapshot.py) without blocking observers; returns wallets written."""
+
+        def encode(wallet_id: str) -> Optional[bytes]:
+            devices = self._wallets.get(wallet_id)
+            return pack_strs(devices) if devices is not None else None
+
+        meta = {"kind": SNAPSHOT_KIND, "per_wallet": self.per_wallet}
+        return write_snapshot(path, meta, chunked(self._lock, lambda: self._cold, lambda: list(self._wallets), encode))
+
+    @classmethod
+    def open_snapshot(
+        cls,
+        path: str,
+        *,
+        max_wallets: int = 1_000_000,
+        learn_untrusted: bool = False,
+        verify: bool = True,
+    ) -> "DeviceBaselineStore":
+        """Open a binary snapshot lazily: wallets are decoded on first use."""
+        snap = SnapshotFile(path, verify=verify)
+        if snap.meta.get("kind") != SNAPSHOT_KIND:
+            snap.close()
+            raise ValueError(f"{path}: not a device baseline snapshot")
+        store = cls(max_wallets=max_wallets, per_wallet=int(snap.meta["per_wallet"]), learn_untrusted=learn_untrusted)
+        store._cold = ColdTier(snap, keep_newest=max_wallets)
+        return store
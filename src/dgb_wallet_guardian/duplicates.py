@@ -0,0 +1,170 @@
+"""
+Near-duplicate send detection (replays and double submits).
+
+    duplicates = DuplicateSendIndex(window_seconds=10)
+    gate = GuardianWalletV3(duplicates=duplicates)
+    gate.evaluate(request, wallet_id="w1")  # a repeat within 10 s -> GW_DENY_DUPLICATE_SEND
+
+A send is fingerprinted as (wallet, to_address, amount, asset_id) with a
+16-byte BLAKE2b digest; the request_id is deliberately not part of it. The
+index maps fingerprint -> time bucket of the original send, and each
+`bucket_seconds` bucket lists the fingerprints it holds. Buckets older than
+the window are dropped whole as the clock advances, so memory is bounded by
+window size x send rate, never by history. Repeats are not recorded: the
+window runs from the original send. A caller that cannot complete a send
+after `check` (the gate, when it later fails closed) calls `release`.
+
+    python -m dgb_wallet_guardian.duplicates --bench 1000000
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from ._bench import bench_main
+
+
+def fingerprint(wallet_id: str, to_address: str, amount: Any, asset_id: Optional[str] = None) -> bytes:
+    """Digest of one send; int and float amounts of equal value match (1 == 1.0)."""
+    if isinstance(amount, float) and amount.is_integer():
+        amount = int(amount)
+    key = json.dumps([wallet_id, to_address, repr(amount), asset_id], separators=(",", ":"))
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+
+
+@dataclass(frozen=True)
+class DuplicateMatch:
+    """An earlier identical send seen `age_seconds` ago."""
+
+    request_id: Optional[str]
+    age_seconds: float
+
+
+class DuplicateSendIndex:
+    """Thread-safe fingerprint index over a sliding window of time buckets."""
+
+    def __init__(
+        self,
+        window_seconds: float = 10.0,
+        *,
+        bucket_seconds: float = 1.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if not (window_seconds > 0 and bucket_seconds > 0):
+            raise ValueError("window_seconds and bucket_seconds must be positive")
+        self.window_seconds = float(window_seconds)
+        self.bucket_seconds = float(bucket_seconds)
+        self.clock = clock
+        # Buckets kept: enough to cover the window from any point inside the oldest one.
+        self._span = int(math.ceil(self.window_seconds / self.bucket_seconds)) + 1
+        self._seen: Dict[bytes, Tuple[float, Optional[str]]] = {}
+        self._buckets: Deque[Tuple[int, List[bytes]]] = deque()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def check(
+        self,
+        wallet_id: str,
+        to_address: str,
+        amount: Any,
+        asset_id: Optional[str] = None,
+        request_id: Optional[str] = None,
+    ) -> Optional[DuplicateMatch]:
+        """
+        Record a send, or return the earlier identical send inside the window.
+
+        A match is not recorded, so a burst of repeats is matched against
+        the original until the window has passed.
+        """
+        key = fingerprint(wallet_id, to_address, amount, asset_id)
+        now = self.clock()
+        bucket = int(now // self.bucket_seconds)
+        with self._lock:
+            self._expire(bucket)
+            seen = self._seen.get(key)
+            if seen is not None and now - seen[0] <= self.window_seconds:
+                return DuplicateMatch(request_id=seen[1], age_seconds=max(0.0, now - seen[0]))
+            self._seen[key] = (now, request_id)
+            if not self._buckets or self._buckets[-1][0] != bucket:
+                self._buckets.append((bucket, []))
+            self._buckets[-1][1].append(key)
+        return None
+
+    def release(
+        self,
+        wallet_id: str,
+        to_address: str,
+        amount: Any,
+        asset_id: Optional[str] = None,
+        request_id: Optional[str] = None,
+    ) -> bool:
+        """
+        Forget a send recorded by `check` for `request_id` (e.g. it failed
+        closed later), so a retry is not taken for a duplicate.
+        """
+        key = fingerprint(wallet_id, to_address, amount, asset_id)
+        with self._lock:
+            seen = self._seen.get(key)
+            if seen is None or seen[1] != request_id:
+                return False
+            del self._seen[key]
+        return True
+
+    def expire(self) -> int:
+        """Drop buckets that left the window; returns the number of tracked sends."""
+        with self._lock:
+            self._expire(int(self.clock() // self.bucket_seconds))
+            return len(self._seen)
+
+    def _expire(self, bucket: int) -> None:
+        buckets, seen = self._buckets, self._seen
+        while buckets and buckets[0][0] <= bucket - self._span:
+            old, keys = buckets.popleft()
+            for key in keys:
+                entry = seen.get(key)
+                # A key re-recorded after its window lives on in a newer bucket.
+                if entry is not None and int(entry[0] // self.bucket_seconds) == old:
+                    del seen[key]
+
+
+def benchmark(n: int = 1_000_000, wallets: int = 100_000, rate: float = 10_000.0) -> Dict[str, float]:
+    """`n` sends at `rate`/s of simulated time, 1% of them immediate repeats."""
+    now = [0.0]
+    index = DuplicateSendIndex(clock=lambda: now[0])
+    check = index.check
+    duplicates = peak = 0
+    start = time.perf_counter()
+    for i in range(n):
+        now[0] = i / rate
+        j = i - 1 if i % 100 == 99 else i
+        if check(f"w{j % wallets}", f"addr{j}", 1.5, None, f"r{i}") is not None:
+            duplicates += 1
+        if i & 0xFFF == 0:
+            peak = max(peak, len(index))
+    elapsed = time.perf_counter() - start
+    return {
+        "sends": n,
+        "duplicates": duplicates,
+        "peak_tracked": peak,
+        "seconds": elapsed,
+        "us_per_send": elapsed / n * 1e6,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    return bench_main(
+        benchmark, description="Benchmark the duplicate-send index.", unit="sends", argv=argv
+    )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,271 @@
+"""
+Concurrent context enrichment ahead of the engine.
+
+    risk = EnrichmentProvider("dest_risk", lookup_risk, version="2024-06", timeout_seconds=0.02,
+                              cache_key=lambda q: q.tx_ctx.get("to_address"))
+    gate = GuardianWalletV3(enrichment=EnrichmentStage([risk, fees]))
+    gate.evaluate(request, wallet_id="w1")
+
+A provider's `fetch(query)` returns {"wallet": {...}, "tx": {...}} with
+engine context fields the request does not carry (WALLET_FIELDS /
+TX_FIELDS, amounts in the gate's units). Providers run concurrently on a
+thread pool; each has its own TTL cache, keyed by `cache_key(query)`, and
+its own timeout. A provider that errors, times out or returns bad data
+fails the request closed when `required`, and is otherwise skipped and
+listed in the audit.
+
+Merging is deterministic: request fields always win, then providers in
+name order (the first provider to set a field wins). Provider versions go
+into the context hash, and the merged fields are hashed as part of the
+wallet / tx contexts.
+
+A timed-out fetch keeps its worker thread until it returns (threads cannot
+be cancelled); its late result still fills the cache.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Mapping, Optional, Sequence, Tuple
+
+# Engine context fields a provider may fill in, by value kind (see models.WalletContext / TransactionContext).
+_FIELD_KINDS: Dict[str, str] = {
+    "typical_amount": "finite number",
+    "typical_fee": "finite number",
+    "recent_send_count": "integer",
+    "recent_window_seconds": "integer",
+    "known_addresses": "list of strings",
+    "daily_sent_amount": "finite number",
+    "fee": "finite number",
+    "destination_risk_score": "finite number",
+    "created_at": "integer",
+}
+WALLET_FIELDS = frozenset({"typical_amount", "typical_fee", "recent_send_count", "recent_window_seconds", "known_addresses", "daily_sent_amount"})
+TX_FIELDS = frozenset({"fee", "destination_risk_score", "created_at"})
+_SECTIONS = {"wallet": WALLET_FIELDS, "tx": TX_FIELDS}
+
+
+def _kind_ok(kind: str, value: Any) -> bool:
+    if isinstance(value, bool):
+        return False
+    if kind == "integer":
+        return isinstance(value, int)
+    if kind == "finite number":
+        return isinstance(value, (int, float)) and math.isfinite(value)
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+Fields = Dict[str, Dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class EnrichmentQuery:
+    """What a provider sees: the validated request contexts (read-only by convention)."""
+
+    wallet_id: Optional[str]
+    wallet_ctx: Mapping[str, Any]
+    tx_ctx: Mapping[str, Any]
+
+
+def _default_cache_key(query: EnrichmentQuery) -> Hashable:
+    return (query.wallet_id, query.tx_ctx.get("to_address"))
+
+
+@dataclass(frozen=True)
+class EnrichmentProvider:
+    """One local data source. `version` identifies its data / model for the audit hash."""
+
+    name: str
+    fetch: Callable[[EnrichmentQuery], Mapping[str, Any]] = field(repr=False)
+    version: str = "1"
+    timeout_seconds: float = 0.05
+    ttl_seconds: float = 60.0
+    required: bool = True
+    cache_key: Callable[[EnrichmentQuery], Hashable] = field(default=_default_cache_key, repr=False)
+    max_cache_entries: int = 10_000
+
+    def __post_init__(self) -> None:
+        if not self.name or not isinstance(self.name, str):
+            raise ValueError("provider name must be a non-empty string")
+        if not (self.timeout_seconds > 0 and self.ttl_seconds >= 0 and self.max_cache_entries > 0):
+            raise ValueError("timeout_seconds and max_cache_entries must be positive, ttl_seconds >= 0")
+
+
+def _checked(name: str, raw: Mapping[str, Any]) -> Fields:
+    """Validate a provider result; raises ValueError on unknown sections / fields or mistyped values."""
+    if not isinstance(raw, Mapping) or set(raw) - set(_SECTIONS):
+        raise ValueError(f"{name}: result must be a mapping with 'wallet' / 'tx' sections")
+    out: Fields = {}
+    for section, allowed in _SECTIONS.items():
+        values = raw.get(section) or {}
+        if not isinstance(values, Mapping) or set(values) - allowed:
+            raise ValueError(f"{name}: unsupported {section} fields {sorted(set(values) - allowed)}")
+        for key, value in values.items():
+            if not _kind_ok(_FIELD_KINDS[key], value):
+                raise ValueError(f"{name}: {section}.{key} must be a {_FIELD_KINDS[key]}, got {value!r}")
+        out[section] = dict(values)
+    return out
+
+
+class _TTLCache:
+    """Small LRU + TTL map; guarded by the stage lock."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Fields]]" = OrderedDict()
+
+    def get(self, key: Hashable, now: float) -> Optional[Fields]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: Hashable, value: Fields, now: float) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        self._entries[key] = (now + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@dataclass(frozen=True)
+class EnrichmentResult:
+    """Merged provider fields for one request."""
+
+    wallet: Dict[str, Any]
+    tx: Dict[str, Any]
+    versions: Dict[str, str]
+    skipped: Tuple[str, ...] = ()
+    failed: Optional[str] = None  # name of a required provider that did not deliver
+
+    def merge(self, wallet_ctx: Mapping[str, Any], tx_ctx: Mapping[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Request contexts with provider fields filled in; request values win."""
+        return {**self.wallet, **wallet_ctx}, {**self.tx, **tx_ctx}
+
+    def audit_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"versions": dict(self.versions)}
+        if self.skipped:
+            out["skipped"] = list(self.skipped)
+        return out
+
+
+class EnrichmentStage:
+    """Runs providers concurrently with per-provider caches, timeouts and failure policy."""
+
+    def __init__(
+        self,
+        providers: Sequence[EnrichmentProvider],
+        *,
+        max_workers: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        names = [p.name for p in providers]
+        if not providers or len(set(names)) != len(names):
+            raise ValueError("providers must be non-empty with unique names")
+        self.providers: Tuple[EnrichmentProvider, ...] = tuple(sorted(providers, key=lambda p: p.name))
+        self.clock = clock
+        self._caches = {p.name: _TTLCache(p.ttl_seconds, p.max_cache_entries) for p in self.providers}
+        self._stats = {p.name: {"hits": 0, "misses": 0, "errors": 0, "timeouts": 0} for p in self.providers}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or 2 * len(self.providers), thread_name_prefix="guardian-enrich")
+        self._lock = threading.Lock()
+
+    def run(
+        self,
+        wallet_id: Optional[str],
+        wallet_ctx: Mapping[str, Any],
+        tx_ctx: Mapping[str, Any],
+        max_wait: Optional[float] = None,
+    ) -> EnrichmentResult:
+        """
+        Fetch (or reuse) every provider's fields and merge them.
+
+        `max_wait` caps every provider's timeout (the gate passes what is
+        left of a request deadline).
+        """
+        query = EnrichmentQuery(wallet_id, wallet_ctx, tx_ctx)
+        now = self.clock()
+        found: Dict[str, Fields] = {}
+        pending: List[Tuple[EnrichmentProvider, Future]] = []
+        errors: Dict[str, str] = {}  # provider -> "errors" | "timeouts"
+        hits: List[str] = []
+
+        for provider in self.providers:
+            try:
+                key = provider.cache_key(query)
+                with self._lock:
+                    cached = self._caches[provider.name].get(key, now)
+            except Exception:
+                errors[provider.name] = "errors"
+                continue
+            if cached is not None:
+                found[provider.name] = cached
+                hits.append(provider.name)
+                continue
+            pending.append((provider, self._executor.submit(self._fetch, provider, query, key)))
+
+        start = time.monotonic()
+        for provider, future in pending:
+            timeout = provider.timeout_seconds if max_wait is None else min(provider.timeout_seconds, max_wait)
+            try:
+                found[provider.name] = future.result(timeout=max(0.0, start + timeout - time.monotonic()))
+            except FutureTimeout:
+                errors[provider.name] = "timeouts"
+            except Exception:
+                errors[provider.name] = "errors"
+
+        with self._lock:
+            for name in hits:
+                self._stats[name]["hits"] += 1
+            for provider, _ in pending:
+                self._stats[provider.name]["misses"] += 1
+            for name, kind in errors.items():
+                self._stats[name][kind] += 1
+
+        wallet: Dict[str, Any] = {}
+        tx: Dict[str, Any] = {}
+        versions: Dict[str, str] = {}
+        skipped: List[str] = []
+        failed: Optional[str] = None
+        for provider in self.providers:
+            fields_ = found.get(provider.name)
+            if fields_ is None:
+                if provider.required and failed is None:
+                    failed = provider.name
+                skipped.append(provider.name)
+                continue
+            versions[provider.name] = provider.version
+            for key, value in fields_["wallet"].items():
+                wallet.setdefault(key, value)
+            for key, value in fields_["tx"].items():
+                tx.setdefault(key, value)
+        return EnrichmentResult(wallet=wallet, tx=tx, versions=versions, skipped=tuple(skipped), failed=failed)
+
+    def _fetch(self, provider: EnrichmentProvider, query: EnrichmentQuery, key: Hashable) -> Fields:
+        # Runs on a worker; a result that arrives after the caller gave up still warms the cache.
+        fields_ = _checked(provider.name, provider.fetch(query))
+        with self._lock:
+            self._caches[provider.name].put(key, fields_, self.clock())
+        return fields_
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-provider cache hits / misses, errors, timeouts and cache size."""
+        with self._lock:
+            return {name: dict(s, cached=len(self._caches[name])) for name, s in self._stats.items()}
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,294 @@
+"""
+Cross-wallet destination fan-in detection for drain campaigns.
+
+A phishing drain shows up as many different wallets suddenly sending to
+the same new address. Per-wallet rules cannot see it; this detector keeps
+one global, fixed-size view of recent sends:
+
+- time is cut into `sub_windows` slices per `window_seconds`; a ring of
+  2 x `sub_windows` slices holds the current window and the one before it
+- each slice has a Count-Min Sketch of destination fan-in
+- a fixed, set-associative table of (wallet, destination) fingerprints
+  remembers the slice each pair was last counted in, so a wallet repeating
+  a send in the window is counted once (in the slice of its latest send)
+- running sums of the current and previous window's sketches are rebuilt
+  once per slice, so an update touches one slice and the aggregates only
+- a small heavy-hitter table keeps the `top_k` destinations by fan-in
+
+A destination "spikes" when at least `min_wallets` distinct wallets sent
+to it in the current window and that is `growth` times its fan-in in the
+previous window. Memory is fixed by the sketch and pair-table sizes,
+whatever the number of addresses; an update is two (per-process keyed)
+hashes and a few array reads. Estimates err upwards: sketch collisions
+add to a count, and when more pairs are live than `pair_slots` holds, the
+oldest is evicted and a later repeat of it is counted again. (Only a
+64-bit fingerprint collision could under-count.) Size `pair_slots` to the
+distinct pairs expected per window (rate x `window_seconds`) to keep
+repeats from being re-counted.
+
+    python -m dgb_wallet_guardian.fanin --bench 1000000
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ._bench import bench_main
+
+_MASK64 = (1 << 64) - 1
+_STAMP_MASK = 0xFFFFFFFF
+
+
+@dataclass(frozen=True)
+class FanInCheck:
+    """Fan-in of one send's destination: current window vs. the previous one."""
+
+    wallets: int
+    baseline: int
+    spike: bool
+    # (slot, fingerprint, slot's old fingerprint, old stamp, counted slice, moved-from slice or -1)
+    # when the send changed the counts (for `FanInDetector.forget`)
+    undo: Optional[Tuple[int, int, int, int, int, int]] = field(default=None, compare=False, repr=False)
+
+    def audit_dict(self) -> Dict[str, Any]:
+        return {"wallets": self.wallets, "baseline": self.baseline, "spike": self.spike}
+
+
+class FanInDetector:
+    """Thread-safe sliding-window fan-in sketch with a top-k destination table."""
+
+    def __init__(
+        self,
+        *,
+        window_seconds: float = 600.0,
+        sub_windows: int = 6,
+        width: int = 1 << 14,
+        depth: int = 4,
+        pair_slots: int = 1 << 20,
+        pair_ways: int = 4,
+        top_k: int = 64,
+        min_wallets: int = 25,
+        growth: float = 4.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if window_seconds <= 0 or sub_windows <= 0 or depth <= 0 or top_k <= 0:
+            raise ValueError("window_seconds, sub_windows, depth and top_k must be positive")
+        for name, value in (("width", width), ("pair_slots", pair_slots)):
+            if value < 8 or value & (value - 1):
+                raise ValueError(f"{name} must be a power of two >= 8")
+        if pair_ways < 1 or pair_ways & (pair_ways - 1) or pair_ways > pair_slots:
+            raise ValueError("pair_ways must be a power of two <= pair_slots")
+        if min_wallets < 1 or growth < 1:
+            raise ValueError("min_wallets and growth must be >= 1")
+        self.window_seconds = float(window_seconds)
+        self.sub_windows = sub_windows
+        self.width = width
+        self.depth = depth
+        self.pair_slots = pair_slots
+        self.pair_ways = pair_ways
+        self.top_k = top_k
+        self.min_wallets = min_wallets
+        self.growth = float(growth)
+        self.clock = clock
+        self._slice_seconds = self.window_seconds / sub_windows
+        self._ring = 2 * sub_windows
+        self._counts: List[array] = [self._empty_counts() for _ in range(self._ring)]
+        # Pair table: 64-bit fingerprint and (slice + 1) stamp per slot; stamp 0 is empty.
+        self._pair_fps = array("Q", bytes(8 * pair_slots))
+        self._pair_stamps = array("I", bytes(4 * pair_slots))
+        self._bucket_mask = pair_slots // pair_ways - 1
+        self._slice = int(clock() // self._slice_seconds)
+        self._next_slice_at = (self._slice + 1) * self._slice_seconds
+        self._top: Dict[str, int] = {}
+        self._floor = 0  # lower bound on the lightest top-k entry once the table is full
+        self._window = self._empty_counts()  # sum of the current window's slices
+        self._previous = self._empty_counts()  # sum of the previous window's slices
+        self._lock = threading.Lock()
+
+    def _empty_counts(self) -> array:
+        return array("I", bytes(4 * self.width * self.depth))
+
+    def memory_bytes(self) -> int:
+        """Sketch and pair-table memory (fixed at construction)."""
+        return (self._ring + 2) * 4 * self.width * self.depth + 12 * self.pair_slots
+
+    # ---- public API -------------------------------------------------------
+
+    def observe(self, wallet_id: str, to_address: str) -> FanInCheck:
+        """Record a send and return its destination's fan-in."""
+        cells = self._cells(to_address)
+        fp = hash((wallet_id, to_address)) & _MASK64
+        now = self.clock()
+        with self._lock:
+            if now >= self._next_slice_at:
+                self._advance(now)
+            window, ways, span = self._window, self.pair_ways, self.sub_windows
+            stamp = (self._slice + 1) & _STAMP_MASK
+            fps, stamps = self._pair_fps, self._pair_stamps
+            base = (fp & self._bucket_mask) * ways
+            victim, victim_age, age = base, -1, -1
+            for slot in range(base, base + ways):
+                held = stamps[slot]
+                slot_age = (stamp - held) & _STAMP_MASK if held else _STAMP_MASK
+                if slot_age < span and fps[slot] == fp:
+                    victim, age = slot, slot_age
+                    break
+                if slot_age > victim_age:
+                    victim, victim_age = slot, slot_age
+            counts = self._counts[self._slice % self._ring]
+            undo = None
+            if age < 0:
+                # New in this window (or evicted since): count it.
+                undo = (victim, fp, fps[victim], stamps[victim], self._slice, -1)
+                fps[victim] = fp
+                stamps[victim] = stamp
+                for cell in cells:
+                    counts[cell] += 1
+                    window[cell] += 1
+            elif age:
+                # Seen earlier in the window: move its count to this slice so it lasts as long as the latest send.
+                undo = (victim, fp, fp, stamps[victim], self._slice, self._slice - age)
+                stamps[victim] = stamp
+                older = self._counts[(self._slice - age) % self._ring]
+                for cell in cells:
+                    older[cell] -= 1
+                    counts[cell] += 1
+            previous = self._previous
+            wallets = baseline = 0xFFFFFFFF
+            for cell in cells:
+                if window[cell] < wallets:
+                    wallets = window[cell]
+                if previous[cell] < baseline:
+                    baseline = previous[cell]
+            self._track(to_address, wallets)
+        spike = wallets >= self.min_wallets and wallets >= self.growth * max(baseline, 1)
+        return FanInCheck(wallets, baseline, spike, undo)
+
+    def forget(self, to_address: str, check: FanInCheck) -> bool:
+        """
+        Undo the count made by the `observe` that returned `check` (e.g. the
+        request failed closed later), unless a later send has superseded it.
+        """
+        if check.undo is None:
+            return False
+        slot, fp, old_fp, old_stamp, counted, moved_from = check.undo
+        cells = self._cells(to_address)
+        with self._lock:
+            self._advance(self.clock())
+            if self._pair_fps[slot] != fp or self._pair_stamps[slot] != (counted + 1) & _STAMP_MASK:
+                return False
+            self._pair_fps[slot] = old_fp
+            self._pair_stamps[slot] = old_stamp
+            oldest = self._slice - self._ring  # slices at or before this were cleared
+            for index, delta in ((counted, -1), (moved_from, 1)):
+                if index > oldest and index >= 0:
+                    counts = self._counts[index % self._ring]
+                    for cell in cells:
+                        counts[cell] += delta
+            self._rebuild()  # rare path; a full rebuild keeps the aggregates exact
+        return True
+
+    def estimate(self, to_address: str) -> int:
+        """Distinct-wallet fan-in of `to_address` in the current window (never under-counts)."""
+        cells = self._cells(to_address)
+        with self._lock:
+            self._advance(self.clock())
+            return min(self._window[cell] for cell in cells)
+
+    def top(self, n: int = 10) -> List[Tuple[str, int]]:
+        """Heaviest destinations in the current window, re-estimated now."""
+        with self._lock:
+            self._advance(self.clock())
+            ranked = [(dest, min(self._window[cell] for cell in self._cells(dest))) for dest in self._top]
+        ranked = [item for item in ranked if item[1] > 0]
+        ranked.sort(key=lambda kv: (-kv[1], kv[0]))
+        return ranked[:n]
+
+    # ---- sketch internals -------------------------------------------------
+
+    def _cells(self, to_address: str) -> List[int]:
+        # Kirsch-Mitzenmacher: row i uses h1 + i*h2 from one 64-bit hash. Python's str
+        # hash is keyed per process (SipHash), so collisions cannot be precomputed.
+        h = hash(to_address) & _MASK64
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        width = self.width
+        mask = width - 1
+        return [row * width + ((h1 + row * h2) & mask) for row in range(self.depth)]
+
+    def _advance(self, now: float) -> None:
+        target = int(now // self._slice_seconds)
+        if target <= self._slice:
+            return
+        # Clear slices that fell out of both windows; an idle gap clears at most the whole ring.
+        for index in range(max(self._slice + 1, target - self._ring + 1), target + 1):
+            slot = index % self._ring
+            self._counts[slot] = self._empty_counts()
+        self._slice = target
+        self._next_slice_at = (target + 1) * self._slice_seconds
+        self._rebuild()
+        # Re-rank the heavy hitters so finished campaigns make room (k estimates per slice).
+        fresh = {dest: min(self._window[cell] for cell in self._cells(dest)) for dest in self._top}
+        self._top = {dest: n for dest, n in fresh.items() if n > 0}
+        self._floor = min(self._top.values()) if len(self._top) >= self.top_k else 0
+
+    def _rebuild(self) -> None:
+        # Window aggregates as lane-wise big-int sums: C speed, once per slice.
+        current = range(self._slice - self.sub_windows + 1, self._slice + 1)
+        previous = range(self._slice - self._ring + 1, self._slice - self.sub_windows + 1)
+        self._window = self._sum_counts(current)
+        self._previous = self._sum_counts(previous)
+
+    def _sum_counts(self, indices: range) -> array:
+        # 32-bit lanes never carry: a lane sum is at most the sends in one window.
+        total = 0
+        for index in indices:
+            total += int.from_bytes(self._counts[index % self._ring], sys.byteorder)
+        return array("I", total.to_bytes(4 * self.width * self.depth, sys.byteorder))
+
+    def _track(self, to_address: str, wallets: int) -> None:
+        top = self._top
+        if to_address in top or len(top) < self.top_k:
+            top[to_address] = wallets
+            return
+        if wallets <= self._floor:
+            return
+        # Table full and this destination beats the floor: replace the lightest entry (O(k), rare).
+        lightest = min(top, key=top.__getitem__)
+        if wallets > top[lightest]:
+            del top[lightest]
+            top[to_address] = wallets
+        # Entries only grow within a slice, so this stays a lower bound until _advance.
+        self._floor = min(top.values())
+
+
+def benchmark(n: int = 1_000_000, destinations: int = 100_000, wallets: int = 500_000) -> Dict[str, float]:
+    """Observe `n` sends over random-ish wallet / destination ids on a simulated clock."""
+    now = [0.0]
+    detector = FanInDetector(clock=lambda: now[0])
+    observe = detector.observe
+    start = time.perf_counter()
+    for i in range(n):
+        now[0] = i * 0.001  # 1000 sends/s of simulated time
+        observe(f"w{(i * 7919) % wallets}", f"addr{(i * 104729) % destinations}")
+    elapsed = time.perf_counter() - start
+    return {
+        "updates": n,
+        "seconds": elapsed,
+        "us_per_update": elapsed / n * 1e6,
+        "memory_bytes": detector.memory_bytes(),
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    return bench_main(
+        benchmark, description="Benchmark the destination fan-in detector.", unit="sends", argv=argv
+    )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
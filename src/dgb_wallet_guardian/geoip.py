@@ -0,0 +1,433 @@
+"""
+Local geo-IP range index and impossible-travel tracking for the `geo_ip` signal.
+
+A range CSV (`start,end,country[,region]`, IPv4 and/or IPv6) is compiled
+into sorted integer columns and looked up with `bisect`. The compiled form
+can be written to a flat binary file and opened with mmap, so any number of
+worker processes share one copy of the table through the page cache.
+
+    python -m dgb_wallet_guardian.geoip ranges.csv ranges.geo
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import ipaddress
+import json
+import mmap
+import socket
+import struct
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .snapshot import ColdTier, SnapshotFile, chunked, pack_f64, unpack_f64, write_snapshot
+
+_MAGIC = b"DGBGEO1\x00"
+_HEADER = struct.Struct("<8sIII4x")  # magic, n_v4, n_v6, location table bytes
+_MASK64 = (1 << 64) - 1
+_V4_MAPPED = 0xFFFF
+_V4_BUCKETS = (1 << 16) + 1  # first-range offset per /16 prefix, plus a sentinel
+SNAPSHOT_KIND = "travel"
+
+_inet_pton = socket.inet_pton
+_from_bytes = int.from_bytes
+_AF_INET = socket.AF_INET
+_AF_INET6 = socket.AF_INET6
+
+
+class _U128Column:
+    """Read-only sequence of 128-bit ints stored as (hi, lo) uint64 columns; usable with bisect."""
+
+    __slots__ = ("_hi", "_lo")
+
+    def __init__(self, hi: Sequence[int], lo: Sequence[int]) -> None:
+        self._hi = hi
+        self._lo = lo
+
+    def __len__(self) -> int:
+        return len(self._hi)
+
+    def __getitem__(self, i: int) -> int:
+        return (self._hi[i] << 64) | self._lo[i]
+
+
+def _location(country: str, region: str = "") -> str:
+    country = country.strip().upper()
+    region = region.strip().upper()
+    if not country:
+        raise ValueError("empty country")
+    return f"{country}-{region}" if region else country
+
+
+class GeoIPIndex:
+    """
+    Sorted, non-overlapping IP ranges -> location ("CC" or "CC-REGION").
+
+    Build with `from_rows` / `from_csv`, persist with `save`, share with
+    `open` (mmap, zero-copy on little-endian hosts). `lookup` never raises:
+    unparseable or unmapped addresses return None.
+    """
+
+    def __init__(
+        self,
+        v4: Tuple[Sequence[int], Sequence[int], Sequence[int]],
+        v6: Tuple[Sequence[int], Sequence[int], Sequence[int]],
+        locations: Sequence[str],
+        v4_buckets: Optional[Sequence[int]] = None,
+        _mmap: Optional[mmap.mmap] = None,
+    ) -> None:
+        self._v4_starts, self._v4_ends, self._v4_locs = v4
+        if v4_buckets is None:
+            starts = self._v4_starts
+            v4_buckets = array("I", [bisect_left(starts, p << 16) for p in range(_V4_BUCKETS)])  # type: ignore[arg-type]
+        self._v4_buckets = v4_buckets
+        self._v6_starts, self._v6_ends, self._v6_locs = v6
+        self._locations = tuple(locations)
+        self._mmap = _mmap
+
+    def __len__(self) -> int:
+        return len(self._v4_starts) + len(self._v6_starts)
+
+    def __enter__(self) -> "GeoIPIndex":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------ #
+    # Lookup
+    # ------------------------------------------------------------------ #
+
+    def lookup(self, ip: Any) -> Optional[str]:
+        # IPv4 is the hot path: the /16 bucket table narrows the bisect to a few probes.
+        try:
+            n = _from_bytes(_inet_pton(_AF_INET, ip), "big")
+        except (OSError, TypeError, ValueError):  # ValueError: NUL bytes, lone surrogates
+            return self._lookup_v6(ip)
+        buckets = self._v4_buckets
+        p = n >> 16
+        i = bisect_right(self._v4_starts, n, buckets[p], buckets[p + 1]) - 1  # type: ignore[arg-type]
+        if i < 0 or n > self._v4_ends[i]:
+            return None
+        return self._locations[self._v4_locs[i]]
+
+    def _lookup_v6(self, ip: Any) -> Optional[str]:
+        try:
+            n = _from_bytes(_inet_pton(_AF_INET6, ip), "big")
+        except (OSError, TypeError, ValueError):  # ValueError: NUL bytes, lone surrogates
+            return None
+        if n >> 32 == _V4_MAPPED:
+            return self._find(self._v4_starts, self._v4_ends, self._v4_locs, n & 0xFFFFFFFF)
+        return self._find(self._v6_starts, self._v6_ends, self._v6_locs, n)
+
+    def _find(self, starts: Sequence[int], ends: Sequence[int], locs: Sequence[int], n: int) -> Optional[str]:
+        i = bisect_right(starts, n) - 1  # type: ignore[arg-type]
+        if i < 0 or n > ends[i]:
+            return None
+        return self._locations[locs[i]]
+
+    # ------------------------------------------------------------------ #
+    # Building
+    # ------------------------------------------------------------------ #
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[str, str, str]]) -> "GeoIPIndex":
+        """Build from (start_ip, end_ip, location) rows. Overlapping ranges raise ValueError."""
+        loc_ids: Dict[str, int] = {}
+        ranges: Dict[int, List[Tuple[int, int, int]]] = {4: [], 6: []}
+        for start_s, end_s, location in rows:
+            start, end = ipaddress.ip_address(start_s.strip()), ipaddress.ip_address(end_s.strip())
+            if start.version != end.version or int(start) > int(end):
+                raise ValueError(f"bad range {start_s}-{end_s}")
+            loc = loc_ids.setdefault(location, len(loc_ids))
+            ranges[start.version].append((int(start), int(end), loc))
+
+        for version, items in ranges.items():
+            items.sort()
+            for prev, cur in zip(items, items[1:]):
+                if cur[0] <= prev[1]:
+                    raise ValueError(f"overlapping IPv{version} ranges at {ipaddress.ip_address(cur[0])}")
+
+        v4 = ranges[4]
+        v6 = ranges[6]
+        return cls(
+            v4=(array("I", [r[0] for r in v4]), array("I", [r[1] for r in v4]), array("I", [r[2] for r in v4])),
+            v6=(
+                [r[0] for r in v6],
+                [r[1] for r in v6],
+                array("I", [r[2] for r in v6]),
+            ),
+            locations=sorted(loc_ids, key=loc_ids.__getitem__),
+        )
+
+    @classmethod
+    def from_csv(cls, path: str) -> "GeoIPIndex":
+        """Load `start,end,country[,region]` rows; blank lines, `#` comments and a header row are skipped."""
+
+        def rows() -> Iterable[Tuple[str, str, str]]:
+            with open(path, "r", encoding="utf-8", newline="") as fh:
+                for lineno, row in enumerate(csv.reader(fh), start=1):
+                    if not row or row[0].lstrip().startswith("#"):
+                        continue
+                    if lineno == 1 and row[0].strip().lower() in {"start", "start_ip", "network_start"}:
+                        continue
+                    if len(row) < 3:
+                        raise ValueError(f"{path}:{lineno}: expected start,end,country[,region]")
+                    yield row[0], row[1], _location(row[2], row[3] if len(row) > 3 else "")
+
+        return cls.from_rows(rows())
+
+    # ------------------------------------------------------------------ #
+    # Binary form (mmap-shareable)
+    # ------------------------------------------------------------------ #
+
+    def save(self, path: str) -> None:
+        """Write the flat little-endian form read by `open`."""
+        v6_starts = [self._v6_starts[i] for i in range(len(self._v6_starts))]
+        v6_ends = [self._v6_ends[i] for i in range(len(self._v6_ends))]
+        columns = [
+            array("I", self._v4_starts),
+            array("I", self._v4_ends),
+            array("I", self._v4_locs),
+            array("I", self._v4_buckets),
+            array("I", self._v6_locs),
+            array("Q", [n >> 64 for n in v6_starts]),
+            array("Q", [n & _MASK64 for n in v6_starts]),
+            array("Q", [n >> 64 for n in v6_ends]),
+            array("Q", [n & _MASK64 for n in v6_ends]),
+        ]
+        if sys.byteorder != "little":  # pragma: no cover - big-endian hosts
+            for col in columns:
+                col.byteswap()
+        names = json.dumps(list(self._locations), ensure_ascii=False).encode("utf-8")
+        with open(path, "wb") as fh:
+            fh.write(_HEADER.pack(_MAGIC, len(self._v4_starts), len(self._v6_starts), len(names)))
+            written = _HEADER.size
+            for col in columns:
+                if col.typecode == "Q" and written % 8:  # keep uint64 columns aligned
+                    written += fh.write(b"\x00" * (8 - written % 8))
+                written += fh.write(col.tobytes())
+            fh.write(b"\x00" * (-written % 8) + names)
+
+    @classmethod
+    def open(cls, path: str) -> "GeoIPIndex":
+        """Map a file written by `save`. The mapping is read-only and shared between processes."""
+        with open(path, "rb") as fh:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, n4, n6, names_len = _HEADER.unpack_from(mm, 0)
+            if magic != _MAGIC:
+                raise ValueError(f"{path}: not a geo-IP index")
+            offset = _HEADER.size
+            cols: List[Sequence[int]] = []
+            for fmt, count in (("I", n4), ("I", n4), ("I", n4), ("I", _V4_BUCKETS), ("I", n6), ("Q", n6), ("Q", n6), ("Q", n6), ("Q", n6)):
+                size = count * struct.calcsize(fmt)
+                if fmt == "Q" and offset % 8:
+                    offset += 8 - offset % 8
+                raw = memoryview(mm)[offset:offset + size]
+                if sys.byteorder == "little":
+                    cols.append(raw.cast(fmt))
+                else:  # pragma: no cover - big-endian hosts copy and swap
+                    col = array(fmt, raw.tobytes())
+                    col.byteswap()
+                    cols.append(col)
+                offset += size
+            offset += -offset % 8
+            locations = json.loads(bytes(mm[offset:offset + names_len]).decode("utf-8"))
+        except (struct.error, ValueError, TypeError) as e:
+            mm.close()
+            raise ValueError(f"{path}: corrupt geo-IP index") from e
+
+        v4s, v4e, v4l, v4b, v6l, v6sh, v6sl, v6eh, v6el = cols
+        return cls(
+            v4=(v4s, v4e, v4l),
+            v4_buckets=v4b,
+            v6=(_U128Column(v6sh, v6sl), _U128Column(v6eh, v6el), v6l),
+            locations=locations,
+            _mmap=mm,
+        )
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            # Drop the exported views before closing the mapping.
+            self._v4_starts = self._v4_ends = self._v4_locs = self._v6_locs = array("I")
+            self._v4_buckets = array("I", bytes(4 * _V4_BUCKETS))
+            self._v6_starts = self._v6_ends = _U128Column(array("Q"), array("Q"))
+            self._mmap.close()
+            self._mmap = None
+
+
+# --------------------------------------------------------------------------- #
+# Impossible travel
+# --------------------------------------------------------------------------- #
+
+
+@dataclass(frozen=True)
+class TravelCheck:
+    """Location of this send vs. the wallet's previous send."""
+
+    location: str
+    previous: Optional[str]
+    impossible: bool
+    # When this send and the previous one were recorded (for `TravelTracker.reobserve` / `forget`)
+    at: float = field(default=0.0, compare=False)
+    previous_at: Optional[float] = field(default=None, compare=False)
+
+    def audit_dict(self) -> Dict[str, Any]:
+        return {"location": self.location, "previous": self.previous, "impossible": self.impossible}
+
+
+class TravelTracker:
+    """
+    Per-wallet last-send location, bounded with LRU eviction.
+
+    A send is "impossible travel" when its location differs from the
+    wallet's previous send (by country, or by country-region with
+    `level="region"`) less than `window_seconds` later. Addresses the index
+    cannot place are not checked and do not update the wallet's history.
+    """
+
+    def __init__(
+        self,
+        index: GeoIPIndex,
+        *,
+        window_seconds: float = 3600.0,
+        level: str = "country",
+        max_wallets: int = 1_000_000,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if level not in {"country", "region"}:
+            raise ValueError("level must be 'country' or 'region'")
+        if window_seconds <= 0 or max_wallets <= 0:
+            raise ValueError("window_seconds and max_wallets must be positive")
+        self.index = index
+        self.window_seconds = window_seconds
+        self.level = level
+        self.max_wallets = max_wallets
+        self._clock = clock
+        self._last: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._cold: Optional[ColdTier] = None  # see open_snapshot()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._last) + (len(self._cold) if self._cold is not None else 0)
+
+    def _area(self, location: str) -> str:
+        return location if self.level == "region" else location.split("-", 1)[0]
+
+    def observe(self, wallet_id: str, geo_ip: Any) -> Optional[TravelCheck]:
+        if not wallet_id:
+            return None
+        location = self.index.lookup(geo_ip)
+        if location is None:
+            return None
+        now = self._clock()
+        with self._lock:
+            prev = self._last.get(wallet_id)
+            if prev is None and self._cold is not None:
+                payload = self._cold.take(wallet_id)
+                if payload is not None:
+                    at, loc = unpack_f64(payload)
+                    prev = (at, loc.decode("utf-8"))
+            self._last[wallet_id] = (now, location)
+            self._last.move_to_end(wallet_id)
+            while len(self) > self.max_wallets:
+                # Wallets still only in the snapshot are older than any in memory.
+                if self._cold is None or not self._cold.pop_oldest():
+                    self._last.popitem(last=False)
+
+        return self._check(location, now, prev)
+
+    def reobserve(self, wallet_id: str, geo_ip: Any, first: TravelCheck) -> Optional[TravelCheck]:
+        """
+        Re-check a send first observed as `first`, now with `geo_ip`.
+
+        Compares against the wallet's location before `first` (never the one
+        `first` recorded) and replaces `first`'s record, unless a later send
+        has superseded it. Returns None if `geo_ip` cannot be placed.
+        """
+        location = self.index.lookup(geo_ip)
+        prev = self._previous(first)
+        with self._lock:
+            if self._last.get(wallet_id) == (first.at, first.location):
+                if location is not None:
+                    self._last[wallet_id] = (first.at, location)
+                else:
+                    self._restore_locked(wallet_id, prev)
+        if location is None:
+            return None
+        return self._check(location, first.at, prev)
+
+    def forget(self, wallet_id: str, check: TravelCheck) -> bool:
+        """
+        Undo the send recorded as `check` (e.g. the request failed closed
+        later), unless a later send has superseded it.
+        """
+        with self._lock:
+            if self._last.get(wallet_id) != (check.at, check.location):
+                return False
+            self._restore_locked(wallet_id, self._previous(check))
+        return True
+
+    @staticmethod
+    def _previous(check: TravelCheck) -> Optional[Tuple[float, str]]:
+        return None if check.previous is None or check.previous_at is None else (check.previous_at, check.previous)
+
+    def _restore_locked(self, wallet_id: str, prev: Optional[Tuple[float, str]]) -> None:
+        if prev is not None:
+            self._last[wallet_id] = prev
+        else:
+            del self._last[wallet_id]
+
+    def _check(self, location: str, now: float, prev: Optional[Tuple[float, str]]) -> TravelCheck:
+        if prev is None:
+            return TravelCheck(location=location, previous=None, impossible=False, at=now)
+        prev_at, prev_loc = prev
+        moved = self._area(prev_loc) != self._area(location)
+        impossible = moved and now - prev_at < self.window_seconds
+        return TravelCheck(location=location, previous=prev_loc, impossible=impossible, at=now, previous_at=prev_at)
+
+    def save_snapshot(self, path: str) -> int:
+        """Write a binary snapshot (see snapshot.py) without blocking senders; returns wallets written."""
+
+        def encode(wallet_id: str) -> Optional[bytes]:
+            last = self._last.get(wallet_id)
+            return pack_f64(last[0], last[1].encode("utf-8")) if last is not None else None
+
+        meta = {"kind": SNAPSHOT_KIND, "level": self.level}
+        return write_snapshot(path, meta, chunked(self._lock, lambda: self._cold, lambda: list(self._last), encode))
+
+    @classmethod
+    def open_snapshot(cls, path: str, index: GeoIPIndex, *, verify: bool = True, **kwargs: Any) -> "TravelTracker":
+        """Open a binary snapshot lazily; `kwargs` are passed to the constructor."""
+        snap = SnapshotFile(path, verify=verify)
+        if snap.meta.get("kind") != SNAPSHOT_KIND:
+            snap.close()
+            raise ValueError(f"{path}: not a travel snapshot")
+        kwargs.setdefault("level", snap.meta["level"])
+        tracker = cls(index, **kwargs)
+        tracker._cold = ColdTier(snap, keep_newest=tracker.max_wallets)
+        return tracker
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compile a geo-IP range CSV into an mmap-able index.")
+    parser.add_argument("csv", help="start,end,country[,region] rows")
+    parser.add_argument("out", help="output index file")
+    args = parser.parse_args(argv)
+
+    index = GeoIPIndex.from_csv(args.csv)
+    index.save(args.out)
+    print(f"{len(index)} ranges -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
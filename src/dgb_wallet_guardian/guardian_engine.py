@@ -1,16 +1,36 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Sequence
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
 
 from .config import GuardianConfig
+from .satoshi import at_least
 from .models import (
     RiskLevel,
     WalletContext,
     TransactionContext,
     GuardianDecision,
 )
-from .adaptive_bridge import emit_adaptive_event  # <— Adaptive Core hook
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .profiler import RuleProfiler
+    from .sentinel_feed import SentinelStatusBoard
+
+# Rule weights (score contributions). Keyed by rule_id, except SENTINEL_ALERT
+# which weighs differently for HIGH and CRITICAL Sentinel status.
+RULE_WEIGHTS: Dict[str, float] = {
+    "BALANCE_FULL_WIPE": 2.5,
+    "BALANCE_UNUSUAL_SIZE": 1.5,
+    "DEST_NEW_ADDRESS": 1.0,
+    "DEST_HIGH_RISK": 2.0,
+    "BEHAV_RATE_SPIKE": 1.5,
+    "FEE_UNUSUALLY_HIGH": 1.0,
+    "SENTINEL_ALERT_HIGH": 1.5,
+    "SENTINEL_ALERT_CRITICAL": 2.5,
+    "DEVICE_MISMATCH": 1.5,
+    "GEO_IMPOSSIBLE_TRAVEL": 2.0,
+    "DEST_FANIN_SPIKE": 2.0,
+}
 
 
 @dataclass
@@ -21,6 +41,19 @@ class RuleMatch:
     weight: float
 
 
+@dataclass(frozen=True)
+class EvaluationHandle:
+    """
+    Partial evaluation of one transaction: the typed contexts plus the
+    balance / destination / behaviour rule matches, which depend only on
+    wallet and transaction context. External signals are applied on top
+    by `GuardianEngine.reevaluate_signals`.
+    """
+    wallet_ctx: Any
+    tx_ctx: Any
+    context_matches: Tuple[RuleMatch, ...]
+
+
 class GuardianEngine:
     """
     Core rule engine for DGB Wallet Guardian.
@@ -34,9 +67,20 @@ class GuardianEngine:
     and Adaptive Core integration without breaking the public API.
     """
 
-    def __init__(self, config: Optional[GuardianConfig] = None) -> None:
+    def __init__(
+        self,
+        config: Optional[GuardianConfig] = None,
+        sentinel_board: Optional[SentinelStatusBoard] = None,
+        profiler: Optional[RuleProfiler] = None,
+    ) -> None:
         self.config = config or GuardianConfig()
 
+        # Shared Sentinel status, used when a request carries no sentinel_status.
+        self.sentinel_board = sentinel_board
+
+        # Opt-in sampled rule-group profiling (monitoring only; never affects decisions).
+        self.profiler = profiler
+
         # Keep a tiny bit of state so wallets / tests can introspect
         # the last evaluation without re-running it.
         self._last_matches: List[RuleMatch] = []
@@ -57,18 +101,62 @@ class GuardianEngine:
 
         `extra_signals` can contain:
         - device_fingerprint
-        - sentinel_status (NORMAL/ELEVATED/HIGH/CRITICAL)
+        - sentinel_status (NORMAL/ELEVATED/HIGH/CRITICAL); when omitted, the
+          pinned `sentinel_snapshot` or the engine's sentinel_board is used
         - geo_ip / session info
+        - device_mismatch / impossible_travel / destination_fanin_spike (bool) – derived by the v3 gate
         - adaptive_sink (optional) – sink for Adaptive Core
         - wallet_fingerprint / user_id (optional) – identity context
         """
-        extra_signals = extra_signals or {}
+        return self.reevaluate_signals(self.prepare_context(wallet_ctx, tx_ctx), extra_signals)
 
+    def prepare_context(
+        self,
+        wallet_ctx: WalletContext,
+        tx_ctx: TransactionContext,
+        *,
+        sats: bool = False,
+    ) -> EvaluationHandle:
+        """
+        Run the context-only rule groups once and return a reusable handle.
+
+        Pair with `reevaluate_signals` when only external signals change
+        (e.g. a Sentinel status update mid-session).
+
+        With `sats=True` the amount fields are integer satoshis and the
+        ratio rules compare exactly (see `satoshi.at_least`).
+        """
         rule_matches: List[RuleMatch] = []
-        self._apply_balance_rules(wallet_ctx, tx_ctx, rule_matches)
-        self._apply_destination_rules(wallet_ctx, tx_ctx, rule_matches)
-        self._apply_behavior_rules(wallet_ctx, tx_ctx, rule_matches)
-        self._apply_external_signals(extra_signals, rule_matches)
+        profiler = self.profiler
+        if profiler is not None and profiler.sample("context"):
+            self._profile_context(profiler, wallet_ctx, tx_ctx, rule_matches, sats)
+        else:
+            self._apply_balance_rules(wallet_ctx, tx_ctx, rule_matches, sats)
+            self._apply_destination_rules(wallet_ctx, tx_ctx, rule_matches)
+            self._apply_behavior_rules(wallet_ctx, tx_ctx, rule_matches, sats)
+        return EvaluationHandle(wallet_ctx=wallet_ctx, tx_ctx=tx_ctx, context_matches=tuple(rule_matches))
+
+    def reevaluate_signals(
+        self,
+        handle: EvaluationHandle,
+        new_signals: Optional[Dict[str, Any]] = None,
+    ) -> GuardianDecision:
+        """
+        Apply external signals to a prepared handle and map the final decision.
+
+        The result is identical to `evaluate_transaction` on the same
+        contexts with `new_signals`; the handle itself is never modified.
+        """
+        extra_signals = new_signals or {}
+        wallet_ctx = handle.wallet_ctx
+        tx_ctx = handle.tx_ctx
+
+        rule_matches: List[RuleMatch] = list(handle.context_matches)
+        profiler = self.profiler
+        if profiler is not None and profiler.sample("signals"):
+            self._profile_signals(profiler, extra_signals, rule_matches)
+        else:
+            self._apply_external_signals(extra_signals, rule_matches)
 
         score = sum(r.weight for r in rule_matches)
         level = self._map_score_to_level(score)
@@ -103,8 +191,11 @@ class GuardianEngine:
             )
             user_id = extra_signals.get("user_id")
 
+            # Adaptive Core hook, imported on first use (keeps cold imports cheap).
             # emit_adaptive_event signature is defined in adaptive_bridge.py
             # (sink first positional arg, then event fields)
+            from .adaptive_bridge import emit_adaptive_event
+
             emit_adaptive_event(
                 adaptive_sink,
                 event_id=getattr(tx_ctx, "tx_id", "unknown_tx"),
@@ -148,36 +239,46 @@ class GuardianEngine:
         wallet_ctx: WalletContext,
         tx_ctx: TransactionContext,
         matches: List[RuleMatch],
+        sats: bool = False,
     ) -> None:
         balance = wallet_ctx.balance
         amount = tx_ctx.amount
+        unit = "sat" if sats else "DGB"
 
         # Rule: full-balance wipe
-        if balance > 0 and amount >= balance * self.config.full_wipe_ratio:
+        if sats:
+            full_wipe = balance > 0 and at_least(amount, balance, self.config.full_wipe_ratio)
+        else:
+            full_wipe = balance > 0 and amount >= balance * self.config.full_wipe_ratio
+        if full_wipe:
             matches.append(
                 RuleMatch(
                     rule_id="BALANCE_FULL_WIPE",
                     description=(
-                        f"Transaction spends {amount} out of {balance} DGB "
+                        f"Transaction spends {amount} out of {balance} {unit} "
                         f"(≥ {self.config.full_wipe_ratio:.0%} of balance)"
                     ),
-                    weight=2.5,
+                    weight=RULE_WEIGHTS["BALANCE_FULL_WIPE"],
                 )
             )
 
         # Rule: unusually large send vs typical_amount
-        if (
-            wallet_ctx.typical_amount is not None
-            and amount >= wallet_ctx.typical_amount * self.config.large_tx_multiplier
-        ):
+        typical = wallet_ctx.typical_amount
+        if typical is None:
+            unusual = False
+        elif sats:
+            unusual = at_least(amount, typical, self.config.large_tx_multiplier)
+        else:
+            unusual = amount >= typical * self.config.large_tx_multiplier
+        if unusual:
             matches.append(
                 RuleMatch(
                     rule_id="BALANCE_UNUSUAL_SIZE",
                     description=(
-                        f"Amount {amount} DGB is much larger than typical "
-                        f"{wallet_ctx.typical_amount} DGB"
+                        f"Amount {amount} {unit} is much larger than typical "
+                        f"{typical} {unit}"
                     ),
-                    weight=1.5,
+                    weight=RULE_WEIGHTS["BALANCE_UNUSUAL_SIZE"],
                 )
             )
 
@@ -195,7 +296,7 @@ class GuardianEngine:
                 RuleMatch(
                     rule_id="DEST_NEW_ADDRESS",
                     description="Destination address not seen before in this wallet.",
-                    weight=1.0,
+                    weight=RULE_WEIGHTS["DEST_NEW_ADDRESS"],
                 )
             )
 
@@ -209,7 +310,7 @@ class GuardianEngine:
                             f"Destination risk score {tx_ctx.destination_risk_score} "
                             f"is above high-risk threshold."
                         ),
-                        weight=2.0,
+                        weight=RULE_WEIGHTS["DEST_HIGH_RISK"],
                     )
                 )
 
@@ -218,6 +319,7 @@ class GuardianEngine:
         wallet_ctx: WalletContext,
         tx_ctx: TransactionContext,
         matches: List[RuleMatch],
+        sats: bool = False,
     ) -> None:
         # Rule: too many sends in a short period
         if (
@@ -231,13 +333,17 @@ class GuardianEngine:
                         f"{wallet_ctx.recent_send_count} sends in "
                         f"{wallet_ctx.recent_window_seconds}s window."
                     ),
-                    weight=1.5,
+                    weight=RULE_WEIGHTS["BEHAV_RATE_SPIKE"],
                 )
             )
 
         # Rule: fee looks manipulated (too high)
         if tx_ctx.fee is not None and wallet_ctx.typical_fee is not None:
-            if tx_ctx.fee >= wallet_ctx.typical_fee * self.config.fee_multiplier_high:
+            if sats:
+                high_fee = at_least(tx_ctx.fee, wallet_ctx.typical_fee, self.config.fee_multiplier_high)
+            else:
+                high_fee = tx_ctx.fee >= wallet_ctx.typical_fee * self.config.fee_multiplier_high
+            if high_fee:
                 matches.append(
                     RuleMatch(
                         rule_id="FEE_UNUSUALLY_HIGH",
@@ -245,7 +351,7 @@ class GuardianEngine:
                             f"Fee {tx_ctx.fee} is much higher than typical "
                             f"{wallet_ctx.typical_fee}"
                         ),
-                        weight=1.0,
+                        weight=RULE_WEIGHTS["FEE_UNUSUALLY_HIGH"],
                     )
                 )
 
@@ -255,25 +361,93 @@ class GuardianEngine:
         matches: List[RuleMatch],
     ) -> None:
         sentinel_status = extra_signals.get("sentinel_status")
+        if sentinel_status is None:
+            # Fall back to the shared network-wide status (pinned snapshot first)
+            snapshot = extra_signals.get("sentinel_snapshot")
+            if snapshot is None and self.sentinel_board is not None:
+                snapshot = self.sentinel_board.current()
+            if snapshot is not None:
+                sentinel_status = snapshot.status
         if sentinel_status in {"HIGH", "CRITICAL"}:
             matches.append(
                 RuleMatch(
                     rule_id="SENTINEL_ALERT",
                     description=f"Sentinel AI v2 status is {sentinel_status}.",
-                    weight=2.5 if sentinel_status == "CRITICAL" else 1.5,
+                    weight=RULE_WEIGHTS[f"SENTINEL_ALERT_{sentinel_status}"],
                 )
             )
 
-        # Placeholder: device / session anomalies
+        # Device anomalies: caller flag, or derived by the v3 gate's device baseline
         if extra_signals.get("device_mismatch"):
             matches.append(
                 RuleMatch(
                     rule_id="DEVICE_MISMATCH",
                     description="Current device fingerprint differs from baseline.",
-                    weight=1.5,
+                    weight=RULE_WEIGHTS["DEVICE_MISMATCH"],
+                )
+            )
+
+        # Location change since the wallet's last send, faster than plausible travel
+        if extra_signals.get("impossible_travel"):
+            matches.append(
+                RuleMatch(
+                    rule_id="GEO_IMPOSSIBLE_TRAVEL",
+                    description="Location changed since the last send within an implausible time window.",
+                    weight=RULE_WEIGHTS["GEO_IMPOSSIBLE_TRAVEL"],
+                )
+            )
+
+        # Many distinct wallets suddenly sending to this destination (drain campaign)
+        if extra_signals.get("destination_fanin_spike"):
+            matches.append(
+                RuleMatch(
+                    rule_id="DEST_FANIN_SPIKE",
+                    description="Destination is receiving from an unusual number of distinct wallets.",
+                    weight=RULE_WEIGHTS["DEST_FANIN_SPIKE"],
                 )
             )
 
+    # ------------------------------------------------------------------ #
+    # Profiling (sampled calls only)
+    # ------------------------------------------------------------------ #
+
+    def _profile_context(
+        self,
+        profiler: RuleProfiler,
+        wallet_ctx: WalletContext,
+        tx_ctx: TransactionContext,
+        matches: List[RuleMatch],
+        sats: bool,
+    ) -> None:
+        clock = profiler.clock
+        timings: Dict[str, int] = {}
+        hits: Dict[str, List[str]] = {}
+        for group, apply in (
+            ("balance", lambda: self._apply_balance_rules(wallet_ctx, tx_ctx, matches, sats)),
+            ("destination", lambda: self._apply_destination_rules(wallet_ctx, tx_ctx, matches)),
+            ("behavior", lambda: self._apply_behavior_rules(wallet_ctx, tx_ctx, matches, sats)),
+        ):
+            before = len(matches)
+            start = clock()
+            apply()
+            timings[group] = clock() - start
+            hits[group] = [m.rule_id for m in matches[before:]]
+        profiler.record("context", timings, hits)
+
+    def _profile_signals(self, profiler: RuleProfiler, extra_signals: Dict[str, Any], matches: List[RuleMatch]) -> None:
+        # Weights are positive, so a CRITICAL context score can't be changed by signals.
+        decided = sum(m.weight for m in matches) >= self.config.threshold_critical
+        before = len(matches)
+        start = profiler.clock()
+        self._apply_external_signals(extra_signals, matches)
+        elapsed = profiler.clock() - start
+        profiler.record(
+            "signals",
+            {"external_signals": elapsed},
+            {"external_signals": [m.rule_id for m in matches[before:]]},
+            decided=decided,
+        )
+
     # ------------------------------------------------------------------ #
     # Helpers
     # ------------------------------------------------------------------ #
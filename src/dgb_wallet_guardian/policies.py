@@ -1,5 +1,26 @@
-from dataclasses import dataclass
+"""
+Wallet policy layer: maps the engine's level and rule hits, plus the
+wallet's own limits, to allow / warn / delay / block / require_extra_auth.
+
+Each policy is compiled once into a flat table indexed by
+(risk level, set of triggered PolicyRules), so resolving a request is a
+handful of compares and one tuple index. Per-wallet overrides are interned:
+wallets sharing the same override share one compiled policy, and the store
+keeps a single reference per wallet.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import threading
+from dataclasses import dataclass, field, fields, replace
 from enum import Enum
+from typing import Any, Dict, FrozenSet, Iterable, Mapping, Optional, Tuple
+
+from .contracts.v3_hash import canonical_sha256
+from .decisions import DECISION_SEVERITY, GuardianDecisionType, GuardianResult
+from .models import RiskLevel
 
 
 class PolicyRule(str, Enum):
@@ -18,8 +39,199 @@ class GuardianPolicy:
     # Max amount allowed per 24h window
     max_daily_amount: float = 50_000.0
 
-    # How big a destination risk score triggers warnings
+    # Single-TX amount at or above which extra auth is required
     threshold_extra_auth: float = 10_000.0
 
     # Whether sending full balance requires special handling
     block_full_balance_tx: bool = True
+
+    # Cooldown attached to a DELAY decision (daily limit exceeded)
+    delay_seconds: int = 3600
+
+
+_POLICY_FIELDS = {f.name: f.type for f in fields(GuardianPolicy)}
+_RULE_BITS: Dict[PolicyRule, int] = {rule: 1 << i for i, rule in enumerate(PolicyRule)}
+_FLAG_COMBOS = 1 << len(PolicyRule)
+_LEVELS: Tuple[RiskLevel, ...] = tuple(RiskLevel)
+_LEVEL_INDEX: Dict[RiskLevel, int] = {level: i for i, level in enumerate(_LEVELS)}
+
+# Engine rule ids that trigger a policy rule directly.
+_ENGINE_TRIGGERS: Tuple[Tuple[str, PolicyRule], ...] = (
+    ("BALANCE_FULL_WIPE", PolicyRule.FULL_BALANCE),
+    ("DEST_HIGH_RISK", PolicyRule.DESTINATION_RISK),
+    ("DEST_FANIN_SPIKE", PolicyRule.DESTINATION_RISK),
+    ("DEVICE_MISMATCH", PolicyRule.DEVICE_UNTRUSTED),
+)
+
+_LEVEL_DECISION: Dict[RiskLevel, GuardianDecisionType] = {
+    RiskLevel.NORMAL: GuardianDecisionType.ALLOW,
+    RiskLevel.ELEVATED: GuardianDecisionType.WARN,
+    RiskLevel.HIGH: GuardianDecisionType.REQUIRE_EXTRA_AUTH,
+    RiskLevel.CRITICAL: GuardianDecisionType.BLOCK,
+}
+
+Overrides = Tuple[Tuple[str, Any], ...]
+
+
+def rule_ids(reasons: Iterable[str]) -> FrozenSet[str]:
+    """Rule ids from engine reasons ("RULE_ID: description")."""
+    return frozenset(r.split(":", 1)[0].strip() for r in reasons if isinstance(r, str) and ":" in r)
+
+
+def _rule_decision(policy: GuardianPolicy, rule: PolicyRule) -> GuardianDecisionType:
+    if rule is PolicyRule.FULL_BALANCE:
+        return GuardianDecisionType.BLOCK if policy.block_full_balance_tx else GuardianDecisionType.REQUIRE_EXTRA_AUTH
+    if rule is PolicyRule.DAILY_LIMIT:
+        return GuardianDecisionType.DELAY
+    if rule is PolicyRule.DESTINATION_RISK:
+        return GuardianDecisionType.WARN
+    return GuardianDecisionType.REQUIRE_EXTRA_AUTH  # LARGE_TX, DEVICE_UNTRUSTED
+
+
+def _compile_entry(policy: GuardianPolicy, level: RiskLevel, flags: int) -> GuardianResult:
+    triggered = [rule for rule in PolicyRule if flags & _RULE_BITS[rule]]
+    decision = max([_LEVEL_DECISION[level]] + [_rule_decision(policy, r) for r in triggered], key=DECISION_SEVERITY.__getitem__)
+    blocked = decision is GuardianDecisionType.BLOCK
+    reason = level.value + (": " + ", ".join(r.value for r in triggered) if triggered else "")
+    return GuardianResult(
+        decision=decision,
+        reason=reason,
+        cooldown_seconds=policy.delay_seconds if PolicyRule.DAILY_LIMIT in triggered and not blocked else 0,
+        require_second_factor=decision is GuardianDecisionType.REQUIRE_EXTRA_AUTH,
+    )
+
+
+@dataclass(frozen=True)
+class CompiledPolicy:
+    """A policy with every (level, trigger set) outcome precomputed."""
+
+    policy: GuardianPolicy
+    digest: str
+    overrides: Overrides = ()
+    table: Tuple[GuardianResult, ...] = field(default=(), repr=False)
+
+    def triggers(self, hits: Iterable[str], amount: float, balance: float, daily_sent: float = 0.0) -> int:
+        """Bitmask of triggered PolicyRules."""
+        p = self.policy
+        flags = 0
+        if amount >= p.threshold_extra_auth or (balance > 0 and amount > balance * p.max_tx_ratio):
+            flags |= _RULE_BITS[PolicyRule.LARGE_TX]
+        if daily_sent + amount > p.max_daily_amount:
+            flags |= _RULE_BITS[PolicyRule.DAILY_LIMIT]
+        for rule_id, rule in _ENGINE_TRIGGERS:
+            if rule_id in hits:
+                flags |= _RULE_BITS[rule]
+        return flags
+
+    def resolve(
+        self,
+        level: RiskLevel,
+        hits: Iterable[str],
+        amount: float,
+        balance: float,
+        daily_sent: float = 0.0,
+    ) -> GuardianResult:
+        return self.table[_LEVEL_INDEX[level] * _FLAG_COMBOS + self.triggers(hits, amount, balance, daily_sent)]
+
+
+def _coerce_overrides(raw: Mapping[str, Any]) -> Overrides:
+    if not isinstance(raw, Mapping):
+        raise ValueError("policy must be a mapping")
+    unknown = set(raw) - set(_POLICY_FIELDS)
+    if unknown:
+        raise ValueError(f"unknown policy keys: {sorted(unknown)}")
+    values: Dict[str, Any] = {}
+    for key, value in raw.items():
+        if _POLICY_FIELDS[key] == "bool":
+            if not isinstance(value, bool):
+                raise ValueError(f"policy value for {key!r} must be a boolean")
+        elif isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value) or value < 0:
+            raise ValueError(f"policy value for {key!r} must be a non-negative number")
+        elif _POLICY_FIELDS[key] == "int":
+            value = int(value)
+        else:
+            value = float(value)
+        values[key] = value
+    return tuple(sorted(values.items()))
+
+
+def compile_policy(base: Optional[GuardianPolicy] = None, overrides: Optional[Mapping[str, Any]] = None) -> CompiledPolicy:
+    """Validate `overrides` on top of `base` and build the lookup table. Raises ValueError on bad input."""
+    items = _coerce_overrides(overrides or {})
+    policy = replace(base or GuardianPolicy(), **dict(items))
+    digest = canonical_sha256({name: getattr(policy, name) for name in _POLICY_FIELDS})
+    table = tuple(_compile_entry(policy, level, flags) for level in _LEVELS for flags in range(_FLAG_COMBOS))
+    return CompiledPolicy(policy=policy, digest=digest, overrides=items, table=table)
+
+
+class PolicyStore:
+    """
+    Default policy plus per-wallet overrides, each resolved in O(1).
+
+    Overrides are validated and compiled on write; identical overrides are
+    compiled once and shared. Readers never lock.
+    """
+
+    def __init__(
+        self,
+        default: Optional[Mapping[str, Any]] = None,
+        wallets: Optional[Mapping[str, Mapping[str, Any]]] = None,
+    ) -> None:
+        self._write_lock = threading.Lock()
+        self._default = compile_policy(overrides=default or {})
+        self._interned: Dict[Overrides, CompiledPolicy] = {}
+        self._wallets: Dict[str, CompiledPolicy] = {}
+        for wallet_id, raw in (wallets or {}).items():
+            self.set_override(wallet_id, raw)
+
+    @classmethod
+    def from_file(cls, path: str) -> "PolicyStore":
+        """File format: {"default": {<GuardianPolicy fields>}, "wallets": {"<wallet_id>": {...}}}."""
+        with open(path, "r", encoding="utf-8") as fh:
+            doc = json.load(fh)
+        if not isinstance(doc, dict) or set(doc) - {"default", "wallets"}:
+            raise ValueError("policy file must be {\"default\": {...}, \"wallets\": {...}}")
+        return cls(doc.get("default"), doc.get("wallets"))
+
+    @property
+    def default(self) -> CompiledPolicy:
+        return self._default
+
+    def __len__(self) -> int:
+        return len(self._wallets)
+
+    def distinct_policies(self) -> int:
+        return len(self._interned)
+
+    def get(self, wallet_id: Optional[str] = None) -> CompiledPolicy:
+        if wallet_id is None:
+            return self._default
+        return self._wallets.get(wallet_id, self._default)
+
+    def set_override(self, wallet_id: str, overrides: Mapping[str, Any]) -> CompiledPolicy:
+        """Give `wallet_id` the default policy with `overrides` applied (validated first)."""
+        if not isinstance(wallet_id, str) or not wallet_id:
+            raise ValueError("wallet_id must be a non-empty string")
+        items = _coerce_overrides(overrides)
+        with self._write_lock:
+            compiled = self._interned.get(items)
+            if compiled is None:
+                compiled = compile_policy(self._default.policy, dict(items))
+                self._interned[items] = compiled
+            self._wallets[wallet_id] = compiled
+        return compiled
+
+    def remove_override(self, wallet_id: str) -> bool:
+        with self._write_lock:
+            return self._wallets.pop(wallet_id, None) is not None
+
+    def resolve(
+        self,
+        level: RiskLevel,
+        hits: Iterable[str],
+        amount: float,
+        balance: float,
+        daily_sent: float = 0.0,
+        wallet_id: Optional[str] = None,
+    ) -> GuardianResult:
+        return self.get(wallet_id).resolve(level, hits, amount, balance, daily_sent)
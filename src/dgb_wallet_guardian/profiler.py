@@ -0,0 +1,110 @@
+"""
+Opt-in sampling profiler for GuardianEngine rule groups.
+
+    profiler = RuleProfiler(sample_every=100)
+    guardian = WalletGuardian(profiler=profiler)
+    ...
+    print(json.dumps(profiler.report(), indent=2))
+
+Every `sample_every`-th call to each engine phase (context rules in
+`prepare_context`, external-signal rules in `reevaluate_signals`) is timed
+per `_apply_*` group and its rule hits are counted; other calls pay one
+counter increment. Rules inside a group share a code path, so cost is
+reported per group and hit rate per rule.
+
+The report ranks rules by hit rate within each group (candidates to check
+first) and gives `decided_by_context`: the share of sampled signal passes
+whose context rules alone already scored CRITICAL, where evaluating the
+signal rules cannot change the outcome (an early-exit opportunity).
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable
+
+# Engine phases and the rule groups each one runs, in evaluation order.
+GROUPS: Dict[str, str] = {
+    "balance": "context",
+    "destination": "context",
+    "behavior": "context",
+    "external_signals": "signals",
+}
+
+
+class RuleProfiler:
+    """Thread-safe sampled per-group cost and per-rule hit counters."""
+
+    def __init__(self, sample_every: int = 100, clock: Callable[[], int] = time.perf_counter_ns) -> None:
+        if sample_every <= 0:
+            raise ValueError("sample_every must be positive")
+        self.sample_every = sample_every
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._calls = {phase: itertools.count() for phase in set(GROUPS.values())}
+        self._reset_counters()
+
+    def _reset_counters(self) -> None:
+        self._samples: Dict[str, int] = {phase: 0 for phase in set(GROUPS.values())}
+        self._group_ns: Dict[str, int] = {group: 0 for group in GROUPS}
+        self._group_max_ns: Dict[str, int] = {group: 0 for group in GROUPS}
+        self._hits: Dict[str, Dict[str, int]] = {group: {} for group in GROUPS}
+        self._decided = 0
+
+    def sample(self, phase: str) -> bool:
+        """Count one call of `phase`; True if this call should be profiled."""
+        return next(self._calls[phase]) % self.sample_every == 0
+
+    def record(self, phase: str, timings: Dict[str, int], hits: Dict[str, Iterable[str]], decided: bool = False) -> None:
+        """Add one sampled call: ns per group and the rule ids each group matched."""
+        with self._lock:
+            self._samples[phase] += 1
+            for group, ns in timings.items():
+                self._group_ns[group] += ns
+                if ns > self._group_max_ns[group]:
+                    self._group_max_ns[group] = ns
+            for group, rule_ids in hits.items():
+                counts = self._hits[group]
+                for rule_id in rule_ids:
+                    counts[rule_id] = counts.get(rule_id, 0) + 1
+            if decided:
+                self._decided += 1
+
+    def report(self) -> Dict[str, Any]:
+        """Plain-dict report (JSON-serialisable)."""
+        with self._lock:
+            total_ns = sum(self._group_ns.values())
+            groups: Dict[str, Any] = {}
+            for group, phase in GROUPS.items():
+                samples = self._samples[phase]
+                ranked = sorted(self._hits[group].items(), key=lambda kv: (-kv[1], kv[0]))
+                groups[group] = {
+                    "phase": phase,
+                    "samples": samples,
+                    "mean_us": (self._group_ns[group] / samples / 1000.0) if samples else 0.0,
+                    "max_us": self._group_max_ns[group] / 1000.0,
+                    "time_share": (self._group_ns[group] / total_ns) if total_ns else 0.0,
+                    "rules": [
+                        {"rule_id": rule_id, "hits": n, "hit_rate": n / samples}
+                        for rule_id, n in ranked
+                    ],
+                }
+            signal_samples = self._samples["signals"]
+            return {
+                "sample_every": self.sample_every,
+                "groups": groups,
+                "decided_by_context": (self._decided / signal_samples) if signal_samples else 0.0,
+            }
+
+    def dump_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(self.report(), fh, indent=2, sort_keys=True)
+            fh.write("\n")
+
+    def reset(self) -> None:
+        with self._lock:
+            self._reset_counters()
+
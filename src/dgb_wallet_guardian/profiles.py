@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import json
+import math
+import threading
+from dataclasses import FrozenInstanceError, dataclass, field, fields
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple, Union
+
+from .client import WalletGuardian
+from .config import GuardianConfig
+from .contracts.v3_hash import canonical_sha256
+from .contracts.v3_reason_codes import ReasonCode
+from .models import RiskLevel
+
+ConfigLike = Union[GuardianConfig, Mapping[str, Any]]
+
+_CONFIG_FIELDS = {f.name: f.type for f in fields(GuardianConfig)}
+
+# Level -> (v3 outcome, outcome reason code); identical to GuardianWalletV3's mapping.
+_DECISION_TABLE: Mapping[RiskLevel, Tuple[str, str]] = MappingProxyType(
+    {
+        RiskLevel.NORMAL: ("allow", ReasonCode.GW_OK_HEALTHY_ALLOW.value),
+        RiskLevel.ELEVATED: ("escalate", ReasonCode.GW_ESCALATE_ELEVATED.value),
+        RiskLevel.HIGH: ("deny", ReasonCode.GW_DENY_HIGH_OR_CRITICAL.value),
+        RiskLevel.CRITICAL: ("deny", ReasonCode.GW_DENY_HIGH_OR_CRITICAL.value),
+    }
+)
+
+
+@dataclass(frozen=True)
+class GuardianProfile:
+    """
+    A tenant's compiled, read-only Guardian configuration.
+
+    Everything derivable from the config is built once here: the validated
+    config copy, its digest (for audit / context_hash), the level -> outcome
+    table and a ready WalletGuardian. Requests only look the profile up;
+    nothing is constructed per call.
+    """
+
+    tenant: str
+    config: GuardianConfig
+    digest: str
+    decision_table: Mapping[RiskLevel, Tuple[str, str]]
+    guardian: WalletGuardian = field(compare=False, repr=False)
+
+    def audit_dict(self) -> Dict[str, str]:
+        return {"tenant": self.tenant, "digest": self.digest}
+
+
+class _FrozenConfig(GuardianConfig):
+    """A profile's GuardianConfig: read-only once built, since requests share it across threads."""
+
+    def __init__(self, **values: Any) -> None:
+        super().__init__(**values)
+        object.__setattr__(self, "_sealed", True)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if getattr(self, "_sealed", False):
+            raise FrozenInstanceError(f"cannot assign to field {name!r}")
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name: str) -> None:
+        raise FrozenInstanceError(f"cannot delete field {name!r}")
+
+
+def _coerce_config(raw: ConfigLike) -> GuardianConfig:
+    if isinstance(raw, GuardianConfig):
+        raw = {key: getattr(raw, key) for key in _CONFIG_FIELDS}  # private copy; the caller's object stays theirs
+    if not isinstance(raw, Mapping):
+        raise ValueError("profile config must be a mapping")
+
+    unknown = set(raw) - set(_CONFIG_FIELDS)
+    if unknown:
+        raise ValueError(f"unknown config keys: {sorted(unknown)}")
+
+    values: Dict[str, Any] = {}
+    for key, value in raw.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"config value for {key!r} must be a number")
+        if not math.isfinite(float(value)):
+            raise ValueError(f"config value for {key!r} must be finite")
+        if _CONFIG_FIELDS[key] == "int":
+            if isinstance(value, float) and not value.is_integer():
+                raise ValueError(f"config value for {key!r} must be a whole number")
+            values[key] = int(value)
+        else:
+            values[key] = float(value)
+    return _FrozenConfig(**values)
+
+
+def compile_profile(tenant: str, raw: ConfigLike) -> GuardianProfile:
+    """Validate and precompile one tenant profile. Raises ValueError on bad input."""
+    if not isinstance(tenant, str) or not tenant.strip():
+        raise ValueError("tenant must be a non-empty string")
+
+    config = _coerce_config(raw)
+    if not (config.threshold_elevated <= config.threshold_high <= config.threshold_critical):
+        raise ValueError("thresholds must satisfy elevated <= high <= critical")
+
+    config_dict = {f: getattr(config, f) for f in _CONFIG_FIELDS}
+    return GuardianProfile(
+        tenant=tenant.strip(),
+        config=config,
+        digest=canonical_sha256(config_dict),
+        decision_table=_DECISION_TABLE,
+        guardian=WalletGuardian(config=config),
+    )
+
+
+class ProfileRegistry:
+    """
+    Tenant -> GuardianProfile registry with copy-on-write hot swap.
+
+    The live table is an immutable mapping published through a single
+    attribute; readers take one reference and never lock. `replace` and
+    `reload` compile the complete new table first and swap it in only if
+    every profile compiled, so a bad file never takes traffic down and no
+    request ever sees a half-updated table.
+    """
+
+    def __init__(self, profiles: Optional[Mapping[str, ConfigLike]] = None, *, path: Optional[str] = None) -> None:
+        self._path = path
+        self._write_lock = threading.Lock()
+        self._table: Tuple[int, Mapping[str, GuardianProfile]] = (0, MappingProxyType({}))
+        if profiles is not None:
+            self.replace(profiles)
+
+    @classmethod
+    def from_file(cls, path: str) -> "ProfileRegistry":
+        registry = cls(path=path)
+        registry.reload()
+        return registry
+
+    @property
+    def version(self) -> int:
+        return self._table[0]
+
+    def tenants(self) -> Tuple[str, ...]:
+        return tuple(sorted(self._table[1]))
+
+    def get(self, tenant: str) -> Optional[GuardianProfile]:
+        return self._table[1].get(tenant)
+
+    def replace(self, profiles: Mapping[str, ConfigLike]) -> int:
+        """Compile all profiles, then atomically publish them. Returns the new version."""
+        compiled = {str(t).strip(): compile_profile(str(t), raw) for t, raw in profiles.items()}
+        with self._write_lock:
+            version = self._table[0] + 1
+            self._table = (version, MappingProxyType(compiled))
+        return version
+
+    def reload(self, path: Optional[str] = None) -> int:
+        """
+        Re-read a JSON profile file and swap it in.
+
+        File format: {"tenants": {"<tenant>": {<GuardianConfig fields>}, ...}}.
+        Omitted fields take GuardianConfig defaults.
+        """
+        src = path or self._path
+        if src is None:
+            raise ValueError("no profile file configured")
+        with open(src, "r", encoding="utf-8") as fh:
+            doc = json.load(fh)
+        if not isinstance(doc, dict) or set(doc) - {"tenants"} or not isinstance(doc.get("tenants"), dict):
+            raise ValueError("profile file must be {\"tenants\": {...}}")
+        version = self.replace(doc["tenants"])
+        self._path = src
+        return version
@@ -0,0 +1,261 @@
+"""
+Replay harness: compare candidate GuardianConfig profiles against historical traffic.
+
+Streams a JSONL corpus of v3 requests once, evaluates every line against a
+baseline profile and each candidate profile in worker processes, and
+reports a per-candidate outcome confusion matrix (baseline -> candidate)
+plus a deterministic sample of flipped request_ids.
+
+Memory stays constant in corpus size: lines are read in fixed-size chunks,
+only a bounded number of chunks are in flight, and flip samples are kept
+as bottom-k sets (mergeable in any order, so results do not depend on
+worker scheduling).
+
+    python -m dgb_wallet_guardian.replay corpus.jsonl --configs candidates.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import heapq
+import json
+import sys
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Set, Tuple
+
+from .config import GuardianConfig
+from .contracts.v3_codec import loads_json
+from .profiles import ConfigLike, ProfileRegistry
+from .v3 import GuardianWalletV3
+
+OUTCOMES: Tuple[str, ...] = ("allow", "escalate", "deny")
+DEFAULT_BASELINE = "__default__"
+
+# (priority, request_id) pairs; lowest priorities are the sample.
+_Sample = List[Tuple[int, str]]
+
+
+def _flip_priority(request_id: str) -> int:
+    return int.from_bytes(hashlib.blake2b(request_id.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _keep_bottom_k(items: Iterable[Tuple[int, str]], k: int) -> _Sample:
+    return heapq.nsmallest(k, set(items))
+
+
+@dataclass
+class ConfigReport:
+    """Baseline -> candidate outcome counts for one candidate profile."""
+
+    name: str
+    digest: str
+    matrix: Dict[str, Dict[str, int]] = field(
+        default_factory=lambda: {b: {c: 0 for c in OUTCOMES} for b in OUTCOMES}
+    )
+    _sample: _Sample = field(default_factory=list)
+
+    @property
+    def flipped(self) -> int:
+        return sum(n for b, row in self.matrix.items() for c, n in row.items() if b != c)
+
+    def flip_sample(self) -> List[str]:
+        return [rid for _, rid in self._sample]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "digest": self.digest,
+            "matrix": self.matrix,
+            "flipped": self.flipped,
+            "flip_sample": self.flip_sample(),
+        }
+
+
+@dataclass
+class ReplayReport:
+    baseline: str
+    lines: int = 0
+    invalid_lines: int = 0
+    configs: Dict[str, ConfigReport] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "baseline": self.baseline,
+            "lines": self.lines,
+            "invalid_lines": self.invalid_lines,
+            "configs": {name: rep.to_dict() for name, rep in sorted(self.configs.items())},
+        }
+
+
+# Partial result for one chunk: (lines, invalid, {name: (matrix_counts, sample)})
+_ChunkResult = Tuple[int, int, Dict[str, Tuple[Dict[Tuple[str, str], int], _Sample]]]
+
+_worker_state: Optional[Tuple[GuardianWalletV3, str, Tuple[str, ...], int]] = None
+
+
+def _init_worker(profiles: Mapping[str, ConfigLike], baseline: str, candidates: Sequence[str], sample_size: int) -> None:
+    global _worker_state
+    gate = GuardianWalletV3(profiles=ProfileRegistry(profiles))
+    _worker_state = (gate, baseline, tuple(candidates), sample_size)
+
+
+def _replay_chunk(lines: Sequence[bytes]) -> _ChunkResult:
+    assert _worker_state is not None, "worker not initialised"
+    gate, baseline, candidates, sample_size = _worker_state
+
+    counts: Dict[str, Dict[Tuple[str, str], int]] = {name: {} for name in candidates}
+    flips: Dict[str, _Sample] = {name: [] for name in candidates}
+    seen = 0
+    invalid = 0
+
+    for line in lines:
+        if not line.strip():
+            continue
+        seen += 1
+        try:
+            request = loads_json(line)
+        except ValueError:
+            request = None
+        if not isinstance(request, dict):
+            invalid += 1
+            continue
+
+        base = gate.evaluate(request, tenant=baseline)["outcome"]
+        for name in candidates:
+            out = gate.evaluate(request, tenant=name)["outcome"]
+            key = (base, out)
+            counts[name][key] = counts[name].get(key, 0) + 1
+            if out != base:
+                rid = str(request.get("request_id", "unknown"))
+                flips[name].append((_flip_priority(rid), rid))
+
+    return seen, invalid, {
+        name: (counts[name], _keep_bottom_k(flips[name], sample_size)) for name in candidates
+    }
+
+
+def _iter_chunks(stream: Iterable[bytes], chunk_lines: int) -> Iterator[List[bytes]]:
+    chunk: List[bytes] = []
+    for line in stream:
+        chunk.append(line)
+        if len(chunk) >= chunk_lines:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _merge(report: ReplayReport, result: _ChunkResult, sample_size: int) -> None:
+    seen, invalid, per_config = result
+    report.lines += seen
+    report.invalid_lines += invalid
+    for name, (counts, sample) in per_config.items():
+        rep = report.configs[name]
+        for (base, out), n in counts.items():
+            rep.matrix[base][out] += n
+        rep._sample = _keep_bottom_k(rep._sample + sample, sample_size)
+
+
+def replay(
+    stream: Iterable[bytes],
+    candidates: Mapping[str, ConfigLike],
+    *,
+    baseline: Optional[ConfigLike] = None,
+    baseline_name: str = DEFAULT_BASELINE,
+    workers: int = 0,
+    chunk_lines: int = 2000,
+    sample_size: int = 20,
+) -> ReplayReport:
+    """
+    Replay `stream` (an iterable of JSONL byte lines) against every candidate.
+
+    `workers=0` evaluates in-process; otherwise chunks are spread across that
+    many processes with at most 2 * workers chunks in flight.
+    """
+    if chunk_lines <= 0 or sample_size < 0 or workers < 0:
+        raise ValueError("chunk_lines must be positive; sample_size and workers non-negative")
+    if baseline_name in candidates:
+        raise ValueError("baseline name collides with a candidate")
+
+    profiles: Dict[str, ConfigLike] = dict(candidates)
+    profiles[baseline_name] = baseline if baseline is not None else GuardianConfig()
+    registry = ProfileRegistry(profiles)  # validates everything up front
+
+    names = tuple(sorted(candidates))
+    report = ReplayReport(baseline=baseline_name)
+    for name in names:
+        prof = registry.get(name)
+        assert prof is not None
+        report.configs[name] = ConfigReport(name=name, digest=prof.digest)
+
+    init_args = (profiles, baseline_name, names, sample_size)
+    chunks = _iter_chunks(stream, chunk_lines)
+
+    if workers == 0:
+        _init_worker(*init_args)
+        for chunk in chunks:
+            _merge(report, _replay_chunk(chunk), sample_size)
+        return report
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+        pending: Set[Future[_ChunkResult]] = set()
+        for chunk in chunks:
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    _merge(report, fut.result(), sample_size)
+            pending.add(pool.submit(_replay_chunk, chunk))
+        for fut in pending:
+            _merge(report, fut.result(), sample_size)
+    return report
+
+
+def _load_candidates(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as fh:
+        doc = json.load(fh)
+    if not isinstance(doc, dict) or not isinstance(doc.get("tenants"), dict):
+        raise ValueError("candidate file must be {\"tenants\": {...}}")
+    return dict(doc["tenants"])
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a v3 JSONL corpus against candidate configs.")
+    parser.add_argument("corpus", help="JSONL file of v3 requests ('-' for stdin)")
+    parser.add_argument("--configs", required=True, help="profile file: {\"tenants\": {name: {...}}}")
+    parser.add_argument("--baseline", help="candidate name to use as baseline (default: GuardianConfig())")
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--chunk-lines", type=int, default=2000)
+    parser.add_argument("--sample", type=int, default=20)
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    candidates = _load_candidates(args.configs)
+    baseline: Optional[ConfigLike] = None
+    baseline_name = DEFAULT_BASELINE
+    if args.baseline:
+        if args.baseline not in candidates:
+            parser.error(f"unknown baseline {args.baseline!r}")
+        baseline = candidates.pop(args.baseline)
+        baseline_name = args.baseline
+
+    if args.corpus == "-":
+        stream: Any = sys.stdin.buffer
+        report = replay(stream, candidates, baseline=baseline, baseline_name=baseline_name,
+                        workers=args.workers, chunk_lines=args.chunk_lines, sample_size=args.sample)
+    else:
+        with open(args.corpus, "rb") as fh:
+            report = replay(fh, candidates, baseline=baseline, baseline_name=baseline_name,
+                            workers=args.workers, chunk_lines=args.chunk_lines, sample_size=args.sample)
+
+    text = json.dumps(report.to_dict(), indent=2, sort_keys=True)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,132 @@
+"""
+Integer satoshi amounts (opt-in): validation, exact ratio rules, int64 columns.
+
+With `GuardianWalletV3(AMOUNT_UNITS="sat")` the amount fields (balance,
+typical_amount, amount, fee) are JSON integers in satoshis (1 DGB = 1e8 sat)
+and the balance / fee rules compare with integer multiplies against the
+config ratios taken as exact decimals (full_wipe_ratio 0.9 -> 9/10).
+
+Hash mapping: DGB (float) requests hash exactly as before. Satoshi requests
+hash the integer amounts as-is plus `"amount_units": "sat"`, so the two
+forms never share a context hash; convert with `dgb_to_sats` when
+migrating a caller.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Iterable, Tuple
+
+SATS_PER_DGB = 100_000_000
+# DigiByte max supply (21 billion DGB); every valid amount fits an int64.
+MAX_SATS = 21_000_000_000 * SATS_PER_DGB
+_INT64_MAX = 2**63 - 1
+
+WALLET_AMOUNT_KEYS: Tuple[str, ...] = ("balance", "typical_amount")
+TX_AMOUNT_KEYS: Tuple[str, ...] = ("amount", "fee")
+# Wallet amounts an enrichment provider may also fill in (see enrichment.WALLET_FIELDS).
+ENRICHED_WALLET_AMOUNT_KEYS: Tuple[str, ...] = WALLET_AMOUNT_KEYS + ("typical_fee", "daily_sent_amount")
+
+
+def is_sats(x: Any) -> bool:
+    """True for an int (not bool) in [0, MAX_SATS]."""
+    return type(x) is int and 0 <= x <= MAX_SATS
+
+
+def dgb_to_sats(x: Any) -> int:
+    """
+    Exact DGB -> satoshi conversion of the decimal the value prints as.
+
+    0.1 becomes 10_000_000 (not 9_999_999); sub-satoshi precision,
+    non-finite values and amounts outside [0, MAX_SATS] raise ValueError.
+    """
+    if isinstance(x, bool):
+        raise ValueError("amount must be a number")
+    from decimal import Decimal, InvalidOperation  # off the gate's import path
+
+    try:
+        sats = Decimal(repr(x) if isinstance(x, float) else str(x)) * SATS_PER_DGB
+    except InvalidOperation:
+        raise ValueError(f"not a decimal amount: {x!r}") from None
+    if not sats.is_finite() or sats != sats.to_integral_value():
+        raise ValueError(f"amount {x!r} is not a whole number of satoshis")
+    n = int(sats)
+    if not 0 <= n <= MAX_SATS:
+        raise ValueError(f"amount {x!r} out of range")
+    return n
+
+
+def sats_to_dgb(n: int) -> float:
+    """Nearest float DGB (display / legacy interop only)."""
+    return n / SATS_PER_DGB
+
+
+@lru_cache(maxsize=64)
+def ratio_fraction(ratio: float) -> Tuple[int, int]:
+    """(num, den) of a config ratio read as the decimal it prints as."""
+    from fractions import Fraction  # off the gate's import path
+
+    f = Fraction(repr(float(ratio)))
+    if f < 0:
+        raise ValueError("ratio must be non-negative")
+    return f.numerator, f.denominator
+
+
+def at_least(a: int, b: int, ratio: float) -> bool:
+    """Exact `a >= b * ratio` for integer satoshi amounts."""
+    num, den = ratio_fraction(ratio)
+    return a * den >= b * num
+
+
+# ---------------------------------------------------------------------- #
+# int64 columns (batch paths; require numpy)
+# ---------------------------------------------------------------------- #
+
+
+def _numpy() -> Any:
+    # Imported on first use: the scalar helpers above sit on the gate's hot path.
+    try:
+        import numpy
+    except ImportError:  # pragma: no cover - exercised only without numpy
+        raise ImportError("satoshi arrays require numpy: pip install 'dgb-wallet-guardian[analytics]'") from None
+    return numpy
+
+
+def sats_array(values: Iterable[Any]) -> Any:
+    """
+    int64 column of satoshi amounts; rejects out-of-range or non-integral values.
+
+    Floats are read as DGB and converted with `dgb_to_sats`.
+    """
+    np = _numpy()
+    arr = values if isinstance(values, np.ndarray) else np.asarray(list(values))
+    if arr.dtype.kind == "f":
+        return np.fromiter((dgb_to_sats(float(v)) for v in arr), dtype=np.int64, count=arr.size)
+    if arr.dtype.kind not in "iu":
+        raise ValueError("satoshi column must be integer or float")
+    if arr.size and (arr.min() < 0 or arr.max() > MAX_SATS):
+        raise ValueError("satoshi amount out of range")
+    return arr.astype(np.int64, copy=False)
+
+
+def at_least_array(a: Any, b: Any, ratio: float) -> Any:
+    """
+    Elementwise exact `a >= b * ratio` over int64 satoshi columns.
+
+    Computes b <= floor(a * den / num) piecewise, so no intermediate leaves
+    int64 for amounts within [0, MAX_SATS]. Ratios whose fraction is too
+    wide for that (1/3 reads as 3333333333333333/10**16) fall back to
+    Python-int arithmetic, which is exact but slower.
+    """
+    np = _numpy()
+    num, den = ratio_fraction(ratio)
+    a = np.asarray(a, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+    if num == 0:
+        return np.ones(np.broadcast(a, b).shape, dtype=bool)
+    if max(num, (num - 1) * den, MAX_SATS + 2 * den) > _INT64_MAX:
+        return (a.astype(object) * den >= b.astype(object) * num).astype(bool)
+    # a*den >= b*num  <=>  b <= floor(a*den/num); quotients past MAX_SATS are capped (always true).
+    q = np.minimum(a // num, MAX_SATS // den + 1)
+    limit = q * den + ((a % num) * den) // num
+    return b <= limit
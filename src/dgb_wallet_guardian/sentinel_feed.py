@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .v3 import GuardianWalletV3, SignalHandle
+
+# Sentinel AI v2 network status, in increasing severity.
+SENTINEL_LEVELS: Tuple[str, ...] = ("NORMAL", "ELEVATED", "HIGH", "CRITICAL")
+_SEVERITY = {s: i for i, s in enumerate(SENTINEL_LEVELS)}
+
+
+@dataclass(frozen=True)
+class SentinelSnapshot:
+    """One published network-wide Sentinel status. `version` increases by 1 per publish."""
+
+    status: str
+    version: int
+
+    def audit_dict(self) -> Dict[str, Any]:
+        return {"status": self.status, "version": self.version}
+
+
+EscalationListener = Callable[[SentinelSnapshot, SentinelSnapshot], None]
+
+
+class SentinelStatusBoard:
+    """
+    Process-wide, versioned Sentinel status.
+
+    Readers call `current()`, which is a single attribute read of an
+    immutable snapshot (no lock). Publishers serialise on a writer lock,
+    bump the version and, when severity rises, notify escalation listeners
+    (outside the lock). Listener errors are swallowed: a broken hook must
+    never affect the published status.
+    """
+
+    def __init__(self, status: str = "NORMAL") -> None:
+        if status not in _SEVERITY:
+            raise ValueError(f"unknown sentinel status {status!r}")
+        self._snapshot = SentinelSnapshot(status=status, version=0)
+        self._write_lock = threading.Lock()
+        self._listeners: List[EscalationListener] = []
+
+    def current(self) -> SentinelSnapshot:
+        return self._snapshot
+
+    def publish(self, status: str) -> SentinelSnapshot:
+        """Publish a status. Re-publishing the current status is a no-op (same snapshot)."""
+        status = str(status).strip().upper()
+        if status not in _SEVERITY:
+            raise ValueError(f"unknown sentinel status {status!r}")
+        with self._write_lock:
+            old = self._snapshot
+            if status == old.status:
+                return old
+            new = SentinelSnapshot(status=status, version=old.version + 1)
+            self._snapshot = new
+            listeners = list(self._listeners)
+
+        if _SEVERITY[new.status] > _SEVERITY[old.status]:
+            for listener in listeners:
+                try:
+                    listener(old, new)
+                except Exception:
+                    pass
+        return new
+
+    def on_escalation(self, listener: EscalationListener) -> Callable[[], None]:
+        """Register a listener for severity increases; returns an unsubscribe callable."""
+        with self._write_lock:
+            self._listeners.append(listener)
+
+        def unsubscribe() -> None:
+            with self._write_lock:
+                if listener in self._listeners:
+                    self._listeners.remove(listener)
+
+        return unsubscribe
+
+
+class SentinelFileFeed:
+    """
+    Local subscription stand-in: follow a status file and publish changes.
+
+    The file holds either a bare status ("HIGH") or JSON ({"status": "HIGH"}).
+    `poll_once()` is the whole protocol; `start()` just runs it on a daemon
+    thread every `interval` seconds. Unreadable or invalid files leave the
+    board untouched.
+    """
+
+    def __init__(self, board: SentinelStatusBoard, path: str, interval: float = 1.0) -> None:
+        self.board = board
+        self.path = path
+        self.interval = interval
+        self._last_stat: Optional[Tuple[int, int]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def poll_once(self) -> Optional[SentinelSnapshot]:
+        try:
+            st = os.stat(self.path)
+            stamp = (st.st_mtime_ns, st.st_size)
+            if stamp == self._last_stat:
+                return None
+            with open(self.path, "r", encoding="utf-8") as fh:
+                text = fh.read().strip()
+            self._last_stat = stamp
+            status = json.loads(text).get("status") if text.startswith("{") else text
+            return self.board.publish(str(status))
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sentinel-file-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.poll_once()
+            self._stop.wait(self.interval)
+
+
+class EscalationRescorer:
+    """
+    Tracks pending "escalate" verdicts and re-scores them in bulk when the
+    Sentinel status escalates.
+
+    Re-scoring uses `GuardianWalletV3.reevaluate_signals`, so only the
+    external-signal rules run again. Entries whose verdict is no longer
+    "escalate" are dropped; every re-scored envelope is passed to
+    `on_rescored` as one batch. The pending set is bounded (oldest dropped).
+    """
+
+    def __init__(
+        self,
+        gate: "GuardianWalletV3",
+        board: SentinelStatusBoard,
+        on_rescored: Callable[[List[Dict[str, Any]]], None],
+        *,
+        max_pending: int = 100_000,
+    ) -> None:
+        if max_pending <= 0:
+            raise ValueError("max_pending must be positive")
+        self.gate = gate
+        self.max_pending = max_pending
+        self._on_rescored = on_rescored
+        self._pending: "OrderedDict[str, Tuple[SignalHandle, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._unsubscribe = board.on_escalation(lambda _old, _new: self.rescore_all())
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def evaluate(
+        self,
+        request: Dict[str, Any],
+        *,
+        tenant: Optional[str] = None,
+        wallet_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Evaluate through the gate and track the request if it escalated."""
+        envelope, handle = self.gate.evaluate_with_handle(request, tenant=tenant, wallet_id=wallet_id)
+        if handle is not None and envelope["outcome"] == "escalate":
+            self.track(handle, request.get("extra_signals") or {})
+        return envelope
+
+    def track(self, handle: "SignalHandle", signals: Dict[str, Any]) -> None:
+        with self._lock:
+            self._pending[handle.request_id] = (handle, dict(signals))
+            self._pending.move_to_end(handle.request_id)
+            while len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)
+
+    def resolve(self, request_id: str) -> bool:
+        """Forget a pending escalation (user confirmed / cancelled)."""
+        with self._lock:
+            return self._pending.pop(request_id, None) is not None
+
+    def rescore_all(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = list(self._pending.items())
+
+        rescored: List[Dict[str, Any]] = []
+        for request_id, (handle, signals) in items:
+            envelope = self.gate.reevaluate_signals(handle, signals)
+            rescored.append(envelope)
+            if envelope["outcome"] != "escalate":
+                self.resolve(request_id)
+
+        if rescored:
+            self._on_rescored(rescored)
+        return rescored
+
+    def close(self) -> None:
+        self._unsubscribe()
@@ -0,0 +1,615 @@
+"""
+Local sidecar: serve the v3 gate over a Unix domain socket (stdlib only).
+
+Wire format, in both directions, is a 9-byte header followed by a payload:
+
+    >I payload length | >I tag | B kind | payload
+
+Tags are chosen by the client and echoed in the response, so one
+connection can carry many requests in flight and responses may arrive in
+any order. Request kinds:
+
+    KIND_EVALUATE  payload = v3 request JSON; response = envelope JSON
+                   (exactly `GuardianWalletV3.evaluate_bytes`)
+    KIND_EVALUATE_ROUTED
+                   payload = >H routing length | routing JSON | request JSON;
+                   the routing object may carry "source", "tenant" and
+                   "wallet_id" (strings), passed through to `evaluate_bytes`
+                   for admission control and tenant policies
+    KIND_STATS     payload empty; response = server stats JSON
+
+Responses carry `kind | RESPONSE_BIT`; protocol problems are answered with
+KIND_ERROR (payload = UTF-8 message). A frame larger than
+`max_frame_bytes` is answered with KIND_ERROR and the connection closed.
+
+Evaluate requests from all connections are queued and evaluated in
+micro-batches: the scheduler takes whatever is queued, waits up to
+`batch_window_ms` for more (never beyond `max_batch`), and evaluates the
+batch on a worker thread while the event loop keeps reading frames.
+
+    python -m dgb_wallet_guardian.sidecar serve --socket /run/guardian.sock
+    python -m dgb_wallet_guardian.sidecar stats --socket /run/guardian.sock
+    python -m dgb_wallet_guardian.sidecar loadtest --socket /run/guardian.sock
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import stat
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Set, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .v3 import GuardianWalletV3
+
+HEADER = struct.Struct(">IIB")
+KIND_EVALUATE = 0x01
+KIND_STATS = 0x02
+KIND_EVALUATE_ROUTED = 0x03
+KIND_ERROR = 0x7F
+RESPONSE_BIT = 0x80
+
+DEFAULT_MAX_FRAME_BYTES = 1 << 20
+
+ROUTING_LENGTH = struct.Struct(">H")
+ROUTING_KEYS = ("source", "tenant", "wallet_id")
+
+
+def _remove_stale_socket(path: str) -> None:
+    """Unlink a socket left by a previous run; anything else at `path` raises FileExistsError."""
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{path} exists and is not a socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)  # nobody listening: stale
+        return
+    finally:
+        probe.close()
+    raise FileExistsError(f"{path} is in use by a running server")
+
+
+def encode_frame(tag: int, kind: int, payload: bytes = b"") -> bytes:
+    return HEADER.pack(len(payload), tag & 0xFFFFFFFF, kind) + payload
+
+
+def encode_routed(request: bytes, **routing: Optional[str]) -> bytes:
+    """Build a KIND_EVALUATE_ROUTED payload; None-valued keys are omitted."""
+    unknown = set(routing) - set(ROUTING_KEYS)
+    if unknown:
+        raise ValueError(f"unknown routing keys: {sorted(unknown)}")
+    head = json.dumps(
+        {k: v for k, v in routing.items() if v is not None}, separators=(",", ":"), sort_keys=True
+    ).encode("utf-8")
+    return ROUTING_LENGTH.pack(len(head)) + head + request
+
+
+def decode_routed(payload: bytes) -> Tuple[Dict[str, str], bytes]:
+    """Split a KIND_EVALUATE_ROUTED payload; ValueError if the routing head is malformed."""
+    if len(payload) < ROUTING_LENGTH.size:
+        raise ValueError("truncated routing header")
+    (n,) = ROUTING_LENGTH.unpack_from(payload)
+    end = ROUTING_LENGTH.size + n
+    if len(payload) < end:
+        raise ValueError("truncated routing header")
+    try:
+        routing = json.loads(payload[ROUTING_LENGTH.size : end])
+    except ValueError:
+        raise ValueError("routing header is not JSON") from None
+    if not isinstance(routing, dict) or any(
+        k not in ROUTING_KEYS or not isinstance(v, str) for k, v in routing.items()
+    ):
+        raise ValueError("routing header must map source/tenant/wallet_id to strings")
+    return routing, payload[end:]
+
+
+# --------------------------------------------------------------------------- #
+# Server
+# --------------------------------------------------------------------------- #
+
+
+class _Connection:
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+        self.closed = False
+
+    def send(self, tag: int, kind: int, payload: bytes) -> None:
+        if not self.closed:
+            self.writer.write(encode_frame(tag, kind, payload))
+
+    async def drain(self) -> None:
+        if self.closed:
+            return
+        try:
+            await self.writer.drain()
+        except (ConnectionError, RuntimeError):
+            self.closed = True
+
+
+_Routing = Dict[str, str]
+_Pending = Tuple[_Connection, int, bytes, _Routing]
+
+
+class SidecarServer:
+    """
+    Unix-socket front end for one `GuardianWalletV3` gate.
+
+    `start_in_thread()` / `stop()` run the server on a private event loop in
+    a daemon thread (embedding, tests); `serve_forever()` runs it in the
+    caller's loop.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        gate: Optional["GuardianWalletV3"] = None,
+        *,
+        batch_window_ms: float = 1.0,
+        max_batch: int = 256,
+        max_queue: int = 10_000,
+        max_frame_bytes: int = DEFAULT_MAX_FRAME_BYTES,
+    ) -> None:
+        if batch_window_ms < 0 or max_batch <= 0 or max_queue <= 0 or max_frame_bytes <= 0:
+            raise ValueError("batch_window_ms must be >= 0; max_batch, max_queue, max_frame_bytes positive")
+        if gate is None:
+            from .v3 import GuardianWalletV3
+
+            gate = GuardianWalletV3()
+        self.path = path
+        self.gate = gate
+        self.batch_window = batch_window_ms / 1000.0
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.max_frame_bytes = max_frame_bytes
+
+        self._started = time.monotonic()
+        self._counters: Dict[str, int] = {
+            "connections_total": 0,
+            "requests": 0,
+            "batches": 0,
+            "max_batch_seen": 0,
+            "protocol_errors": 0,
+            "evaluation_errors": 0,
+        }
+        self._connections: Set[_Connection] = set()
+        self._queue: Optional["asyncio.Queue[_Pending]"] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._scheduler: Optional["asyncio.Task[None]"] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="guardian-sidecar")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._bound: Optional[Tuple[int, int]] = None
+
+    # ---- lifecycle ---- #
+
+    async def start(self) -> None:
+        _remove_stale_socket(self.path)
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._scheduler = asyncio.create_task(self._run_batches())
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+        st = os.lstat(self.path)
+        self._bound = (st.st_dev, st.st_ino)
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        assert self._server is not None
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for conn in list(self._connections):
+            conn.closed = True
+            conn.writer.close()
+        if self._scheduler is not None:
+            self._scheduler.cancel()
+            try:
+                await self._scheduler
+            except asyncio.CancelledError:
+                pass
+            self._scheduler = None
+        self._executor.shutdown(wait=True)
+        self._remove_own_socket()
+
+    def _remove_own_socket(self) -> None:
+        # Only unlink the socket this server bound: the path may since have
+        # been replaced by another server's socket or by an unrelated file.
+        bound, self._bound = self._bound, None
+        if bound is None:
+            return
+        try:
+            st = os.lstat(self.path)
+        except FileNotFoundError:
+            return
+        if stat.S_ISSOCK(st.st_mode) and (st.st_dev, st.st_ino) == bound:
+            os.unlink(self.path)
+
+    def start_in_thread(self) -> None:
+        ready = threading.Event()
+        errors: List[BaseException] = []
+
+        def run() -> None:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self.start())
+            except BaseException as e:  # surface bind errors to the caller
+                errors.append(e)
+                ready.set()
+                loop.close()
+                return
+            ready.set()
+            loop.run_forever()
+            loop.run_until_complete(self.aclose())
+            loop.close()
+
+        self._thread = threading.Thread(target=run, name="guardian-sidecar-loop", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            self._thread = None
+            raise errors[0]
+
+    def stop(self) -> None:
+        if self._thread is None or self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+
+    # ---- stats ---- #
+
+    def stats(self) -> Dict[str, Any]:
+        c = self._counters
+        return {
+            "uptime_s": round(time.monotonic() - self._started, 3),
+            "connections": len(self._connections),
+            "connections_total": c["connections_total"],
+            "requests": c["requests"],
+            "batches": c["batches"],
+            "avg_batch": round(c["requests"] / c["batches"], 3) if c["batches"] else 0.0,
+            "max_batch_seen": c["max_batch_seen"],
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "protocol_errors": c["protocol_errors"],
+            "evaluation_errors": c["evaluation_errors"],
+            "batch_window_ms": self.batch_window * 1000.0,
+            "max_batch": self.max_batch,
+        }
+
+    # ---- connection handling ---- #
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        conn = _Connection(writer)
+        self._connections.add(conn)
+        self._counters["connections_total"] += 1
+        assert self._queue is not None
+        try:
+            while True:
+                header = await reader.readexactly(HEADER.size)
+                length, tag, kind = HEADER.unpack(header)
+                if length > self.max_frame_bytes:
+                    self._counters["protocol_errors"] += 1
+                    conn.send(tag, KIND_ERROR | RESPONSE_BIT, b"frame too large")
+                    await conn.drain()
+                    break
+                payload = await reader.readexactly(length) if length else b""
+
+                if kind == KIND_EVALUATE:
+                    await self._queue.put((conn, tag, payload, {}))
+                elif kind == KIND_EVALUATE_ROUTED:
+                    try:
+                        routing, body = decode_routed(payload)
+                    except ValueError as e:
+                        self._counters["protocol_errors"] += 1
+                        conn.send(tag, KIND_ERROR | RESPONSE_BIT, str(e).encode("utf-8"))
+                        await conn.drain()
+                        continue
+                    await self._queue.put((conn, tag, body, routing))
+                elif kind == KIND_STATS:
+                    conn.send(tag, KIND_STATS | RESPONSE_BIT, json.dumps(self.stats(), sort_keys=True).encode("utf-8"))
+                    await conn.drain()
+                else:
+                    self._counters["protocol_errors"] += 1
+                    conn.send(tag, KIND_ERROR | RESPONSE_BIT, b"unknown kind")
+                    await conn.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            conn.closed = True
+            self._connections.discard(conn)
+            writer.close()
+
+    # ---- micro-batching ---- #
+
+    def _drain_queue(self, batch: List[_Pending]) -> None:
+        assert self._queue is not None
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                return
+
+    def _evaluate_batch(self, items: Sequence[Tuple[bytes, _Routing]]) -> List[Tuple[int, bytes]]:
+        # One failing request must not take the batch (or the scheduler) down.
+        evaluate = self.gate.evaluate_bytes
+        out: List[Tuple[int, bytes]] = []
+        for p, routing in items:
+            try:
+                out.append((KIND_EVALUATE | RESPONSE_BIT, evaluate(p, **routing)))
+            except Exception as e:
+                out.append((KIND_ERROR | RESPONSE_BIT, f"evaluation failed: {type(e).__name__}".encode("utf-8")))
+        return out
+
+    async def _run_batches(self) -> None:
+        assert self._queue is not None and self._loop is not None
+        while True:
+            batch = [await self._queue.get()]
+            self._drain_queue(batch)
+            if len(batch) < self.max_batch and self.batch_window > 0:
+                await asyncio.sleep(self.batch_window)
+                self._drain_queue(batch)
+
+            results = await self._loop.run_in_executor(self._executor, self._evaluate_batch, [(p[2], p[3]) for p in batch])
+
+            self._counters["requests"] += len(batch)
+            self._counters["batches"] += 1
+            self._counters["max_batch_seen"] = max(self._counters["max_batch_seen"], len(batch))
+            touched: Dict[int, _Connection] = {}
+            for (conn, tag, _, _), (kind, out) in zip(batch, results):
+                if kind != KIND_EVALUATE | RESPONSE_BIT:
+                    self._counters["evaluation_errors"] += 1
+                conn.send(tag, kind, out)
+                touched[id(conn)] = conn
+            for conn in touched.values():
+                await conn.drain()
+
+
+# --------------------------------------------------------------------------- #
+# Client
+# --------------------------------------------------------------------------- #
+
+
+class SidecarError(RuntimeError):
+    """The sidecar answered with KIND_ERROR, or the connection was lost."""
+
+
+class SidecarClient:
+    """
+    Blocking, thread-safe client for one persistent sidecar connection.
+
+    Any number of threads may `submit` concurrently; a reader thread routes
+    responses to their futures by tag.
+    """
+
+    def __init__(self, path: str, *, connect_timeout: float = 5.0) -> None:
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(connect_timeout)
+        self._sock.connect(path)
+        self._sock.settimeout(None)
+        self._send_lock = threading.Lock()
+        self._pending: Dict[int, "Future[bytes]"] = {}
+        self._pending_lock = threading.Lock()
+        self._tags = itertools.count(1)
+        self._closed = False
+        self._reader = threading.Thread(target=self._read_loop, name="guardian-sidecar-client", daemon=True)
+        self._reader.start()
+
+    def __enter__(self) -> "SidecarClient":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def submit(self, payload: bytes, kind: int = KIND_EVALUATE) -> "Future[bytes]":
+        fut: "Future[bytes]" = Future()
+        tag = next(self._tags) & 0xFFFFFFFF
+        with self._pending_lock:
+            if self._closed:
+                raise SidecarError("connection closed")
+            self._pending[tag] = fut
+        frame = encode_frame(tag, kind, payload)
+        try:
+            with self._send_lock:
+                self._sock.sendall(frame)
+        except OSError as e:
+            self._fail_all(SidecarError(f"send failed: {e}"))
+        return fut
+
+    def evaluate_bytes(
+        self,
+        buf: bytes,
+        timeout: Optional[float] = None,
+        *,
+        source: Optional[str] = None,
+        tenant: Optional[str] = None,
+        wallet_id: Optional[str] = None,
+    ) -> bytes:
+        if source is None and tenant is None and wallet_id is None:
+            return self.submit(bytes(buf)).result(timeout)
+        payload = encode_routed(bytes(buf), source=source, tenant=tenant, wallet_id=wallet_id)
+        return self.submit(payload, KIND_EVALUATE_ROUTED).result(timeout)
+
+    def evaluate(self, request: Dict[str, Any], timeout: Optional[float] = None, **routing: Optional[str]) -> Dict[str, Any]:
+        body = json.dumps(request, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        return json.loads(self.evaluate_bytes(body, timeout, **routing))
+
+    def stats(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        return json.loads(self.submit(b"", KIND_STATS).result(timeout))
+
+    def close(self) -> None:
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+        self._reader.join(timeout=5.0)
+        self._fail_all(SidecarError("connection closed"))
+
+    def _recv_exact(self, n: int) -> Optional[bytes]:
+        buf = bytearray()
+        while len(buf) < n:
+            chunk = self._sock.recv(n - len(buf))
+            if not chunk:
+                return None
+            buf += chunk
+        return bytes(buf)
+
+    def _read_loop(self) -> None:
+        try:
+            while True:
+                header = self._recv_exact(HEADER.size)
+                if header is None:
+                    break
+                length, tag, kind = HEADER.unpack(header)
+                payload = self._recv_exact(length) if length else b""
+                if payload is None:
+                    break
+                with self._pending_lock:
+                    fut = self._pending.pop(tag, None)
+                if fut is None:
+                    continue
+                if kind == KIND_ERROR | RESPONSE_BIT:
+                    fut.set_exception(SidecarError(payload.decode("utf-8", "replace")))
+                else:
+                    fut.set_result(payload)
+        except OSError:
+            pass
+        self._fail_all(SidecarError("connection closed"))
+
+    def _fail_all(self, error: Exception) -> None:
+        with self._pending_lock:
+            self._closed = True
+            pending, self._pending = self._pending, {}
+        for fut in pending.values():
+            if not fut.done():
+                fut.set_exception(error)
+
+
+# --------------------------------------------------------------------------- #
+# CLI: serve / stats / loadtest
+# --------------------------------------------------------------------------- #
+
+
+def _sample_request(i: int) -> bytes:
+    request = {
+        "contract_version": 3,
+        "component": "guardian_wallet",
+        "request_id": f"load-{i}",
+        "wallet_ctx": {"balance": 100.0, "typical_amount": 10.0},
+        "tx_ctx": {"to_address": f"D{i % 97}", "amount": float(i % 120), "fee": 0.1},
+        "extra_signals": {"sentinel_status": "NORMAL"},
+    }
+    return json.dumps(request, separators=(",", ":")).encode("utf-8")
+
+
+def loadtest(path: str, *, connections: int = 4, inflight: int = 64, requests: int = 20_000) -> Dict[str, Any]:
+    """Drive the socket with `connections` clients, each keeping `inflight` requests outstanding."""
+    per_conn = max(1, requests // connections)
+    latencies: List[float] = []
+    lat_lock = threading.Lock()
+
+    def worker(offset: int) -> None:
+        local: List[float] = []
+        with SidecarClient(path) as client:
+            window: List[Tuple[float, "Future[bytes]"]] = []
+            for i in range(per_conn):
+                window.append((time.perf_counter(), client.submit(_sample_request(offset + i))))
+                if len(window) >= inflight:
+                    started, fut = window.pop(0)
+                    fut.result()
+                    local.append(time.perf_counter() - started)
+            for started, fut in window:
+                fut.result()
+                local.append(time.perf_counter() - started)
+        with lat_lock:
+            latencies.extend(local)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n * per_conn,)) for n in range(connections)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def pct(p: float) -> float:
+        return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000.0, 3)
+
+    with SidecarClient(path) as client:
+        server = client.stats()
+    return {
+        "requests": len(latencies),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {"p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99), "max": pct(1.0)},
+        "server": server,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Guardian v3 Unix-socket sidecar.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="run the sidecar")
+    serve.add_argument("--socket", required=True)
+    serve.add_argument("--batch-window-ms", type=float, default=1.0)
+    serve.add_argument("--max-batch", type=int, default=256)
+
+    stats = sub.add_parser("stats", help="print server stats")
+    stats.add_argument("--socket", required=True)
+
+    load = sub.add_parser("loadtest", help="drive a running sidecar")
+    load.add_argument("--socket", required=True)
+    load.add_argument("--connections", type=int, default=4)
+    load.add_argument("--inflight", type=int, default=64)
+    load.add_argument("--requests", type=int, default=20_000)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        from .v3 import GuardianWalletV3
+
+        gate = GuardianWalletV3()
+        gate.warmup()
+        server = SidecarServer(args.socket, gate, batch_window_ms=args.batch_window_ms, max_batch=args.max_batch)
+        try:
+            asyncio.run(server.serve_forever())
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    if args.command == "stats":
+        with SidecarClient(args.socket) as client:
+            print(json.dumps(client.stats(), indent=2, sort_keys=True))
+        return 0
+
+    report = loadtest(args.socket, connections=args.connections, inflight=args.inflight, requests=args.requests)
+    json.dump(report, sys.stdout, indent=2, sort_keys=True)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,446 @@
+"""
+Binary snapshots of per-wallet state stores, restored lazily via mmap.
+
+    devices.save_snapshot("devices.snap")
+    devices = DeviceBaselineStore.open_snapshot("devices.snap")      # ready immediately
+
+    scheduler = SnapshotScheduler({"devices.snap": devices, "cooldowns.snap": cooldowns}, interval_seconds=300)
+    scheduler.start()
+
+File layout (little-endian, one store per file):
+
+    header      magic, format version, CRC-32 of everything after the header,
+                record count, record blob size, meta size
+    meta        JSON: store kind and its parameters
+    records     key_len u16, payload_len u32, key (UTF-8), payload; oldest first
+    offsets     u64 per record: offset of the record in the blob
+    hashes      u64 per record, sorted: 64-bit BLAKE2b of the key
+    ordinals    u32 per record: record number of each sorted hash
+
+Restoring maps the file and verifies the checksum; nothing is decoded up
+front. A store opened from a snapshot keeps it as a cold tier behind its
+in-memory maps: a wallet is decoded (and moved to memory) on first use,
+and LRU eviction takes never-used snapshot records first, oldest first.
+
+Stores write snapshots in chunks, holding their lock for one chunk at a
+time, so a background snapshot never pauses evaluation for long. The
+result is per-wallet consistent, not a point-in-time copy of the store.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from ._bench import print_report
+
+_MAGIC = b"DGBSNAP\x00"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sIIQQI4x")  # magic, version, crc32, n_records, blob bytes, meta bytes
+_RECORD = struct.Struct("<HI")  # key bytes, payload bytes
+_STR = struct.Struct("<H")
+_F64 = struct.Struct("<d")
+_DROPPED = 1 << 63
+
+Record = Tuple[str, bytes]
+
+# Records encoded per lock acquisition while writing.
+CHUNK_RECORDS = 4096
+
+
+def key_hash(key: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+# ---- payload helpers ------------------------------------------------------
+
+
+def pack_strs(values: Iterable[str]) -> bytes:
+    parts: List[bytes] = []
+    for value in values:
+        raw = value.encode("utf-8")
+        parts.append(_STR.pack(len(raw)))
+        parts.append(raw)
+    return b"".join(parts)
+
+
+def unpack_strs(payload: bytes) -> List[str]:
+    out: List[str] = []
+    i = 0
+    while i < len(payload):
+        (n,) = _STR.unpack_from(payload, i)
+        i += _STR.size
+        out.append(bytes(payload[i:i + n]).decode("utf-8"))
+        i += n
+    return out
+
+
+def pack_f64(value: float, tail: bytes = b"") -> bytes:
+    return _F64.pack(value) + tail
+
+
+def unpack_f64(payload: bytes) -> Tuple[float, bytes]:
+    return _F64.unpack_from(payload, 0)[0], bytes(payload[_F64.size:])
+
+
+# ---- writing --------------------------------------------------------------
+
+
+def write_snapshot(path: str, meta: Dict[str, Any], chunks: Iterable[Sequence[Record]]) -> int:
+    """
+    Write records (oldest first) to `path` atomically; returns the record count.
+
+    `chunks` is consumed lazily, so a store can release its lock between
+    chunks. A key seen twice keeps its last record.
+    """
+    meta_raw = json.dumps(meta, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    meta_raw += b" " * (-len(meta_raw) % 8)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".snap-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(b"\x00" * _HEADER.size)
+            crc = zlib.crc32(meta_raw)
+            fh.write(meta_raw)
+
+            # Dict order == record order: a re-written key is popped and re-appended.
+            ordinal: Dict[str, int] = {}
+            offsets = array("Q")
+            hashes = array("Q")
+            dropped = False
+            blob = 0
+            for chunk in chunks:
+                buf = bytearray()
+                for key, payload in chunk:
+                    raw = key.encode("utf-8")
+                    if key in ordinal:  # re-written while snapshotting; drop the older record
+                        offsets[ordinal.pop(key)] = _DROPPED
+                        dropped = True
+                    ordinal[key] = len(offsets)
+                    offsets.append(blob + len(buf))
+                    hashes.append(key_hash(raw))
+                    buf += _RECORD.pack(len(raw), len(payload)) + raw + payload
+                crc = zlib.crc32(buf, crc)
+                fh.write(buf)
+                blob += len(buf)
+            pad = b"\x00" * (-blob % 8)
+            crc = zlib.crc32(pad, crc)
+            fh.write(pad)
+
+            if dropped:
+                live = [i for i, offset in enumerate(offsets) if offset != _DROPPED]
+                offsets = array("Q", (offsets[i] for i in live))
+                hashes = array("Q", (hashes[i] for i in live))
+            ordinals = array("I", sorted(range(len(hashes)), key=hashes.__getitem__))
+            hashes = array("Q", (hashes[i] for i in ordinals))
+            for col in (offsets, hashes, ordinals):
+                if sys.byteorder != "little":  # pragma: no cover - big-endian hosts
+                    col.byteswap()
+                raw = col.tobytes()
+                crc = zlib.crc32(raw, crc)
+                fh.write(raw)
+
+            fh.seek(0)
+            fh.write(_HEADER.pack(_MAGIC, FORMAT_VERSION, crc, len(offsets), blob, len(meta_raw)))
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return len(offsets)
+
+
+# ---- reading --------------------------------------------------------------
+
+
+class SnapshotFile:
+    """Read-only mmap view of a snapshot. Records are decoded on demand."""
+
+    def __init__(self, path: str, *, verify: bool = True) -> None:
+        with open(path, "rb") as fh:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, crc, n, blob, meta_len = _HEADER.unpack_from(mm, 0)
+            if magic != _MAGIC:
+                raise ValueError(f"{path}: not a guardian snapshot")
+            if version != FORMAT_VERSION:
+                raise ValueError(f"{path}: unsupported snapshot version {version}")
+            body = memoryview(mm)[_HEADER.size:]
+            try:
+                expected = _HEADER.size + meta_len + blob + (-blob % 8) + 20 * n
+                if len(mm) != expected:
+                    raise ValueError(f"{path}: truncated snapshot")
+                if verify and zlib.crc32(body) != crc:
+                    raise ValueError(f"{path}: snapshot checksum mismatch")
+            finally:
+                body.release()
+            self.meta: Dict[str, Any] = json.loads(bytes(mm[_HEADER.size:_HEADER.size + meta_len]))
+            self._blob = _HEADER.size + meta_len
+            offset = self._blob + blob + (-blob % 8)
+            self._offsets = self._column(mm, offset, "Q", n)
+            self._hashes = self._column(mm, offset + 8 * n, "Q", n)
+            self._ordinals = self._column(mm, offset + 16 * n, "I", n)
+        except (struct.error, ValueError, TypeError) as e:
+            mm.close()
+            raise ValueError(str(e) or f"{path}: corrupt snapshot") from e
+        self.path = path
+        self._mm: Optional[mmap.mmap] = mm
+        self._n = n
+
+    @staticmethod
+    def _column(mm: mmap.mmap, offset: int, fmt: str, n: int) -> Sequence[int]:
+        raw = memoryview(mm)[offset:offset + n * struct.calcsize(fmt)]
+        if sys.byteorder == "little":
+            return raw.cast(fmt)
+        else:  # pragma: no cover - big-endian hosts copy and swap
+            col = array(fmt, raw.tobytes())
+            col.byteswap()
+            return col
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __enter__(self) -> "SnapshotFile":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def find(self, key: str) -> int:
+        """Record number of `key`, or -1."""
+        h = key_hash(key.encode("utf-8"))
+        hashes = self._hashes
+        i = bisect_left(hashes, h)  # type: ignore[arg-type]
+        while i < self._n and hashes[i] == h:
+            n = self._ordinals[i]
+            if self.record(n)[0] == key:
+                return n
+            i += 1
+        return -1
+
+    def record(self, n: int) -> Record:
+        mm = self._mm
+        assert mm is not None, "snapshot is closed"
+        at = self._blob + self._offsets[n]
+        key_len, payload_len = _RECORD.unpack_from(mm, at)
+        at += _RECORD.size
+        return mm[at:at + key_len].decode("utf-8"), mm[at + key_len:at + key_len + payload_len]
+
+    def close(self) -> None:
+        if self._mm is not None:
+            for col in (self._offsets, self._hashes, self._ordinals):
+                if isinstance(col, memoryview):
+                    col.release()
+            self._mm.close()
+            self._mm = None
+
+
+class ColdTier:
+    """
+    Snapshot records not yet taken into memory, in LRU order.
+
+    Not thread-safe; owned by one store and used under its lock.
+    """
+
+    def __init__(self, snap: SnapshotFile, keep_newest: Optional[int] = None) -> None:
+        self.snap = snap
+        self._taken = bytearray(len(snap))
+        self._head = 0
+        self._left = len(snap)
+        if keep_newest is not None:
+            while self._left > keep_newest:
+                self.pop_oldest()
+
+    def __len__(self) -> int:
+        return self._left
+
+    def peek(self, key: str) -> Optional[bytes]:
+        n = self.snap.find(key)
+        if n < 0 or self._taken[n]:
+            return None
+        return self.snap.record(n)[1]
+
+    def take(self, key: str) -> Optional[bytes]:
+        """Payload of `key` if still cold; it is no longer served from the snapshot."""
+        n = self.snap.find(key)
+        if n < 0 or self._taken[n]:
+            return None
+        self._mark(n)
+        return self.snap.record(n)[1]
+
+    def pop_oldest(self) -> bool:
+        """Evict the least recently used cold record. False if none is left."""
+        while self._head < len(self._taken) and self._taken[self._head]:
+            self._head += 1
+        if self._head >= len(self._taken):
+            return False
+        self._mark(self._head)
+        return True
+
+    def records(self, start: int, stop: int) -> Tuple[List[Record], int]:
+        """Cold records with record number in [start, stop); also returns the record count."""
+        out = [self.snap.record(n) for n in range(max(start, self._head), min(stop, len(self._taken))) if not self._taken[n]]
+        return out, len(self._taken)
+
+    def _mark(self, n: int) -> None:
+        self._taken[n] = 1
+        self._left -= 1
+
+    def close(self) -> None:
+        self.snap.close()
+
+
+def chunked(
+    lock: threading.Lock,
+    cold: Callable[[], Optional[ColdTier]],
+    keys: Callable[[], List[str]],
+    encode: Callable[[str], Optional[bytes]],
+    size: int = CHUNK_RECORDS,
+) -> Iterator[List[Record]]:
+    """
+    Chunks of (key, payload) records for `write_snapshot`, oldest first.
+
+    Cold-tier records come first (they are older than anything in memory),
+    then the in-memory keys listed under the lock. Each chunk is built under
+    `lock`; `encode` returns None for keys dropped in the meantime.
+    """
+    start = 0
+    while True:
+        with lock:
+            tier = cold()
+            if tier is None or start >= len(tier.snap):
+                break
+            records, total = tier.records(start, start + size)
+        start += size
+        if records:
+            yield records
+        if start >= total:
+            break
+    with lock:
+        order = keys()
+    for i in range(0, len(order), size):
+        with lock:
+            chunk = [(key, payload) for key in order[i:i + size] for payload in (encode(key),) if payload is not None]
+        if chunk:
+            yield chunk
+
+
+# ---- background snapshots -------------------------------------------------
+
+
+class SnapshotScheduler:
+    """
+    Periodically snapshot stores to files on a daemon thread.
+
+    `stores` maps output path -> a store with `save_snapshot(path)`. Errors
+    are kept in `last_errors` and retried on the next run.
+    """
+
+    def __init__(self, stores: Dict[str, Any], interval_seconds: float = 300.0) -> None:
+        if interval_seconds <= 0:
+            raise ValueError("interval_seconds must be positive")
+        self.stores = dict(stores)
+        self.interval_seconds = interval_seconds
+        self.last_run: Dict[str, Dict[str, float]] = {}
+        self.last_errors: Dict[str, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> Dict[str, int]:
+        """Snapshot every store now; returns path -> records written (failed stores omitted)."""
+        written: Dict[str, int] = {}
+        for path, store in self.stores.items():
+            start = time.perf_counter()
+            try:
+                written[path] = store.save_snapshot(path)
+            except Exception as e:  # keep the scheduler alive; surfaced via last_errors
+                self.last_errors[path] = f"{type(e).__name__}: {e}"
+                continue
+            self.last_errors.pop(path, None)
+            self.last_run[path] = {"records": written[path], "seconds": time.perf_counter() - start}
+        return written
+
+    def start(self) -> None:
+        if self._thread is not None:
+            raise RuntimeError("scheduler already started")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="guardian-snapshots", daemon=True)
+        self._thread.start()
+
+    def stop(self, final: bool = True) -> None:
+        """Stop the thread; with `final`, write one last snapshot."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        if final:
+            self.run_once()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            self.run_once()
+
+
+# ---- tooling --------------------------------------------------------------
+
+
+def benchmark(n: int = 1_000_000, directory: Optional[str] = None) -> Dict[str, float]:
+    """Save a device baseline of `n` wallets, reopen it and serve lookups; wall times in seconds."""
+    from .device_baseline import DeviceBaselineStore
+
+    store = DeviceBaselineStore(max_wallets=n, per_wallet=2)
+    for i in range(n):
+        store.enroll(f"wallet-{i}", f"device-{i % 997}")
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        path = os.path.join(tmp, "devices.snap")
+        start = time.perf_counter()
+        written = store.save_snapshot(path)
+        saved = time.perf_counter()
+        restored = DeviceBaselineStore.open_snapshot(path, max_wallets=n)
+        opened = time.perf_counter()
+        probes = min(n, 10_000)
+        hits = sum(1 for i in range(0, n, max(1, n // probes)) if restored.observe(f"wallet-{i}", f"device-{i % 997}").known)
+        served = time.perf_counter()
+        size = os.path.getsize(path)
+        restored._cold.close()  # type: ignore[union-attr]
+    return {
+        "wallets": written,
+        "file_bytes": size,
+        "save_s": saved - start,
+        "open_s": opened - saved,
+        "lookup_us": (served - opened) / max(hits, 1) * 1e6,
+        "hits": hits,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Inspect a guardian state snapshot, or benchmark save/restore.")
+    parser.add_argument("path", nargs="?", help="snapshot file to verify and describe")
+    parser.add_argument("--bench", type=int, metavar="N", help="benchmark with N wallets instead")
+    args = parser.parse_args(argv)
+    if args.bench is not None:
+        print_report(benchmark(args.bench))
+        return 0
+    if args.path is None:
+        parser.error("a snapshot path or --bench is required")
+    with SnapshotFile(args.path) as snap:
+        print_report({"records": len(snap), "meta": snap.meta})
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -2,15 +2,62 @@ from __future__ import annotations
 
 import json
 import math
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
-from .client import WalletGuardian
+from .abuse import sniff_reject
+from .deadline import Budget
 from .models import RiskLevel
+from .satoshi import ENRICHED_WALLET_AMOUNT_KEYS, TX_AMOUNT_KEYS, WALLET_AMOUNT_KEYS, is_sats
+from .contracts.v3_codec import Buffer, canonical_json_bytes, loads_json
 from .contracts.v3_hash import canonical_sha256
 from .contracts.v3_reason_codes import ReasonCode
 from .contracts.v3_types import GWv3Request
 
+# Engine, state stores and tooling are only needed for annotations here; the
+# engine itself is imported on first evaluation (or by `warmup()`), which keeps
+# `import dgb_wallet_guardian.v3` cheap for short-lived workers.
+if TYPE_CHECKING:  # pragma: no cover
+    from .abuse import RejectCounters
+    from .admission import AdmissionController
+    from .client import WalletGuardian
+    from .cooldown import CooldownTracker
+    from .deadline import StageStats
+    from .device_baseline import DeviceBaselineStore
+    from .duplicates import DuplicateSendIndex
+    from .enrichment import EnrichmentStage
+    from .fanin import FanInDetector
+    from .geoip import TravelTracker
+    from .guardian_engine import EvaluationHandle
+    from .models import GuardianDecision
+    from .policies import PolicyStore
+    from .profiles import GuardianProfile, ProfileRegistry
+    from .sentinel_feed import SentinelStatusBoard
+
+
+@dataclass(frozen=True)
+class SignalHandle:
+    """
+    Retained state of a successful v3 evaluation, for `reevaluate_signals`.
+
+    Holds the stable wallet/tx contexts, the engine's context-only rule
+    matches and the selected profile; only external signals are re-applied.
+    """
+
+    request_id: str
+    wallet_ctx: Dict[str, Any]
+    tx_ctx: Dict[str, Any]
+    size_without_signals: int
+    guardian: WalletGuardian = field(repr=False)
+    engine_handle: EvaluationHandle = field(repr=False)
+    profile: Optional[GuardianProfile] = None
+    wallet_id: Optional[str] = None
+    # First-pass state-store observations, reused so re-scoring never records a send twice
+    observations: Dict[str, Any] = field(default_factory=dict, repr=False)
+    enrichment: Optional[Dict[str, Any]] = None  # first-pass provider audit (versions / skipped)
+
 
 @dataclass(frozen=True)
 class GuardianWalletV3:
@@ -31,69 +78,431 @@ class GuardianWalletV3:
     # Abuse caps
     MAX_PAYLOAD_BYTES: int = 128_000  # 128KB
 
+    # With `deadline=`: optional stages run only if this much time would remain for scoring
+    DEADLINE_RESERVE_MS: float = 2.0
+
+    # "dgb" (float DGB, legacy) or "sat" (integer satoshis end to end; see satoshi.py)
+    AMOUNT_UNITS: str = "dgb"
+
     # Strict allowlists for nested dicts (glass-box)
     WALLET_KEYS = {"balance", "typical_amount", "wallet_age_days", "tx_count_24h"}
     TX_KEYS = {"to_address", "amount", "fee", "memo", "asset_id"}
     SIGNAL_KEYS = {"device_fingerprint", "sentinel_status", "geo_ip", "session", "trusted_device"}
 
-    def evaluate(self, request: Dict[str, Any]) -> Dict[str, Any]:
+    # Optional per-source reject accounting (abuse monitoring only; never affects outcomes)
+    reject_counters: Optional[RejectCounters] = field(default=None, compare=False)
+
+    # Optional tenant -> compiled GuardianConfig profiles (selected via `tenant=`)
+    profiles: Optional[ProfileRegistry] = field(default=None, compare=False)
+
+    # Optional shared Sentinel status, used when a request omits sentinel_status
+    sentinel: Optional[SentinelStatusBoard] = field(default=None, compare=False)
+
+    # Optional per-wallet device baseline feeding DEVICE_MISMATCH (selected via `wallet_id=`)
+    devices: Optional[DeviceBaselineStore] = field(default=None, compare=False)
+
+    # Optional geo-IP last-send tracker feeding GEO_IMPOSSIBLE_TRAVEL (selected via `wallet_id=`)
+    travel: Optional[TravelTracker] = field(default=None, compare=False)
+
+    # Optional cross-wallet destination fan-in sketch feeding DEST_FANIN_SPIKE (selected via `wallet_id=`)
+    fanin: Optional[FanInDetector] = field(default=None, compare=False)
+
+    # Optional per-stage budget instrumentation for `deadline=` evaluations (monitoring only)
+    stage_stats: Optional[StageStats] = field(default=None, compare=False)
+
+    # Optional wallet policy layer (per-wallet overrides selected via `wallet_id=`)
+    policies: Optional[PolicyStore] = field(default=None, compare=False)
+
+    # Optional per-wallet cooldowns: locked wallets are denied before the engine runs
+    cooldowns: Optional[CooldownTracker] = field(default=None, compare=False)
+
+    # Optional replay / double-submit index: a repeat of a wallet's send inside its window is denied
+    duplicates: Optional[DuplicateSendIndex] = field(default=None, compare=False)
+
+    # Optional concurrent context providers (destination risk, fees, ...) run ahead of the engine (selected via `wallet_id=`)
+    enrichment: Optional[EnrichmentStage] = field(default=None, compare=False)
+
+    # Optional per-source / per-wallet token buckets and in-flight cap (GW_ERROR_OVERLOADED)
+    admission: Optional[AdmissionController] = field(default=None, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.AMOUNT_UNITS not in ("dgb", "sat"):
+            raise ValueError(f"AMOUNT_UNITS must be 'dgb' or 'sat', got {self.AMOUNT_UNITS!r}")
+
+    def evaluate(
+        self,
+        request: Dict[str, Any],
+        *,
+        source: Optional[str] = None,
+        tenant: Optional[str] = None,
+        wallet_id: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Evaluate one v3 request.
+
+        `deadline` is an absolute `time.monotonic()` instant. Optional stages
+        (device / geo enrichment) are skipped when the budget runs low, and
+        the request fails closed with GW_ERROR_TIMEOUT if a mandatory stage
+        ends past the deadline.
+
+        With `admission=`, a request from a throttled `source` / `wallet_id`
+        or over the in-flight cap fails closed with GW_ERROR_OVERLOADED
+        (request_id "unknown", like other pre-parse rejects).
+        """
+        code = self._admit(source, wallet_id)
+        if code is not None:
+            envelope = self._error(request_id="unknown", reason_code=code, latency_ms=0)
+        else:
+            try:
+                budget = Budget(deadline) if deadline is not None else None
+                envelope, _ = self._evaluate(request, size_bytes=None, tenant=tenant, wallet_id=wallet_id, budget=budget)
+                self._record_budget(budget, envelope)
+            finally:
+                self._release()
+        if self.reject_counters is not None and envelope["risk"]["level"] == "unknown":
+            self.reject_counters.record(source, envelope["reason_codes"][0])
+        return envelope
+
+    def evaluate_bytes(
+        self,
+        buf: Buffer,
+        *,
+        source: Optional[str] = None,
+        tenant: Optional[str] = None,
+        wallet_id: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> bytes:
+        """
+        Bytes-in / bytes-out entrypoint for serialized transports.
+
+        The oversize cap is applied to the actual input length before any
+        parsing (so an oversized body is rejected with request_id "unknown"),
+        and the envelope is returned as canonical JSON bytes, identical to
+        canonical-encoding the dict that `evaluate` would return.
+
+        Bodies the pre-parse guard can classify (oversize, empty, not a JSON
+        object) and unparseable bodies are answered from precomputed envelope
+        bytes, so floods of garbage never reach the parser or SHA-256.
+        Guard rejects are answered before any deadline accounting, and
+        before admission control, which runs ahead of parsing.
+        """
+        size_bytes = memoryview(buf).nbytes
+        code = sniff_reject(buf, size_bytes, self.MAX_PAYLOAD_BYTES)
+        if code is None:
+            code = self._admit(source, wallet_id)
+        if code is not None:
+            if self.reject_counters is not None:
+                self.reject_counters.record(source, code)
+            return _unknown_error_bytes(self.COMPONENT, self.CONTRACT_VERSION, code)
+
+        try:
+            try:
+                request = loads_json(buf)
+            except Exception:
+                if self.reject_counters is not None:
+                    self.reject_counters.record(source, ReasonCode.GW_ERROR_INVALID_REQUEST.value)
+                return _unknown_error_bytes(self.COMPONENT, self.CONTRACT_VERSION, ReasonCode.GW_ERROR_INVALID_REQUEST.value)
+
+            # Such bodies are also measured canonically, like the dict path, so an
+            # unencodable string fails closed (GW_ERROR_OVERSIZE) instead of raising.
+            if _SURROGATE_ESCAPE.search(buf) is not None:
+                size_bytes = max(size_bytes, self._encoded_size_bytes(request))
+
+            budget = Budget(deadline) if deadline is not None else None
+            if budget is not None and not budget.mark("parse"):
+                envelope = self._timeout(self._safe_request_id(request))
+            else:
+                envelope, _ = self._evaluate(request, size_bytes=size_bytes, tenant=tenant, wallet_id=wallet_id, budget=budget)
+            self._record_budget(budget, envelope)
+        finally:
+            self._release()
+        if self.reject_counters is not None and envelope["risk"]["level"] == "unknown":
+            self.reject_counters.record(source, envelope["reason_codes"][0])
+        return canonical_json_bytes(envelope, floats=(envelope["risk"]["score"],))
+
+    def evaluate_with_handle(
+        self,
+        request: Dict[str, Any],
+        *,
+        source: Optional[str] = None,
+        tenant: Optional[str] = None,
+        wallet_id: Optional[str] = None,
+    ) -> Tuple[Dict[str, Any], Optional[SignalHandle]]:
+        """
+        Like `evaluate`, but also return a handle for `reevaluate_signals`.
+
+        The handle is None when the request failed closed. Admission control
+        applies as in `evaluate`.
+        """
+        code = self._admit(source, wallet_id)
+        if code is not None:
+            envelope, handle = self._error(request_id="unknown", reason_code=code, latency_ms=0), None
+        else:
+            try:
+                envelope, handle = self._evaluate(request, size_bytes=None, tenant=tenant, wallet_id=wallet_id, keep_handle=True)
+            finally:
+                self._release()
+        if self.reject_counters is not None and envelope["risk"]["level"] == "unknown":
+            self.reject_counters.record(source, envelope["reason_codes"][0])
+        return envelope, handle
+
+    def reevaluate_signals(self, handle: SignalHandle, new_signals: Dict[str, Any], *, source: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Re-score a previous request with new `extra_signals` only.
+
+        Balance, destination and behaviour rules are reused from the handle;
+        only the external-signal rules, the level mapping and the envelope are
+        recomputed. The envelope is identical to `evaluate` on the original
+        request with `extra_signals` replaced by `new_signals`. Each re-score
+        goes through admission control (`source`, the handle's wallet) like
+        a fresh request.
+        """
+        code = self._admit(source, handle.wallet_id)
+        if code is not None:
+            envelope = self._error(request_id="unknown", reason_code=code, latency_ms=0)
+        else:
+            try:
+                envelope = self._reevaluate(handle, new_signals)
+            finally:
+                self._release()
+        if self.reject_counters is not None and envelope["risk"]["level"] == "unknown":
+            self.reject_counters.record(source, envelope["reason_codes"][0])
+        return envelope
+
+    def _reevaluate(self, handle: SignalHandle, new_signals: Dict[str, Any]) -> Dict[str, Any]:
+        latency_ms = 0
+        if not isinstance(new_signals, dict):
+            return self._error(request_id=handle.request_id, reason_code=ReasonCode.GW_ERROR_INVALID_REQUEST.value, latency_ms=latency_ms)
+        # Canonical size is additive: the request without signals plus the "extra_signals" member.
+        size_bytes = handle.size_without_signals + len(',"extra_signals":') + self._encoded_size_bytes(new_signals)
+        if size_bytes > self.MAX_PAYLOAD_BYTES:
+            return self._error(request_id=handle.request_id, reason_code=ReasonCode.GW_ERROR_OVERSIZE.value, latency_ms=latency_ms)
+        if set(new_signals.keys()) - self.SIGNAL_KEYS:
+            return self._error(request_id=handle.request_id, reason_code=ReasonCode.GW_ERROR_UNKNOWN_SIGNAL_KEY.value, latency_ms=latency_ms)
+
+        engine_signals, audit = self._engine_signals(
+            new_signals, handle.wallet_id, to_address=handle.tx_ctx.get("to_address"), observations=handle.observations
+        )
+        if handle.enrichment is not None:
+            audit["enrichment"] = dict(handle.enrichment)
+        decision = handle.guardian.reevaluate_signals(handle.engine_handle, engine_signals)
+        self._apply_policy(audit, decision, handle.wallet_ctx, handle.tx_ctx, handle.wallet_id)
+        self._arm_cooldown(handle.wallet_id, self._cooldown_seconds(audit, decision, handle.wallet_id))
+        return self._envelope(handle.request_id, handle.wallet_ctx, handle.tx_ctx, new_signals, decision, handle.profile, audit)
+
+    def warmup(self) -> None:
+        """
+        Pay one-time costs before the first real request.
+
+        Imports the engine, primes the JSON/hash/codec paths and the cached
+        fail-closed envelopes, and runs one synthetic evaluation per profile.
+        Shared state (device baseline, travel tracker, reject counters) is
+        not touched.
+        """
+        tenants: List[Optional[str]] = [None]
+        if self.profiles is not None:
+            tenants.extend(self.profiles.tenants())
+        for tenant in tenants:
+            envelope, _ = self._evaluate(dict(_WARMUP_REQUEST), size_bytes=None, tenant=tenant)
+            canonical_json_bytes(envelope, floats=(envelope["risk"]["score"],))
+        loads_json(canonical_json_bytes(_WARMUP_REQUEST))
+        for code in (ReasonCode.GW_ERROR_OVERSIZE, ReasonCode.GW_ERROR_INVALID_REQUEST, ReasonCode.GW_ERROR_OVERLOADED):
+            _unknown_error_hash(self.COMPONENT, self.CONTRACT_VERSION, code.value)
+            _unknown_error_bytes(self.COMPONENT, self.CONTRACT_VERSION, code.value)
+
+    def _evaluate(
+        self,
+        request: Dict[str, Any],
+        size_bytes: Optional[int],
+        tenant: Optional[str] = None,
+        wallet_id: Optional[str] = None,
+        keep_handle: bool = False,
+        budget: Optional[Budget] = None,
+    ) -> Tuple[Dict[str, Any], Optional[SignalHandle]]:
         latency_ms = 0  # deterministic contract envelope
 
         try:
             req = GWv3Request.from_dict(request)
         except ValueError as e:
             code = str(e) or ReasonCode.GW_ERROR_INVALID_REQUEST.value
-            return self._error(request_id=self._safe_request_id(request), reason_code=code, latency_ms=latency_ms)
+            return self._error(request_id=self._safe_request_id(request), reason_code=code, latency_ms=latency_ms), None
         except Exception:
-            return self._error(request_id=self._safe_request_id(request), reason_code=ReasonCode.GW_ERROR_INVALID_REQUEST.value, latency_ms=latency_ms)
+            return self._error(request_id=self._safe_request_id(request), reason_code=ReasonCode.GW_ERROR_INVALID_REQUEST.value, latency_ms=latency_ms), None
 
         if req.contract_version != self.CONTRACT_VERSION:
-            return self._error(request_id=req.request_id, reason_code=ReasonCode.GW_ERROR_SCHEMA_VERSION.value, latency_ms=latency_ms)
+            return self._error(request_id=req.request_id, reason_code=ReasonCode.GW_ERROR_SCHEMA_VERSION.value, latency_ms=latency_ms), None
 
         if req.component != self.COMPONENT:
-            return self._error(request_id=req.request_id, reason_code=ReasonCode.GW_ERROR_INVALID_REQUEST.value, latency_ms=latency_ms)
+            return self._error(request_id=req.request_id, reason_code=ReasonCode.GW_ERROR_INVALID_REQUEST.value, latency_ms=latency_ms), None
 
-        # Oversize protection (deterministic)
-        if self._encoded_size_bytes(request) > self.MAX_PAYLOAD_BYTES:
-            return self._error(request_id=req.request_id, reason_code=ReasonCode.GW_ERROR_OVERSIZE.value, latency_ms=latency_ms)
+        # Oversize protection (deterministic). Byte callers already measured the raw input.
+        if size_bytes is None:
+            size_bytes = self._encoded_size_bytes(request)
+        if size_bytes > self.MAX_PAYLOAD_BYTES:
+            return self._error(request_id=req.request_id, reason_code=ReasonCode.GW_ERROR_OVERSIZE.value, latency_ms=latency_ms), None
 
         # Strict nested key checks
         if set(req.wallet_ctx.keys()) - self.WALLET_KEYS:
-            return self._error(request_id=req.request_id, reason_code=ReasonCode.GW_ERROR_UNKNOWN_WALLET_KEY.value, latency_ms=latency_ms)
+            return self._error(request_id=req.request_id, reason_code=ReasonCode.GW_ERROR_UNKNOWN_WALLET_KEY.value, latency_ms=latency_ms), None
         if set(req.tx_ctx.keys()) - self.TX_KEYS:
-            return self._error(request_id=req.request_id, reason_code=ReasonCode.GW_ERROR_UNKNOWN_TX_KEY.value, latency_ms=latency_ms)
+            return self._error(request_id=req.request_id, reason_code=ReasonCode.GW_ERROR_UNKNOWN_TX_KEY.value, latency_ms=latency_ms), None
         if set(req.extra_signals.keys()) - self.SIGNAL_KEYS:
-            return self._error(request_id=req.request_id, reason_code=ReasonCode.GW_ERROR_UNKNOWN_SIGNAL_KEY.value, latency_ms=latency_ms)
+            return self._error(request_id=req.request_id, reason_code=ReasonCode.GW_ERROR_UNKNOWN_SIGNAL_KEY.value, latency_ms=latency_ms), None
 
         # Bad number checks (NaN/Inf) on numeric fields we care about
         if not self._numbers_ok(req.wallet_ctx, req.tx_ctx):
-            return self._error(request_id=req.request_id, reason_code=ReasonCode.GW_ERROR_BAD_NUMBER.value, latency_ms=latency_ms)
+            return self._error(request_id=req.request_id, reason_code=ReasonCode.GW_ERROR_BAD_NUMBER.value, latency_ms=latency_ms), None
+
+        # Tenant profile selection (precompiled; unknown tenants fail closed)
+        profile = None
+        if tenant is not None:
+            profile = self.profiles.get(tenant) if self.profiles is not None else None
+            if profile is None:
+                return self._error(request_id=req.request_id, reason_code=ReasonCode.GW_ERROR_UNKNOWN_TENANT.value, latency_ms=latency_ms), None
+
+        # A wallet under cooldown is denied without scoring.
+        if wallet_id is not None and self.cooldowns is not None and self.cooldowns.is_locked(wallet_id):
+            return self._error(request_id=req.request_id, reason_code=ReasonCode.GW_DENY_WALLET_LOCKED.value, latency_ms=latency_ms), None
+
+        # Same wallet, destination, amount and asset seconds apart: replay or double submit.
+        if wallet_id is None or self.duplicates is None:
+            return self._score(request, req, profile, wallet_id, keep_handle, budget)
+        tx = req.tx_ctx
+        send = (wallet_id, str(tx.get("to_address")), tx.get("amount"), tx.get("asset_id"))
+        if self.duplicates.check(*send, request_id=req.request_id) is not None:
+            return self._error(request_id=req.request_id, reason_code=ReasonCode.GW_DENY_DUPLICATE_SEND.value, latency_ms=latency_ms), None
+        # The send is recorded up front (so concurrent double submits race on one entry) and
+        # forgotten again if it fails closed, so a retry is not mistaken for a replay.
+        try:
+            envelope, handle = self._score(request, req, profile, wallet_id, keep_handle, budget)
+        except BaseException:
+            self.duplicates.release(*send, request_id=req.request_id)
+            raise
+        if envelope["risk"]["level"] == "unknown":
+            self.duplicates.release(*send, request_id=req.request_id)
+        return envelope, handle
+
+    def _score(
+        self,
+        request: Dict[str, Any],
+        req: GWv3Request,
+        profile: Optional[GuardianProfile],
+        wallet_id: Optional[str],
+        keep_handle: bool,
+        budget: Optional[Budget],
+    ) -> Tuple[Dict[str, Any], Optional[SignalHandle]]:
+        # Everything after validation: providers, engine, state stores, policy and envelope.
+        latency_ms = 0  # deterministic contract envelope
+
+        # Deadline checkpoints close each mandatory stage; running late fails closed.
+        if budget is not None and not budget.mark("validate"):
+            return self._timeout(req.request_id), None
+
+        # Provider fields fill in the contexts (request values win) and are hashed with them.
+        wallet_ctx, tx_ctx = req.wallet_ctx, req.tx_ctx
+        enriched = None
+        if wallet_id is not None and self.enrichment is not None:
+            max_wait = None if budget is None else max(0.0, budget.remaining() - self.DEADLINE_RESERVE_MS / 1000.0)
+            enriched = self.enrichment.run(wallet_id, wallet_ctx, tx_ctx, max_wait)
+            if budget is not None and not budget.mark("providers"):
+                return self._timeout(req.request_id), None
+            if enriched.failed is not None:
+                return self._error(request_id=req.request_id, reason_code=ReasonCode.GW_ERROR_ENRICHMENT_UNAVAILABLE.value, latency_ms=latency_ms), None
+            wallet_ctx, tx_ctx = enriched.merge(wallet_ctx, tx_ctx)
+
+        sats = self.AMOUNT_UNITS == "sat"
+        if sats and enriched is not None and not self._enriched_sats_ok(wallet_ctx, tx_ctx):
+            # Provider amounts are typed per field but not per unit; unusable values fail closed like mistyped ones.
+            return self._error(request_id=req.request_id, reason_code=ReasonCode.GW_ERROR_ENRICHMENT_UNAVAILABLE.value, latency_ms=latency_ms), None
 
         # Run existing v2 engine via client wrapper (authoritative behavior)
-        guardian = WalletGuardian()
-        decision = guardian.evaluate_transaction(req.wallet_ctx, req.tx_ctx, req.extra_signals)
+        guardian = profile.guardian if profile is not None else _default_guardian()
+        engine_handle = guardian.prepare_context(wallet_ctx, tx_ctx, sats=sats)
+        if budget is not None and not budget.mark("context"):
+            return self._timeout(req.request_id), None
+
+        observations: Dict[str, Any] = {}
+        engine_signals, audit = self._engine_signals(
+            req.extra_signals, wallet_id, budget, to_address=tx_ctx.get("to_address"), observations=observations
+        )
+        if enriched is not None:
+            audit["enrichment"] = enriched.audit_dict()
+        # From here a timeout undoes the store observations, so a retry is judged like the first try.
+        if budget is not None and budget.expired():  # enrichment overran; don't spend more on scoring
+            self._forget_observations(wallet_id, tx_ctx.get("to_address"), observations)
+            return self._timeout(req.request_id), None
+        decision = guardian.reevaluate_signals(engine_handle, engine_signals)
+
+        stable_wallet = self._stable_wallet(wallet_ctx, sats)
+        stable_tx = self._stable_tx(tx_ctx, sats)
+        self._apply_policy(audit, decision, stable_wallet, stable_tx, wallet_id)
+        lock_seconds = self._cooldown_seconds(audit, decision, wallet_id)
+        envelope = self._envelope(req.request_id, stable_wallet, stable_tx, req.extra_signals, decision, profile, audit)
+        if budget is not None and not budget.mark("score"):
+            self._forget_observations(wallet_id, tx_ctx.get("to_address"), observations)
+            return self._timeout(req.request_id), None
+        self._arm_cooldown(wallet_id, lock_seconds)  # only once the verdict stands
+
+        handle = None
+        if keep_handle:
+            without_signals = {k: v for k, v in request.items() if k != "extra_signals"}
+            handle = SignalHandle(
+                request_id=req.request_id,
+                wallet_ctx=stable_wallet,
+                tx_ctx=stable_tx,
+                size_without_signals=self._encoded_size_bytes(without_signals),
+                guardian=guardian,
+                engine_handle=engine_handle,
+                profile=profile,
+                wallet_id=wallet_id,
+                observations=observations,
+                enrichment=audit.get("enrichment"),
+            )
+        return envelope, handle
+
+    def _envelope(
+        self,
+        request_id: str,
+        stable_wallet: Dict[str, Any],
+        stable_tx: Dict[str, Any],
+        extra_signals: Dict[str, Any],
+        decision: GuardianDecision,
+        profile: Optional[GuardianProfile],
+        audit: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        latency_ms = 0  # deterministic contract envelope
 
-        outcome = self._map_outcome(decision.level)
+        if profile is not None:
+            outcome = profile.decision_table[decision.level][0]
+        else:
+            outcome = self._map_outcome(decision.level)
         reason_codes = self._extract_reason_codes(decision.reasons, decision.level)
 
         # Deterministic context hash for orchestrator audit
         v3_context = {
             "component": self.COMPONENT,
             "contract_version": self.CONTRACT_VERSION,
-            "request_id": req.request_id,
-            "wallet_ctx": self._stable_wallet(req.wallet_ctx),
-            "tx_ctx": self._stable_tx(req.tx_ctx),
-            "extra_signals": self._stable_signals(req.extra_signals),
+            "request_id": request_id,
+            "wallet_ctx": stable_wallet,
+            "tx_ctx": stable_tx,
+            "extra_signals": self._stable_signals(extra_signals),
             "outcome": outcome,
             "risk_level": decision.level.value,
             "reason_codes": reason_codes,
         }
+        if profile is not None:
+            v3_context["profile"] = profile.audit_dict()
+        if self.AMOUNT_UNITS == "sat":
+            v3_context["amount_units"] = "sat"
+        if audit:
+            v3_context.update(audit)
         context_hash = canonical_sha256(v3_context)
 
-        return {
+        envelope: Dict[str, Any] = {
             "contract_version": self.CONTRACT_VERSION,
             "component": self.COMPONENT,
-            "request_id": req.request_id,
+            "request_id": request_id,
             "context_hash": context_hash,
             "outcome": outcome,  # allow | deny | escalate
             "risk": {
@@ -110,6 +519,164 @@ class GuardianWalletV3:
                 "fail_closed": True,
             },
         }
+        if profile is not None:
+            envelope["meta"]["profile"] = profile.audit_dict()
+        if self.AMOUNT_UNITS == "sat":
+            envelope["meta"]["amount_units"] = "sat"
+        if audit:
+            envelope["meta"].update(audit)
+        return envelope
+
+    def _engine_signals(
+        self,
+        signals: Dict[str, Any],
+        wallet_id: Optional[str],
+        budget: Optional[Budget] = None,
+        to_address: Optional[str] = None,
+        observations: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Derive gate-side engine signals from shared state.
+
+        Returns (engine_signals, audit); every audit entry is recorded in the
+        context hash and meta so stateful inputs stay reproducible. Under a
+        deadline, the per-wallet enrichment stage is optional: when skipped,
+        the skipped sources are listed under audit["skipped"].
+
+        Store observations are kept in `observations` (a handle's, when
+        re-scoring); one already made for the same input is reused instead
+        of recording the send again.
+        """
+        if observations is None:
+            observations = {}
+        engine_signals = signals
+        audit: Dict[str, Any] = {}
+
+        # Pin one snapshot per evaluation so the verdict and the recorded version agree.
+        if self.sentinel is not None and signals.get("sentinel_status") is None:
+            snapshot = self.sentinel.current()
+            engine_signals = dict(engine_signals, sentinel_snapshot=snapshot)
+            audit["sentinel"] = snapshot.audit_dict()
+
+        stores = (("device", self.devices), ("geo", self.travel), ("fanin", self.fanin))
+        if wallet_id is None or all(store is None for _, store in stores):
+            return engine_signals, audit
+        if budget is not None and not budget.allows(self.DEADLINE_RESERVE_MS / 1000.0):
+            budget.skip("enrich")
+            audit["skipped"] = [name for name, store in stores if store is not None]
+            return engine_signals, audit
+
+        if self.devices is not None:
+            device = (signals.get("device_fingerprint"), bool(signals.get("trusted_device")))
+            prior = observations.get("device")
+            if prior is not None and prior[0] == device:
+                check = prior[1]
+            else:
+                check = self.devices.observe(wallet_id, device[0], device[1])
+                observations["device"] = (device, check)
+            if check is not None:
+                if check.mismatch:
+                    engine_signals = dict(engine_signals, device_mismatch=True)
+                audit["device"] = check.audit_dict()
+
+        if self.travel is not None:
+            geo_ip = signals.get("geo_ip")
+            prior = observations.get("geo")
+            if prior is None or prior[1] is None:
+                travel = self.travel.observe(wallet_id, geo_ip)
+            elif prior[0] == geo_ip:
+                travel = prior[1]
+            else:
+                travel = self.travel.reobserve(wallet_id, geo_ip, prior[1])
+            observations["geo"] = (geo_ip, travel)
+            if travel is not None:
+                if travel.impossible:
+                    engine_signals = dict(engine_signals, impossible_travel=True)
+                audit["geo"] = travel.audit_dict()
+
+        if self.fanin is not None and isinstance(to_address, str) and to_address:
+            fanin = observations.get("fanin")
+            if fanin is None:
+                fanin = observations["fanin"] = self.fanin.observe(wallet_id, to_address)
+            if fanin.spike:
+                engine_signals = dict(engine_signals, destination_fanin_spike=True)
+            audit["fanin"] = fanin.audit_dict()
+
+        if budget is not None:
+            budget.mark("enrich")
+        return engine_signals, audit
+
+    def _apply_policy(
+        self,
+        audit: Dict[str, Any],
+        decision: GuardianDecision,
+        stable_wallet: Dict[str, Any],
+        stable_tx: Dict[str, Any],
+        wallet_id: Optional[str],
+    ) -> None:
+        # Policy amounts are DGB; the ratio rule is unit-free. The day's total so far
+        # comes from a provider (`daily_sent_amount`, in the gate's units) when one supplies it.
+        if self.policies is None:
+            return
+        scale = 1e-8 if self.AMOUNT_UNITS == "sat" else 1.0
+        result = self.policies.resolve(
+            decision.level,
+            self._extract_reason_codes(decision.reasons, decision.level),
+            stable_tx["amount"] * scale,
+            stable_wallet["balance"] * scale,
+            stable_wallet.get("daily_sent_amount", 0) * scale,
+            wallet_id=wallet_id,
+        )
+        audit["policy"] = result.audit_dict()
+
+    def _cooldown_seconds(self, audit: Dict[str, Any], decision: GuardianDecision, wallet_id: Optional[str]) -> float:
+        # LOCK_WALLET_TEMPORARILY arms the tracker's default lock; a policy DELAY arms its cooldown.
+        if wallet_id is None or self.cooldowns is None:
+            return 0.0
+        seconds = 0.0
+        if "LOCK_WALLET_TEMPORARILY" in decision.actions:
+            seconds = self.cooldowns.lock_seconds
+        policy = audit.get("policy")
+        if policy is not None:
+            seconds = max(seconds, float(policy["cooldown_seconds"]))
+        if seconds > 0:
+            audit["lock"] = {"seconds": int(math.ceil(seconds))}
+        return seconds
+
+    def _arm_cooldown(self, wallet_id: Optional[str], seconds: float) -> None:
+        if wallet_id is not None and self.cooldowns is not None and seconds > 0:
+            self.cooldowns.arm(wallet_id, seconds)
+
+    def _forget_observations(self, wallet_id: Optional[str], to_address: Any, observations: Dict[str, Any]) -> None:
+        # Undo what `_engine_signals` recorded for a request that then failed closed.
+        if wallet_id is None:
+            return
+        device = observations.get("device")
+        if device is not None and device[1] is not None and self.devices is not None:
+            self.devices.forget(wallet_id, device[0][0], device[1])
+        geo = observations.get("geo")
+        if geo is not None and geo[1] is not None and self.travel is not None:
+            self.travel.forget(wallet_id, geo[1])
+        fanin = observations.get("fanin")
+        if fanin is not None and self.fanin is not None:
+            self.fanin.forget(to_address, fanin)
+
+    def _admit(self, source: Optional[str], wallet_id: Optional[str]) -> Optional[str]:
+        # None when admitted (or no admission control); every admitted call is paired with _release().
+        if self.admission is None:
+            return None
+        return self.admission.enter(source, wallet_id)
+
+    def _release(self) -> None:
+        if self.admission is not None:
+            self.admission.leave()
+
+    def _timeout(self, request_id: str) -> Dict[str, Any]:
+        return self._error(request_id=request_id, reason_code=ReasonCode.GW_ERROR_TIMEOUT.value, latency_ms=0)
+
+    def _record_budget(self, budget: Optional[Budget], envelope: Dict[str, Any]) -> None:
+        if budget is not None and self.stage_stats is not None:
+            self.stage_stats.record(budget, envelope["reason_codes"][0] == ReasonCode.GW_ERROR_TIMEOUT.value)
 
     # ----------------------------
     # Deterministic helpers
@@ -140,6 +707,19 @@ class GuardianWalletV3:
         return True
 
     def _numbers_ok(self, wallet_ctx: Dict[str, Any], tx_ctx: Dict[str, Any]) -> bool:
+        if self.AMOUNT_UNITS == "sat":
+            # Amounts must be whole satoshis in range; floats (even 1.0) are rejected
+            for ctx, keys in ((wallet_ctx, WALLET_AMOUNT_KEYS), (tx_ctx, TX_AMOUNT_KEYS)):
+                for key in keys:
+                    v = ctx.get(key)
+                    if v is not None and not is_sats(v):
+                        return False
+            return all(
+                self._is_finite_number(v)
+                for v in (wallet_ctx.get("wallet_age_days"), wallet_ctx.get("tx_count_24h"))
+                if v is not None
+            )
+
         # Only validate known numeric fields; reject NaN/Inf
         numeric_fields = [
             wallet_ctx.get("balance"),
@@ -152,13 +732,24 @@ class GuardianWalletV3:
         return all(self._is_finite_number(v) for v in numeric_fields if v is not None)
 
     @staticmethod
-    def _stable_wallet(w: Dict[str, Any]) -> Dict[str, Any]:
-        # Stable casting (avoid int/float drift)
+    def _enriched_sats_ok(wallet_ctx: Dict[str, Any], tx_ctx: Dict[str, Any]) -> bool:
+        # Providers only guarantee finite numbers; in satoshi mode their amounts must be whole sats too
+        for ctx, keys in ((wallet_ctx, ENRICHED_WALLET_AMOUNT_KEYS), (tx_ctx, TX_AMOUNT_KEYS)):
+            for key in keys:
+                v = ctx.get(key)
+                if v is not None and not is_sats(v):
+                    return False
+        return True
+
+    @staticmethod
+    def _stable_wallet(w: Dict[str, Any], sats: bool = False) -> Dict[str, Any]:
+        # Stable casting (avoid int/float drift); satoshi amounts are already exact ints
         out: Dict[str, Any] = dict(w)
-        if "balance" in out:
-            out["balance"] = float(out["balance"])
-        if "typical_amount" in out:
-            out["typical_amount"] = float(out["typical_amount"])
+        if not sats:
+            if "balance" in out:
+                out["balance"] = float(out["balance"])
+            if "typical_amount" in out:
+                out["typical_amount"] = float(out["typical_amount"])
         if "wallet_age_days" in out and out["wallet_age_days"] is not None:
             out["wallet_age_days"] = int(out["wallet_age_days"])
         if "tx_count_24h" in out and out["tx_count_24h"] is not None:
@@ -166,12 +757,13 @@ class GuardianWalletV3:
         return out
 
     @staticmethod
-    def _stable_tx(t: Dict[str, Any]) -> Dict[str, Any]:
+    def _stable_tx(t: Dict[str, Any], sats: bool = False) -> Dict[str, Any]:
         out: Dict[str, Any] = dict(t)
-        if "amount" in out:
-            out["amount"] = float(out["amount"])
-        if "fee" in out and out["fee"] is not None:
-            out["fee"] = float(out["fee"])
+        if not sats:
+            if "amount" in out:
+                out["amount"] = float(out["amount"])
+            if "fee" in out and out["fee"] is not None:
+                out["fee"] = float(out["fee"])
         # strings remain strings; optional keys remain present only if provided
         return out
 
@@ -215,18 +807,19 @@ class GuardianWalletV3:
         return base + rule_ids
 
     def _error(self, request_id: str, reason_code: str, latency_ms: int) -> Dict[str, Any]:
-        context_hash = canonical_sha256(
-            {
-                "component": self.COMPONENT,
-                "contract_version": self.CONTRACT_VERSION,
-                "request_id": str(request_id),
-                "reason_code": reason_code,
-            }
-        )
+        request_id = str(request_id)
+        try:
+            request_id.encode("utf-8")
+        except UnicodeEncodeError:  # a lone surrogate can be neither echoed nor hashed
+            request_id = "unknown"
+        if request_id == "unknown":
+            context_hash = _unknown_error_hash(self.COMPONENT, self.CONTRACT_VERSION, str(reason_code))
+        else:
+            context_hash = _error_hash(self.COMPONENT, self.CONTRACT_VERSION, request_id, reason_code)
         return {
             "contract_version": self.CONTRACT_VERSION,
             "component": self.COMPONENT,
-            "request_id": str(request_id),
+            "request_id": request_id,
             "context_hash": context_hash,
             "outcome": "deny",
             "risk": {"level": "unknown", "score": 1.0},
@@ -234,3 +827,52 @@ class GuardianWalletV3:
             "evidence": {"details": {"error": str(reason_code)}},
             "meta": {"latency_ms": int(latency_ms), "fail_closed": True},
         }
+
+
+def _default_guardian() -> "WalletGuardian":
+    from .client import WalletGuardian
+
+    return WalletGuardian()
+
+
+# A \uD800-\uDFFF escape: may decode to a lone surrogate, which canonical JSON cannot encode.
+_SURROGATE_ESCAPE = re.compile(rb"\\u[dD][89abcdefABCDEF]")
+
+# Synthetic request used by `warmup()`; exercises every rule family once.
+_WARMUP_REQUEST: Dict[str, Any] = {
+    "contract_version": 3,
+    "component": "guardian_wallet",
+    "request_id": "warmup",
+    "wallet_ctx": {"balance": 100.0, "typical_amount": 1.0, "wallet_age_days": 1, "tx_count_24h": 1},
+    "tx_ctx": {"to_address": "warmup", "amount": 95.0, "fee": 0.1},
+    "extra_signals": {"sentinel_status": "HIGH", "trusted_device": False},
+}
+
+
+# ----------------------------
+# Precomputed fail-closed envelopes
+# ----------------------------
+
+
+def _error_hash(component: str, contract_version: int, request_id: str, reason_code: str) -> str:
+    return canonical_sha256(
+        {
+            "component": component,
+            "contract_version": contract_version,
+            "request_id": request_id,
+            "reason_code": reason_code,
+        }
+    )
+
+
+@lru_cache(maxsize=128)
+def _unknown_error_hash(component: str, contract_version: int, reason_code: str) -> str:
+    # request_id "unknown" rejects are the bulk of probing traffic; the hash is a constant.
+    return _error_hash(component, contract_version, "unknown", reason_code)
+
+
+@lru_cache(maxsize=128)
+def _unknown_error_bytes(component: str, contract_version: int, reason_code: str) -> bytes:
+    gate = GuardianWalletV3(COMPONENT=component, CONTRACT_VERSION=contract_version)
+    envelope = gate._error(request_id="unknown", reason_code=reason_code, latency_ms=0)
+    return canonical_json_bytes(envelope)
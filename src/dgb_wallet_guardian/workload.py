@@ -0,0 +1,280 @@
+"""
+Seeded synthetic v3 workload generator (JSONL), modelled on
+docs/v3/guardian_attack_scenarios_v3.md.
+
+Scenarios:
+- normal               everyday sends to a wallet's usual destinations
+- full_wipe            near-full-balance send to a fresh address
+- fee_manipulation     fee inflated 10-50x over the network norm
+- rate_spike           a burst of consecutive sends from one wallet
+- sentinel_escalation  ordinary send while Sentinel reports HIGH/CRITICAL
+- malformed            schema / smuggling / NaN / garbage probes (A1-A2, B1-B3, C2, D1, E1)
+- oversize             otherwise valid request beyond MAX_PAYLOAD_BYTES (C1)
+
+request_id is "<scenario>-<seed>-<n>", so any downstream report can be
+labelled by scenario without a side channel. Output is a pure function of
+(count, seed, mix, wallets) and is streamed line by line in constant memory.
+
+    python -m dgb_wallet_guardian.workload --count 1000000 --seed 7 --out corpus.jsonl
+    python -m dgb_wallet_guardian.workload --count 1000 --mix normal=0.5,full_wipe=0.5
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import itertools
+import json
+import random
+import sys
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+SCENARIOS: Tuple[str, ...] = (
+    "normal",
+    "full_wipe",
+    "fee_manipulation",
+    "rate_spike",
+    "sentinel_escalation",
+    "malformed",
+    "oversize",
+)
+
+DEFAULT_MIX: Dict[str, float] = {
+    "normal": 0.80,
+    "full_wipe": 0.04,
+    "fee_manipulation": 0.04,
+    "rate_spike": 0.04,
+    "sentinel_escalation": 0.04,
+    "malformed": 0.03,
+    "oversize": 0.01,
+}
+
+# Oversize bodies exceed GuardianWalletV3.MAX_PAYLOAD_BYTES (128_000) by a margin.
+OVERSIZE_MEMO_BYTES = 130_000
+
+_GARBAGE: Tuple[bytes, ...] = (b"[]", b"null", b"\"hello\"", b"{\"contract_version\": 3,", b"not json at all", b"{}}")
+_GEO = ("8.8.8.8", "81.2.69.1", "1.0.0.17", "2001:db8::42", "203.0.113.9")
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse "normal=0.9,full_wipe=0.1" into a mix dict."""
+    mix: Dict[str, float] = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def _cumulative(mix: Mapping[str, float]) -> Tuple[List[str], List[float]]:
+    unknown = set(mix) - set(SCENARIOS)
+    if unknown:
+        raise ValueError(f"unknown scenarios: {sorted(unknown)}")
+    names = [s for s in SCENARIOS if mix.get(s, 0.0) > 0.0]
+    if any(w < 0 for w in mix.values()) or not names:
+        raise ValueError("mix weights must be non-negative with at least one positive")
+    total = sum(mix[s] for s in names)
+    acc, cum = 0.0, []
+    for s in names:
+        acc += mix[s] / total
+        cum.append(acc)
+    cum[-1] = 1.0
+    return names, cum
+
+
+class _Gen:
+    """Per-run state: the RNG, wallet pool and the padded oversize memo."""
+
+    def __init__(self, seed: int, wallets: int) -> None:
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.wallets = wallets
+        self._pad: Optional[bytes] = None
+
+    def wallet(self) -> Tuple[int, Dict[str, Any]]:
+        w = self.rng.randrange(self.wallets)
+        # Stable per-wallet shape derived from the wallet number, not the RNG stream.
+        balance = 50.0 + (w * 7919 % 20_000)
+        ctx = {
+            "balance": balance,
+            "typical_amount": round(balance * (0.01 + (w % 7) / 100.0), 4),
+            "wallet_age_days": w % 1500,
+            "tx_count_24h": w % 4,
+        }
+        return w, ctx
+
+    def base(self, scenario: str, n: int, w: int, wallet_ctx: Dict[str, Any]) -> Dict[str, Any]:
+        rng = self.rng
+        typical = wallet_ctx["typical_amount"]
+        return {
+            "contract_version": 3,
+            "component": "guardian_wallet",
+            "request_id": f"{scenario}-{self.seed}-{n}",
+            "wallet_ctx": wallet_ctx,
+            "tx_ctx": {
+                "to_address": f"D{w}x{rng.randrange(3)}",
+                "amount": round(typical * rng.uniform(0.1, 2.0), 8),
+                "fee": round(rng.uniform(0.0005, 0.002), 8),
+            },
+            "extra_signals": {
+                "device_fingerprint": f"dev-{w}",
+                "geo_ip": _GEO[w % len(_GEO)],
+                "sentinel_status": "NORMAL",
+            },
+        }
+
+    def pad(self) -> bytes:
+        if self._pad is None:
+            self._pad = b"x" * OVERSIZE_MEMO_BYTES
+        return self._pad
+
+
+# One encoder instance: json.dumps() with non-default options builds a new encoder per call.
+_encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+
+def _dumps(obj: Any) -> bytes:
+    return _encode(obj).encode("utf-8")
+
+
+def _normal(g: _Gen, n: int) -> List[bytes]:
+    w, ctx = g.wallet()
+    return [_dumps(g.base("normal", n, w, ctx))]
+
+
+def _full_wipe(g: _Gen, n: int) -> List[bytes]:
+    w, ctx = g.wallet()
+    req = g.base("full_wipe", n, w, ctx)
+    req["tx_ctx"]["amount"] = round(ctx["balance"] * g.rng.uniform(0.9, 1.0), 8)
+    req["tx_ctx"]["to_address"] = f"Dnew{g.rng.getrandbits(48):012x}"
+    return [_dumps(req)]
+
+
+def _fee_manipulation(g: _Gen, n: int) -> List[bytes]:
+    w, ctx = g.wallet()
+    req = g.base("fee_manipulation", n, w, ctx)
+    req["tx_ctx"]["fee"] = round(req["tx_ctx"]["fee"] * g.rng.uniform(10.0, 50.0), 8)
+    return [_dumps(req)]
+
+
+def _rate_spike(g: _Gen, n: int) -> List[bytes]:
+    w, ctx = g.wallet()
+    lines = []
+    for k in range(g.rng.randint(5, 12)):
+        burst_ctx = dict(ctx, tx_count_24h=ctx["tx_count_24h"] + 20 + k)
+        lines.append(_dumps(g.base("rate_spike", n + k, w, burst_ctx)))
+    return lines
+
+
+def _sentinel_escalation(g: _Gen, n: int) -> List[bytes]:
+    w, ctx = g.wallet()
+    req = g.base("sentinel_escalation", n, w, ctx)
+    req["extra_signals"]["sentinel_status"] = g.rng.choice(("HIGH", "CRITICAL"))
+    return [_dumps(req)]
+
+
+def _malformed(g: _Gen, n: int) -> List[bytes]:
+    w, ctx = g.wallet()
+    req = g.base("malformed", n, w, ctx)
+    kind = g.rng.randrange(8)
+    if kind == 0:  # A1 unknown top-level key
+        req["force_allow"] = True
+    elif kind == 1:  # A2 wrong contract version
+        req["contract_version"] = 2
+    elif kind == 2:  # B1 wallet_ctx smuggling
+        req["wallet_ctx"]["is_whitelisted"] = True
+    elif kind == 3:  # B2 tx_ctx smuggling
+        req["tx_ctx"]["override"] = "allow"
+    elif kind == 4:  # B3 / E1 extra_signals smuggling / forced outcome
+        req["extra_signals"]["outcome"] = "allow"
+    elif kind == 5:  # D1 NaN / Infinity
+        req["tx_ctx"]["amount"] = g.rng.choice((float("nan"), float("inf")))
+    elif kind == 6:  # A3 wrong component
+        req["component"] = "guardian_wallet_v2"
+    else:  # C2 garbage probe
+        return [g.rng.choice(_GARBAGE)]
+    return [_dumps(req)]
+
+
+def _oversize(g: _Gen, n: int) -> List[bytes]:
+    w, ctx = g.wallet()
+    req = g.base("oversize", n, w, ctx)
+    req["tx_ctx"]["memo"] = ""
+    # Splice the padding into the encoded line instead of re-encoding 130KB per request.
+    return [_dumps(req).replace(b'"memo":""', b'"memo":"' + g.pad() + b'"', 1)]
+
+
+_BUILDERS: Dict[str, Callable[[_Gen, int], List[bytes]]] = {
+    "normal": _normal,
+    "full_wipe": _full_wipe,
+    "fee_manipulation": _fee_manipulation,
+    "rate_spike": _rate_spike,
+    "sentinel_escalation": _sentinel_escalation,
+    "malformed": _malformed,
+    "oversize": _oversize,
+}
+
+
+def generate(
+    count: int,
+    *,
+    seed: int = 0,
+    mix: Optional[Mapping[str, float]] = None,
+    wallets: int = 10_000,
+) -> Iterator[bytes]:
+    """
+    Yield exactly `count` JSONL lines (each ending in b"\\n").
+
+    A rate spike burst counts towards `count` and is truncated at the end.
+    """
+    if count < 0 or wallets <= 0:
+        raise ValueError("count must be >= 0 and wallets positive")
+    names, cum = _cumulative(DEFAULT_MIX if mix is None else mix)
+    g = _Gen(seed, wallets)
+    n = 0
+    while n < count:
+        scenario = names[bisect.bisect_right(cum, g.rng.random())]
+        for line in _BUILDERS[scenario](g, n):
+            if n >= count:
+                break
+            yield line + b"\n"
+            n += 1
+
+
+def write_lines(lines: Iterator[bytes], out: BinaryIO, chunk_lines: int = 1024) -> int:
+    """Write lines in small joined chunks (fewer syscalls, bounded memory). Returns bytes written."""
+    written = 0
+    for chunk in iter(lambda: b"".join(itertools.islice(lines, chunk_lines)), b""):
+        written += out.write(chunk)
+    return written
+
+
+def scenario_of(request_id: str) -> str:
+    """Scenario label encoded in a generated request_id ("" if not generated)."""
+    head = request_id.split("-", 1)[0]
+    return head if head in _BUILDERS else ""
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic v3 JSONL workload.")
+    parser.add_argument("--count", type=int, required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mix", help="comma list of scenario=weight (default: built-in mix)")
+    parser.add_argument("--wallets", type=int, default=10_000)
+    parser.add_argument("--out", default="-", help="output file ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.mix) if args.mix else None
+    lines = generate(args.count, seed=args.seed, mix=mix, wallets=args.wallets)
+    if args.out == "-":
+        write_lines(lines, sys.stdout.buffer)
+        sys.stdout.buffer.flush()
+    else:
+        with open(args.out, "wb") as fh:
+            write_lines(lines, fh)
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+from dgb_wallet_guardian.abuse import OVERFLOW_SOURCE, RejectCounters, sniff_reject
+from dgb_wallet_guardian.v3 import GuardianWalletV3
+
+
+def _stdlib(obj):
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _valid():
+    return {
+        "contract_version": 3,
+        "component": "guardian_wallet",
+        "request_id": "ok",
+        "wallet_ctx": {"balance": 100.0},
+        "tx_ctx": {"to_address": "A", "amount": 1.0},
+    }
+
+
+@pytest.mark.parametrize(
+    "body",
+    [b"", b"   \n", b"[1,2]", b' "str"', b"42", b"-1", b"true", b"null", b"NaN", b"{oops", b"\xef\xbb\xbf[]"],
+)
+def test_fast_reject_envelopes_match_full_path(body):
+    gw = GuardianWalletV3()
+    out = gw.evaluate_bytes(body)
+
+    try:
+        parsed = json.loads(body)
+    except ValueError:
+        code = "GW_ERROR_INVALID_REQUEST"
+        expected = _stdlib(gw._error(request_id="unknown", reason_code=code, latency_ms=0))
+    else:
+        expected = _stdlib(gw.evaluate(parsed))
+    assert out == expected
+    assert json.loads(out)["request_id"] == "unknown"
+
+
+def test_sniff_leaves_objects_and_unusual_encodings_to_parser():
+    assert sniff_reject(b' {"a":1}', 8, 100) is None
+    assert sniff_reject(b"\x00{\x00}", 4, 100) is None  # UTF-16-BE object
+    assert sniff_reject(b" " * 80 + b"[]", 82, 100) is None  # long whitespace: not sniffed
+    assert sniff_reject(b"{}", 2, 1) == "GW_ERROR_OVERSIZE"
+
+
+def test_dict_path_errors_keep_exact_semantics_and_are_counted():
+    counters = RejectCounters()
+    gw = GuardianWalletV3(reject_counters=counters)
+
+    req = _valid()
+    req["contract_version"] = 2
+    out = gw.evaluate(req, source="peer-a")
+    assert out == GuardianWalletV3().evaluate(req)
+    assert out["reason_codes"] == ["GW_ERROR_SCHEMA_VERSION"]
+
+    gw.evaluate("junk", source="peer-a")  # type: ignore[arg-type]
+    gw.evaluate(_valid(), source="peer-a")  # real evaluation is not a reject
+    gw.evaluate_bytes(b"[]", source="peer-b")
+    bad_key = dict(_valid(), evil=1)
+    gw.evaluate_bytes(json.dumps(bad_key).encode(), source="peer-b")
+
+    assert counters.snapshot() == {
+        "peer-a": {"GW_ERROR_INVALID_REQUEST": 1, "GW_ERROR_SCHEMA_VERSION": 1},
+        "peer-b": {"GW_ERROR_INVALID_REQUEST": 1, "GW_ERROR_UNKNOWN_TOP_LEVEL_KEY": 1},
+    }
+    assert counters.total() == 4
+    assert counters.total("peer-a") == 2
+    assert counters.top_sources(1) == (("peer-a", 2),)
+    counters.reset()
+    assert counters.total() == 0
+
+
+def test_reject_counter_sources_are_bounded():
+    counters = RejectCounters(max_sources=2)
+    for i in range(10):
+        counters.record(f"s{i}", "GW_ERROR_INVALID_REQUEST")
+    counters.record(None, "GW_ERROR_OVERSIZE")
+    snap = counters.snapshot()
+    assert set(snap) == {"s0", "s1", OVERFLOW_SOURCE}
+    assert snap[OVERFLOW_SOURCE]["GW_ERROR_INVALID_REQUEST"] == 8
+    with pytest.raises(ValueError):
+        RejectCounters(max_sources=0)
+
+
+def test_garbage_flood_never_reaches_the_parser_or_hash(monkeypatch):
+    from dgb_wallet_guardian import v3 as v3_module
+
+    gw = GuardianWalletV3(reject_counters=RejectCounters())
+    garbage = (b"[0]", b"", b"   ", b"null", b"x" * (GuardianWalletV3.MAX_PAYLOAD_BYTES + 1))
+    for body in garbage:
+        gw.evaluate_bytes(body, source="s")  # fills the cached envelope bytes per code
+    calls = {"loads": 0, "sha": 0}
+
+    def counting(name, fn):
+        def wrapper(*args, **kwargs):
+            calls[name] += 1
+            return fn(*args, **kwargs)
+
+        return wrapper
+
+    monkeypatch.setattr(v3_module, "loads_json", counting("loads", v3_module.loads_json))
+    monkeypatch.setattr(v3_module, "canonical_sha256", counting("sha", v3_module.canonical_sha256))
+
+    for body in garbage:
+        for _ in range(100):
+            gw.evaluate_bytes(body, source="s")
+    assert calls == {"loads": 0, "sha": 0}
+
+    gw.evaluate_bytes(json.dumps(_valid()).encode(), source="s")
+    assert calls == {"loads": 1, "sha": 1}
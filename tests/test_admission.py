@@ -0,0 +1,173 @@
+import json
+import threading
+
+import pytest
+
+from dgb_wallet_guardian.abuse import OVERFLOW_SOURCE, RejectCounters
+from dgb_wallet_guardian.admission import AdmissionController, BucketMap, benchmark, main
+from dgb_wallet_guardian.v3 import GuardianWalletV3
+
+OVERLOADED = "GW_ERROR_OVERLOADED"
+
+
+class FakeClock:
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _request(request_id="r1"):
+    return {
+        "contract_version": 3,
+        "component": "guardian_wallet",
+        "request_id": request_id,
+        "wallet_ctx": {"balance": 100.0, "typical_amount": 1.0, "wallet_age_days": 400, "tx_count_24h": 1},
+        "tx_ctx": {"to_address": "DGB_DEST", "amount": 1.0, "fee": 0.1},
+        "extra_signals": {},
+    }
+
+
+def _admit(controller, source, wallet_id=None):
+    code = controller.enter(source, wallet_id)
+    if code is None:
+        controller.leave()
+    return code
+
+
+def test_source_bucket_burst_and_refill():
+    clock = FakeClock()
+    ac = AdmissionController(source_rate=2, source_burst=3, clock=clock)
+    assert [_admit(ac, "s") for _ in range(4)] == [None, None, None, OVERLOADED]
+    assert _admit(ac, "other") is None  # buckets are independent
+    clock.now += 0.5  # one token back
+    assert [_admit(ac, "s") for _ in range(2)] == [None, OVERLOADED]
+    clock.now += 60  # refill caps at burst
+    assert [_admit(ac, "s") for _ in range(4)] == [None, None, None, OVERLOADED]
+    assert ac.stats()["shed_source"] == 3
+
+
+def test_wallet_bucket_does_not_charge_source_on_deny():
+    clock = FakeClock()
+    ac = AdmissionController(source_rate=1, source_burst=5, wallet_rate=1, wallet_burst=1, clock=clock)
+    assert _admit(ac, "s", "w1") is None
+    assert _admit(ac, "s", "w1") == OVERLOADED
+    assert ac.sources.tokens("s") == 4.0
+    assert _admit(ac, "s", "w2") is None
+    assert _admit(ac, "s") is None  # no wallet_id: source bucket only
+    assert ac.stats()["shed_wallet"] == 1
+
+
+def test_in_flight_cap_sheds_and_recovers():
+    ac = AdmissionController(max_in_flight=2, clock=FakeClock())
+    assert ac.enter("a") is None and ac.enter("b") is None
+    assert ac.enter("c") == OVERLOADED
+    ac.leave()
+    assert ac.enter("c") is None
+    assert ac.in_flight == 2 and ac.stats()["shed_in_flight"] == 1
+
+
+def test_bucket_map_forgets_idle_keys_and_caps_memory():
+    clock = FakeClock()
+    ac = AdmissionController(source_rate=10, source_burst=10, max_keys=3, clock=clock)
+    for src in ("a", "b", "c"):
+        _admit(ac, src)
+    _admit(ac, "d")  # map full: folded into the overflow bucket
+    assert ac.sources.tokens("d") is None and ac.sources.tokens(OVERFLOW_SOURCE) == 9.0
+
+    clock.now += 1.0  # idle_seconds = burst / rate: every bucket is full again
+    _admit(ac, "e")
+    assert len(ac.sources) == 1 and ac.sources.tokens("e") == 9.0
+    assert len(ac.sources._tokens) == 4  # slots are reused, not grown
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        BucketMap(rate=0, burst=1)
+    with pytest.raises(ValueError):
+        BucketMap(rate=1, burst=0.5)
+    with pytest.raises(ValueError):
+        AdmissionController(max_in_flight=0)
+
+
+def test_gate_sheds_with_deterministic_envelope():
+    counters = RejectCounters()
+    ac = AdmissionController(source_rate=1, source_burst=1, clock=FakeClock())
+    gate = GuardianWalletV3(admission=ac, reject_counters=counters)
+
+    first = gate.evaluate(_request(), source="c1")
+    assert first["reason_codes"][0] != OVERLOADED
+    shed = gate.evaluate(_request(), source="c1")
+    assert shed["outcome"] == "deny" and shed["reason_codes"] == [OVERLOADED]
+    assert shed["request_id"] == "unknown"
+    assert shed == GuardianWalletV3()._error(request_id="unknown", reason_code=OVERLOADED, latency_ms=0)
+
+    body = json.dumps(_request()).encode()
+    out = gate.evaluate_bytes(body, source="c1")
+    assert json.loads(out) == shed
+    assert counters.snapshot()["c1"] == {OVERLOADED: 2}
+    assert gate.evaluate_bytes(body, source="c2") == GuardianWalletV3().evaluate_bytes(body)
+    assert ac.in_flight == 0
+
+
+def test_handle_entrypoints_are_admitted_too():
+    ac = AdmissionController(source_rate=1, source_burst=2, wallet_rate=1, wallet_burst=10, clock=FakeClock())
+    gate = GuardianWalletV3(admission=ac)
+    first, handle = gate.evaluate_with_handle(_request(), source="c1", wallet_id="w1")
+    assert first["reason_codes"][0] != OVERLOADED and handle is not None
+    assert gate.reevaluate_signals(handle, {"sentinel_status": "HIGH"}, source="c1")["reason_codes"][0] != OVERLOADED
+
+    shed = gate.reevaluate_signals(handle, {}, source="c1")
+    assert shed["reason_codes"] == [OVERLOADED] and shed["request_id"] == "unknown"
+    out, none_handle = gate.evaluate_with_handle(_request(), source="c1", wallet_id="w1")
+    assert out == shed and none_handle is None
+    assert ac.in_flight == 0
+
+
+def test_gate_releases_slot_on_every_path(monkeypatch):
+    ac = AdmissionController(max_in_flight=1, clock=FakeClock())
+    gate = GuardianWalletV3(admission=ac)
+    assert json.loads(gate.evaluate_bytes(b"{oops"))["reason_codes"] == ["GW_ERROR_INVALID_REQUEST"]
+    assert gate.evaluate({"bad": 1})["outcome"] == "deny"
+
+    def boom():
+        raise RuntimeError("engine failure")
+
+    monkeypatch.setattr("dgb_wallet_guardian.v3._default_guardian", boom)
+    with pytest.raises(RuntimeError):
+        gate.evaluate(_request())
+    assert ac.in_flight == 0
+
+
+def test_gate_in_flight_shedding_under_concurrency(monkeypatch):
+    ac = AdmissionController(max_in_flight=1)
+    gate = GuardianWalletV3(admission=ac)
+    inside, release = threading.Event(), threading.Event()
+    real = GuardianWalletV3._evaluate
+
+    def slow(self, *args, **kwargs):
+        inside.set()
+        release.wait(5)
+        return real(self, *args, **kwargs)
+
+    monkeypatch.setattr(GuardianWalletV3, "_evaluate", slow)
+    worker = threading.Thread(target=gate.evaluate, args=(_request(),))
+    worker.start()
+    assert inside.wait(5)
+    assert gate.evaluate(_request("r2"))["reason_codes"] == [OVERLOADED]
+    release.set()
+    worker.join(5)
+    assert ac.in_flight == 0
+
+
+def test_admission_overhead_is_small():
+    result = benchmark(200_000)
+    assert result["admitted"] == 200_000
+    assert result["tracked_wallets"] == 100_000
+    assert result["us_per_request"] < 20.0
+
+
+def test_main_prints_benchmark(capsys):
+    assert main(["--bench", "1000"]) == 0
+    assert '"requests": 1000' in capsys.readouterr().out
@@ -0,0 +1,104 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from dgb_wallet_guardian.calibration import (  # noqa: E402
+    RULE_KEYS,
+    HitMatrix,
+    build_hit_matrix,
+    sweep,
+    threshold_grid,
+    weight_grid,
+)
+from dgb_wallet_guardian.guardian_engine import RULE_WEIGHTS  # noqa: E402
+from dgb_wallet_guardian.v3 import GuardianWalletV3  # noqa: E402
+
+
+def _req(i, amount, sentinel="NORMAL"):
+    return {
+        "contract_version": 3,
+        "component": "guardian_wallet",
+        "request_id": f"c{i}",
+        "wallet_ctx": {"balance": 100.0, "typical_amount": 10.0},
+        "tx_ctx": {"to_address": "A", "amount": amount},
+        "extra_signals": {"sentinel_status": sentinel},
+    }
+
+
+def _dataset():
+    samples = []
+    for i in range(40):
+        samples.append((_req(i, 5.0), False))  # new address only
+        samples.append((_req(100 + i, 60.0), i % 4 == 0))  # + unusual size
+        samples.append((_req(200 + i, 95.0, "CRITICAL"), True))  # wipe + size + sentinel
+    samples.append(({"contract_version": 3}, True))  # skipped
+    return samples
+
+
+def test_hit_matrix_collapses_patterns_and_matches_engine_outcomes():
+    hits = build_hit_matrix(_dataset())
+    assert hits.skipped == 1
+    assert hits.samples == 120
+    assert hits.patterns.shape == (3, len(RULE_KEYS))
+    assert int(hits.positives.sum()) == 50
+
+    default = sweep(hits, weight_grid(), threshold_grid([1.0], [2.0], [3.0]))
+    rec = next(default.records())
+    # Recompute the same metric with the real gate
+    gw = GuardianWalletV3()
+    denied = [(gw.evaluate(r)["outcome"] == "deny", y) for r, y in _dataset()[:-1]]
+    tp = sum(1 for d, y in denied if d and y)
+    assert rec["deny_rate"] == pytest.approx(sum(d for d, _ in denied) / 120)
+    assert rec["deny_recall"] == pytest.approx(tp / 50)
+    assert rec["weights"] == RULE_WEIGHTS
+
+
+def test_sweep_grid_shapes_and_best_point():
+    hits = build_hit_matrix(_dataset())
+    weights = weight_grid(BALANCE_UNUSUAL_SIZE=[0.5, 1.5], DEST_NEW_ADDRESS=[0.0, 1.0])
+    thresholds = threshold_grid([0.5, 1.0, 2.0], [2.0, 3.0], [3.0, 10.0])
+    assert weights.shape == (4, len(RULE_KEYS))
+    assert thresholds.shape[1] == 3 and all(e <= h <= c for e, h, c in thresholds)
+
+    result = sweep(hits, weights, thresholds)
+    assert result.metrics["deny_recall"].shape == (4, len(thresholds))
+    assert len(list(result.records())) == 4 * len(thresholds)
+    assert np.all(result.metrics["escalate_rate"] >= 0)
+
+    best = result.best("deny_precision", max_deny_rate=0.34)
+    assert best["deny_rate"] <= 0.34
+    assert best["deny_precision"] == 1.0
+    with pytest.raises(ValueError):
+        result.best("deny_precision", max_deny_rate=-1.0)
+    with pytest.raises(ValueError):
+        result.best("nope")
+
+
+def test_from_arrays_and_input_validation():
+    hits = HitMatrix.from_arrays(
+        np.array([[1, 0], [1, 0], [0, 1], [0, 0]]), np.array([1, 0, 1, 0]), rule_keys=("A", "B")
+    )
+    assert hits.patterns.tolist() == [[0, 0], [1, 0], [0, 1]]
+    assert hits.positives.tolist() == [0, 1, 1]
+    assert hits.negatives.tolist() == [1, 1, 0]
+
+    res = sweep(hits, [[1.0, 2.0]], [[1.0, 2.0, 3.0]])
+    assert res.metrics["deny_recall"][0, 0] == 0.5
+
+    with pytest.raises(ValueError):
+        HitMatrix.from_arrays(np.zeros((3, 2)), np.zeros(2), rule_keys=("A", "B"))
+    with pytest.raises(ValueError):
+        sweep(hits, [[1.0]], [[1.0, 2.0, 3.0]])
+    with pytest.raises(ValueError):
+        sweep(hits, [[1.0, 1.0]], [[3.0, 2.0, 1.0]])
+    with pytest.raises(ValueError):
+        weight_grid(NOT_A_RULE=[1.0])
+
+
+def test_large_grid_over_many_samples_is_fast():
+    rng = np.random.default_rng(7)
+    hits = HitMatrix.from_arrays(rng.random((1_000_000, len(RULE_KEYS))) < 0.2, rng.random(1_000_000) < 0.1)
+    weights = weight_grid(**{k: [0.5, 1.0, 1.5, 2.0] for k in RULE_KEYS[:5]})  # 1024 vectors
+    thresholds = threshold_grid([0.5, 1.0, 1.5], [1.5, 2.0, 2.5], [3.0])
+    result = sweep(hits, weights, thresholds)
+    assert result.metrics["deny_rate"].shape == (1024, len(thresholds))
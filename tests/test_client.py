@@ -0,0 +1,86 @@
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+
+import pytest
+
+from dgb_wallet_guardian.client import WalletGuardian, compile_adapter, transaction_context_from, wallet_context_from
+from dgb_wallet_guardian.guardian_engine import GuardianEngine
+from dgb_wallet_guardian.models import TransactionContext, WalletContext
+from dgb_wallet_guardian.v3 import GuardianWalletV3
+
+
+def _request():
+    return {
+        "contract_version": 3,
+        "component": "guardian_wallet",
+        "request_id": "adapt-1",
+        "wallet_ctx": {"balance": 100.0, "typical_amount": 1.0, "wallet_age_days": 400, "tx_count_24h": 1},
+        "tx_ctx": {"to_address": "DGB_DEST", "amount": 95.0, "fee": 0.1, "memo": "rent"},
+        "extra_signals": {},
+    }
+
+
+def test_adapters_match_constructor_and_ignore_extra_keys():
+    req = _request()
+    assert wallet_context_from(req["wallet_ctx"]) == WalletContext(balance=100.0, typical_amount=1.0)
+    assert transaction_context_from(req["tx_ctx"]) == TransactionContext(to_address="DGB_DEST", amount=95.0, fee=0.1, memo="rent")
+
+    a, b = wallet_context_from({"balance": 1}), wallet_context_from({"balance": 1})
+    assert a.known_addresses == [] and a.known_addresses is not b.known_addresses  # default_factory per call
+    assert wallet_context_from({"balance": 1, "typical_fee": None}).typical_fee is None
+
+    with pytest.raises(TypeError, match="balance"):
+        wallet_context_from({"typical_amount": 1.0})
+    with pytest.raises(TypeError, match="to_address"):
+        transaction_context_from({"amount": 1.0})
+
+
+def test_compile_adapter_handles_kw_only_and_non_init_fields():
+    @dataclass
+    class Model:
+        a: int
+        b: int = field(default=2, kw_only=True)
+        c: list = field(default_factory=list, init=False)
+        d: str = "x"
+
+    adapt = compile_adapter(Model)
+    m = adapt({"a": 1, "b": 3, "c": "ignored", "d": "y", "z": 0})
+    assert (m.a, m.b, m.c, m.d) == (1, 3, [], "y")
+    assert adapt({"a": 1}) == Model(a=1)
+
+
+def test_v3_to_engine_boundary_builds_no_intermediate_dicts(monkeypatch):
+    req = _request()
+    seen = {}
+    real_client = WalletGuardian.prepare_context
+    real_engine = GuardianEngine.prepare_context
+
+    def client_entry(self, wallet_ctx, tx_ctx, *, sats=False):
+        seen["base"] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        return real_client(self, wallet_ctx, tx_ctx, sats=sats)
+
+    def engine_entry(self, wallet, tx, *, sats=False):
+        seen["at_engine"] = tracemalloc.get_traced_memory()
+        seen["models"] = (wallet, tx)
+        return real_engine(self, wallet, tx, sats=sats)
+
+    monkeypatch.setattr(WalletGuardian, "prepare_context", client_entry)
+    monkeypatch.setattr(GuardianEngine, "prepare_context", engine_entry)
+    gate = GuardianWalletV3()
+    gate.evaluate(req)  # warm caches
+
+    tracemalloc.start()
+    try:
+        envelope = gate.evaluate(req)
+    finally:
+        tracemalloc.stop()
+
+    current, peak = seen["at_engine"]
+    transient = peak - current
+    # Filtering into fresh dicts (or keyword-constructing the models) would free at least one dict here.
+    assert transient < sys.getsizeof(dict(req["tx_ctx"]))
+    wallet, tx = seen["models"]
+    assert wallet.balance is req["wallet_ctx"]["balance"] and tx.memo is req["tx_ctx"]["memo"]
+    assert envelope == GuardianWalletV3().evaluate(_request())
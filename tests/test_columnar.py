@@ -0,0 +1,113 @@
+import json
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from dgb_wallet_guardian.columnar import (  # noqa: E402
+    LEVEL_ERROR,
+    LEVELS,
+    OUTCOMES,
+    RULE_KEYS,
+    main,
+    open_columns,
+    row_request,
+    score_columns,
+)
+from dgb_wallet_guardian.config import GuardianConfig  # noqa: E402
+from dgb_wallet_guardian.v3 import GuardianWalletV3  # noqa: E402
+
+
+def _columns(n, seed=0, sats=False):
+    rng = np.random.default_rng(seed)
+    if sats:
+        balance = rng.integers(1, 10**13, size=n, dtype=np.int64)
+        typical = np.maximum(balance // rng.integers(5, 200, size=n), 1)
+        amount = np.where(rng.random(n) < 0.3, balance // 10 * 9, typical * rng.integers(1, 8, size=n))
+    else:
+        balance = np.round(rng.uniform(1.0, 20_000.0, size=n), 4)
+        typical = np.round(balance * rng.uniform(0.005, 0.2, size=n), 4)
+        amount = np.where(rng.random(n) < 0.3, np.round(balance * rng.uniform(0.85, 1.0, size=n), 8),
+                          np.round(typical * rng.uniform(0.1, 8.0, size=n), 8))
+    return {
+        "request_id": np.array([f"c-{i}" for i in range(n)]),
+        "balance": balance,
+        "typical_amount": typical,
+        "wallet_age_days": rng.integers(0, 1500, size=n),
+        "to_address": np.array([f"D{i % 97}" for i in range(n)], dtype="S8"),
+        "amount": amount,
+        "sentinel_status": rng.choice(np.array(["", "NORMAL", "HIGH", "CRITICAL"]), size=n),
+    }
+
+
+@pytest.mark.parametrize("units", ["dgb", "sat"])
+def test_columns_match_the_gate_row_for_row(units):
+    cols = _columns(400, seed=1, sats=units == "sat")
+    if units == "dgb":
+        cols["amount"][7] = np.nan
+    res = score_columns(cols, units=units, hashes=True, chunk_rows=64)
+    gate = GuardianWalletV3(AMOUNT_UNITS=units)
+    for i in range(400):
+        env = gate.evaluate(row_request(cols, i))
+        assert OUTCOMES[res.outcome[i]] == env["outcome"]
+        assert res.context_hash[i].decode() == env["context_hash"]
+        if env["risk"]["level"] == "unknown":
+            assert res.level[i] == LEVEL_ERROR and env["reason_codes"] == ["GW_ERROR_BAD_NUMBER"]
+            continue
+        assert LEVELS[res.level[i]] == env["risk"]["level"]
+        assert res.score[i] == env["risk"]["score"]
+        names = {("SENTINEL_ALERT" if k.startswith("SENTINEL_ALERT_") else k) for b, k in enumerate(RULE_KEYS) if int(res.rules[i]) >> b & 1}
+        assert sorted(names) == env["reason_codes"][1:]
+    if units == "dgb":
+        assert res.error[7] == 1 and res.level[7] == LEVEL_ERROR
+
+
+def test_inputs_outputs_and_cli(tmp_path):
+    cols = _columns(1000, seed=2)
+    ref = score_columns(cols)
+
+    structured = np.empty(1000, dtype=[(k, v.dtype) for k, v in cols.items()])
+    for k, v in cols.items():
+        structured[k] = v
+    np.save(tmp_path / "rows.npy", structured)
+    np.savez(tmp_path / "rows.npz", **cols)
+    (tmp_path / "cols").mkdir()
+    for k, v in cols.items():
+        np.save(tmp_path / "cols" / f"{k}.npy", v)
+
+    for src in ("rows.npy", "rows.npz", "cols"):
+        res = score_columns(open_columns(str(tmp_path / src)), str(tmp_path / f"out-{src}"), chunk_rows=300)
+        for name in ("outcome", "level", "score", "rules", "error"):
+            assert np.array_equal(getattr(res, name), getattr(ref, name))
+    mapped = np.load(tmp_path / "out-cols" / "rules.npy", mmap_mode="r")
+    assert isinstance(mapped, np.memmap) and np.array_equal(mapped, ref.rules)
+
+    assert main([str(tmp_path / "cols"), str(tmp_path / "cli")]) == 0
+    assert np.array_equal(np.load(tmp_path / "cli" / "outcome.npy"), ref.outcome)
+    assert ref.summary()["rows"] == 1000 and sum(ref.summary()["outcomes"].values()) == 1000
+
+
+def test_validation_and_config():
+    cols = _columns(10)
+    with pytest.raises(ValueError, match="unknown columns"):
+        score_columns(dict(cols, force_allow=np.ones(10)))
+    with pytest.raises(ValueError, match="missing columns"):
+        score_columns({"balance": cols["balance"]})
+    with pytest.raises(ValueError, match="same length"):
+        score_columns(dict(cols, amount=cols["amount"][:5]))
+    with pytest.raises(ValueError, match="must be integer"):
+        score_columns(cols, units="sat")
+
+    lax = score_columns(cols, config=GuardianConfig(threshold_elevated=100, threshold_high=100, threshold_critical=100))
+    assert set(lax.outcome.tolist()) == {OUTCOMES.index("allow")}
+
+
+def test_million_rows_without_per_row_dicts(tmp_path):
+    n = 1_000_000
+    cols = {k: v for k, v in _columns(n, seed=3).items() if k not in ("request_id", "to_address")}
+    t0 = time.perf_counter()
+    res = score_columns(cols, str(tmp_path), chunk_rows=250_000)
+    assert time.perf_counter() - t0 < 10.0
+    assert res.rows == n
+    assert json.loads(json.dumps(res.summary()))["rows"] == n
@@ -0,0 +1,176 @@
+import time
+
+import pytest
+
+from dgb_wallet_guardian.cooldown import CooldownTracker, benchmark, main
+from dgb_wallet_guardian.policies import PolicyStore
+from dgb_wallet_guardian.v3 import GuardianWalletV3
+
+
+class FakeClock:
+    def __init__(self, now=1_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _request(request_id="r1", amount=5.0, **signals):
+    return {
+        "contract_version": 3,
+        "component": "guardian_wallet",
+        "request_id": request_id,
+        "wallet_ctx": {"balance": 100.0, "typical_amount": 1.0, "wallet_age_days": 400, "tx_count_24h": 1},
+        "tx_ctx": {"to_address": "DGB_DEST", "amount": amount, "fee": 0.1},
+        "extra_signals": signals,
+    }
+
+
+def test_arm_check_and_expire():
+    clock = FakeClock()
+    t = CooldownTracker(lock_seconds=60, clock=clock)
+    assert t.arm("w1") == 1_060.0
+    t.arm("w2", 5)
+    assert t.is_locked("w1") and t.remaining("w2") == 5.0
+    assert not t.is_locked("other") and t.remaining("other") == 0.0
+
+    clock.now += 5
+    assert not t.is_locked("w2")
+    assert t.expire() == 1 and len(t) == 1
+
+    clock.now += 55
+    assert not t.is_locked("w1")
+    assert t.expire() == 0
+
+
+def test_expire_counts_only_live_locks_within_a_tick():
+    clock = FakeClock(0.0)
+    t = CooldownTracker(tick_seconds=10.0, clock=clock)
+    t.arm("w1", 2)
+    t.arm("w2", 8)
+    clock.now = 5.0  # w1 lapsed, but the 10 s tick has not turned yet
+    assert t.expire() == 1 and len(t) == 1
+    assert t.is_locked("w2") and not t.is_locked("w1")
+    clock.now = 9.0
+    assert t.expire() == 0
+    t.arm("w1", 30)  # re-arming after the early drop works as usual
+    clock.now = 20.0
+    assert t.expire() == 1 and t.remaining("w1") == 19.0
+
+
+def test_rearm_keeps_longer_lock_and_stale_entries_are_ignored():
+    clock = FakeClock()
+    t = CooldownTracker(clock=clock)
+    t.arm("w", 100)
+    assert t.arm("w", 10) == 1_100.0  # shorter lock does not shorten
+    t.arm("w", 300)
+    clock.now += 150  # first entry's bucket has passed
+    assert t.expire() == 1 and t.remaining("w") == 150.0
+    clock.now += 150
+    assert t.expire() == 0
+
+
+def test_release_and_zero_seconds():
+    clock = FakeClock()
+    t = CooldownTracker(clock=clock)
+    t.arm("w", 30)
+    assert t.release("w") and not t.release("w")
+    assert not t.is_locked("w")
+    t.arm("z", 0)
+    assert not t.is_locked("z")
+    clock.now += 1
+    assert t.expire() == 0
+
+
+def test_cascades_across_levels_and_long_locks():
+    # 2-bit slots, 3 levels: level spans 4, 16, 64 ticks; beyond that entries re-park at the top.
+    clock = FakeClock(0.0)
+    t = CooldownTracker(tick_seconds=1.0, slot_bits=2, levels=3, clock=clock)
+    durations = [1, 3, 4, 5, 15, 16, 17, 63, 64, 65, 200, 1000]
+    for i, seconds in enumerate(durations):
+        t.arm(f"w{i}", seconds)
+    for step in range(1, 1002):
+        clock.now = float(step)
+        live = t.expire()
+        assert live == sum(1 for d in durations if d > step), step
+
+
+def test_fractional_ticks_and_idle_jump():
+    clock = FakeClock(10.25)
+    t = CooldownTracker(tick_seconds=0.5, clock=clock)
+    t.arm("w", 0.3)
+    clock.now = 10.5
+    assert t.is_locked("w")
+    clock.now = 10.56
+    assert not t.is_locked("w")
+    clock.now = 11.0  # reclaimed when its (rounded-up) tick comes round
+    assert t.expire() == 0
+    clock.now = 10.0 ** 7  # idle wheel jumps instead of ticking
+    t.arm("w", 2)
+    clock.now += 2
+    assert t.expire() == 0
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        CooldownTracker(tick_seconds=0)
+    with pytest.raises(ValueError):
+        CooldownTracker(lock_seconds=-1)
+    with pytest.raises(ValueError):
+        CooldownTracker().arm("w", float("inf"))
+
+
+def test_gate_denies_locked_wallet_before_engine(monkeypatch):
+    clock = FakeClock()
+    tracker = CooldownTracker(clock=clock)
+    gate = GuardianWalletV3(cooldowns=tracker)
+    tracker.arm("w1", 60)
+
+    def boom():
+        raise AssertionError("engine must not run for a locked wallet")
+
+    monkeypatch.setattr("dgb_wallet_guardian.v3._default_guardian", boom)
+    env = gate.evaluate(_request(), wallet_id="w1")
+    assert env["outcome"] == "deny"
+    assert env["reason_codes"] == ["GW_DENY_WALLET_LOCKED"]
+    assert env == gate.evaluate(_request(), wallet_id="w1")
+    monkeypatch.undo()
+
+    # Other wallets and calls without wallet_id are scored as usual.
+    assert gate.evaluate(_request(), wallet_id="w2")["reason_codes"][0] != "GW_DENY_WALLET_LOCKED"
+    assert gate.evaluate(_request())["reason_codes"][0] != "GW_DENY_WALLET_LOCKED"
+    clock.now += 60
+    assert gate.evaluate(_request(), wallet_id="w1")["reason_codes"][0] != "GW_DENY_WALLET_LOCKED"
+
+
+def test_gate_arms_lock_on_critical_and_policy_delay():
+    clock = FakeClock()
+    tracker = CooldownTracker(lock_seconds=900, clock=clock)
+    gate = GuardianWalletV3(cooldowns=tracker, policies=PolicyStore(wallets={"w2": {"max_daily_amount": 0.5, "delay_seconds": 120}}))
+
+    critical = gate.evaluate(_request(amount=95.0, sentinel_status="HIGH", trusted_device=False), wallet_id="w1")
+    assert critical["risk"]["level"] == "CRITICAL"
+    assert critical["meta"]["lock"] == {"seconds": 900}
+    assert tracker.remaining("w1") == 900.0
+    assert gate.evaluate(_request("r2"), wallet_id="w1")["reason_codes"] == ["GW_DENY_WALLET_LOCKED"]
+
+    delayed = gate.evaluate(_request(amount=1.0), wallet_id="w2")
+    assert delayed["meta"]["policy"]["decision"] == "delay"
+    assert delayed["meta"]["lock"] == {"seconds": 120}
+    assert tracker.remaining("w2") == 120.0
+
+    calm = gate.evaluate(_request(amount=0.5), wallet_id="w3")
+    assert "lock" not in calm["meta"] and not tracker.is_locked("w3")
+
+
+def test_benchmark_one_million_cooldowns():
+    start = time.perf_counter()
+    result = benchmark(1_000_000)
+    assert result["locked"] == 1_000_000
+    assert result["left_after_expiry"] == 0
+    assert time.perf_counter() - start < 30.0
+
+
+def test_main_prints_benchmark(capsys):
+    assert main(["--bench", "1000"]) == 0
+    assert '"cooldowns": 1000' in capsys.readouterr().out
@@ -0,0 +1,141 @@
+import json
+import time
+
+from dgb_wallet_guardian.cooldown import CooldownTracker
+from dgb_wallet_guardian.deadline import STAGES, Budget, StageStats, deadline_in
+from dgb_wallet_guardian.device_baseline import DeviceBaselineStore
+from dgb_wallet_guardian.fanin import FanInDetector
+from dgb_wallet_guardian.geoip import GeoIPIndex, TravelTracker
+from dgb_wallet_guardian.v3 import GuardianWalletV3
+
+
+def _request(**signals):
+    return {
+        "contract_version": 3,
+        "component": "guardian_wallet",
+        "request_id": "dl-1",
+        "wallet_ctx": {"balance": 100, "typical_amount": 10},
+        "tx_ctx": {"to_address": "A", "amount": 5, "fee": 0.1},
+        "extra_signals": signals,
+    }
+
+
+class _SlowDevices(DeviceBaselineStore):
+    def observe(self, wallet_id, fingerprint, trusted=False):
+        time.sleep(0.05)
+        return super().observe(wallet_id, fingerprint, trusted)
+
+
+class _SlowTravel(TravelTracker):
+    slow = False
+
+    def observe(self, wallet_id, geo_ip):
+        if self.slow:
+            time.sleep(0.05)
+        return super().observe(wallet_id, geo_ip)
+
+
+def test_budget_marks_and_skips():
+    now = [0.0]
+    budget = Budget(1.0, clock=lambda: now[0])
+    now[0] = 0.25
+    assert budget.mark("parse")
+    assert budget.allows(0.5) and not budget.allows(0.8) and not budget.expired()
+    budget.skip("enrich")
+    now[0] = 1.5
+    assert budget.expired() and not budget.mark("score")
+    assert [(s.stage, s.seconds, s.status) for s in budget.spans] == [
+        ("parse", 0.25, "ok"),
+        ("enrich", 0.0, "skipped"),
+        ("score", 1.25, "late"),
+    ]
+    assert deadline_in(2.0, clock=lambda: 10.0) == 12.0
+
+
+def test_roomy_deadline_matches_the_no_deadline_envelope():
+    gw = GuardianWalletV3(stage_stats=StageStats())
+    req = _request()
+    assert gw.evaluate(req, deadline=deadline_in(5.0)) == gw.evaluate(req)
+    assert gw.stage_stats.snapshot()["evaluations"] == 1  # only deadline-bound calls are recorded
+
+
+def test_past_deadline_fails_closed():
+    stats = StageStats()
+    gw = GuardianWalletV3(stage_stats=stats)
+    env = gw.evaluate(_request(), deadline=time.monotonic() - 1.0)
+    assert env["outcome"] == "deny"
+    assert env["reason_codes"] == ["GW_ERROR_TIMEOUT"]
+    assert env["request_id"] == "dl-1"
+
+    out = json.loads(gw.evaluate_bytes(json.dumps(_request()).encode(), deadline=time.monotonic() - 1.0))
+    assert out["reason_codes"] == ["GW_ERROR_TIMEOUT"]
+    snap = stats.snapshot()
+    assert (snap["evaluations"], snap["timeouts"]) == (2, 2)
+    assert snap["stages"]["parse"]["late"] == 1
+
+
+def test_low_budget_skips_enrichment_but_still_decides():
+    devices = DeviceBaselineStore()
+    gw = GuardianWalletV3(devices=devices, DEADLINE_RESERVE_MS=10_000.0)
+    env = gw.evaluate(_request(device_fingerprint="phone"), wallet_id="w1", deadline=deadline_in(5.0))
+    assert env["reason_codes"][0] != "GW_ERROR_TIMEOUT"
+    assert env["meta"]["skipped"] == ["device"]
+    assert "device" not in env["meta"]
+    assert devices.devices("w1") == []  # the store was never touched
+
+    full = gw.evaluate(_request(device_fingerprint="phone"), wallet_id="w1", deadline=deadline_in(60.0))
+    assert "skipped" not in full["meta"] and full["meta"]["device"] == {"known": False, "mismatch": False}
+    assert full["context_hash"] != env["context_hash"]
+
+
+def test_slow_enrichment_overruns_into_timeout():
+    stats = StageStats()
+    gw = GuardianWalletV3(devices=_SlowDevices(), stage_stats=stats, DEADLINE_RESERVE_MS=0.0)
+    env = gw.evaluate(_request(device_fingerprint="phone"), wallet_id="w1", deadline=deadline_in(0.02))
+    assert env["reason_codes"] == ["GW_ERROR_TIMEOUT"]
+
+    stages = stats.snapshot()["stages"]
+    assert set(stages) <= set(STAGES)
+    assert stages["enrich"]["late"] == 1 and stages["enrich"]["max_s"] >= 0.05
+    assert "score" not in stages  # evaluation stopped at the first late mandatory stage
+
+
+def test_timed_out_request_leaves_no_store_state():
+    index = GeoIPIndex.from_rows([("8.8.8.0", "8.8.8.255", "US"), ("81.2.69.0", "81.2.69.255", "GB")])
+    travel = _SlowTravel(index)
+    devices = DeviceBaselineStore(learn_untrusted=True)
+    fanin = FanInDetector()
+    gw = GuardianWalletV3(travel=travel, devices=devices, fanin=fanin, DEADLINE_RESERVE_MS=0.0)
+    gw.evaluate(_request(geo_ip="8.8.8.8", device_fingerprint="phone"), wallet_id="w1")
+
+    travel.slow = True
+    late = gw.evaluate(_request(geo_ip="81.2.69.1", device_fingerprint="laptop"), wallet_id="w1", deadline=deadline_in(0.02))
+    assert late["reason_codes"] == ["GW_ERROR_TIMEOUT"]
+    travel.slow = False
+
+    # The retry is judged exactly like the timed-out attempt would have been.
+    retry = gw.evaluate(_request(geo_ip="81.2.69.1", device_fingerprint="laptop"), wallet_id="w1")
+    assert retry["meta"]["geo"] == {"location": "GB", "previous": "US", "impossible": True}
+    assert retry["meta"]["device"] == {"known": False, "mismatch": True}
+    assert "GEO_IMPOSSIBLE_TRAVEL" in retry["reason_codes"]
+    assert fanin.estimate("A") == 1
+
+
+def test_timed_out_verdict_does_not_lock_the_wallet(monkeypatch):
+    cooldowns = CooldownTracker()
+    gw = GuardianWalletV3(cooldowns=cooldowns)
+    critical = dict(_request(sentinel_status="CRITICAL"), tx_ctx={"to_address": "A", "amount": 95, "fee": 0.1})
+    envelope = GuardianWalletV3._envelope
+
+    def slow_envelope(self, *args, **kwargs):
+        time.sleep(0.05)
+        return envelope(self, *args, **kwargs)
+
+    monkeypatch.setattr(GuardianWalletV3, "_envelope", slow_envelope)
+    late = gw.evaluate(critical, wallet_id="w1", deadline=deadline_in(0.02))
+    assert late["reason_codes"] == ["GW_ERROR_TIMEOUT"]
+    assert not cooldowns.is_locked("w1")
+    monkeypatch.undo()
+
+    assert gw.evaluate(critical, wallet_id="w1")["meta"]["lock"] == {"seconds": 900}
+    assert cooldowns.is_locked("w1")
@@ -1,4 +1,5 @@
 from dgb_wallet_guardian.decisions import (
+    DECISION_SEVERITY,
     GuardianDecisionType,
     GuardianResult,
 )
@@ -18,3 +19,9 @@ def test_guardian_result_defaults():
     assert r.cooldown_seconds == 0
     assert r.require_second_factor is False
     assert r.reason == "ok"
+
+
+def test_severity_order_and_audit_dict():
+    assert sorted(DECISION_SEVERITY, key=DECISION_SEVERITY.get)[-1] is GuardianDecisionType.BLOCK
+    r = GuardianResult(decision=GuardianDecisionType.DELAY, reason="x", cooldown_seconds=60)
+    assert r.audit_dict() == {"decision": "delay", "reason": "x", "cooldown_seconds": 60, "require_second_factor": False}
@@ -0,0 +1,105 @@
+import pytest
+
+from dgb_wallet_guardian.device_baseline import DeviceBaselineStore, DeviceCheck
+from dgb_wallet_guardian.v3 import GuardianWalletV3
+
+
+def _request(signals):
+    return {
+        "contract_version": 3,
+        "component": "guardian_wallet",
+        "request_id": "dev-1",
+        "wallet_ctx": {"balance": 100, "typical_amount": 10},
+        "tx_ctx": {"to_address": "A", "amount": 5, "fee": 0.1},
+        "extra_signals": signals,
+    }
+
+
+def test_baseline_policy():
+    store = DeviceBaselineStore(per_wallet=2)
+    assert store.observe("w1", None) is None
+    assert store.observe("w1", "phone") == DeviceCheck(known=False, mismatch=False)  # bootstrap
+    assert store.observe("w1", "phone") == DeviceCheck(known=True, mismatch=False)
+
+    assert store.observe("w1", "laptop") == DeviceCheck(known=False, mismatch=True)
+    assert store.devices("w1") == ["phone"]  # untrusted devices are not learned
+
+    assert store.observe("w1", "laptop", trusted=True) == DeviceCheck(known=False, mismatch=False)
+    assert store.observe("w1", "laptop") == DeviceCheck(known=True, mismatch=False)
+
+
+def test_lru_eviction_per_wallet_and_across_wallets():
+    store = DeviceBaselineStore(max_wallets=2, per_wallet=2)
+    store.enroll("w1", "a")
+    store.enroll("w1", "b")
+    store.observe("w1", "a")  # refresh a -> b is least recent
+    store.enroll("w1", "c")
+    assert store.devices("w1") == ["a", "c"]
+
+    store.enroll("w2", "x")
+    store.observe("w1", "a")  # w1 most recent
+    store.enroll("w3", "y")
+    assert len(store) == 2
+    assert store.devices("w2") == []
+    assert store.devices("w1") == ["c", "a"]
+
+
+def test_forget_undoes_an_enrollment():
+    store = DeviceBaselineStore(per_wallet=2)
+    first = store.observe("w1", "phone")
+    assert store.forget("w1", "phone", first) and store.devices("w1") == []
+    store.enroll("w1", "phone")
+    store.enroll("w1", "tablet")
+    check = store.observe("w1", "laptop", trusted=True)  # pushes "phone" out
+    assert store.devices("w1") == ["tablet", "laptop"]
+    assert store.forget("w1", "laptop", check)
+    assert store.devices("w1") == ["phone", "tablet"]
+    assert not store.forget("w1", "tablet", store.observe("w1", "tablet"))  # nothing was enrolled
+
+
+def test_snapshot_roundtrip_preserves_order():
+    store = DeviceBaselineStore(per_wallet=3, learn_untrusted=True)
+    for wallet, fp in [("w1", "a"), ("w2", "x"), ("w1", "b"), ("w1", "a")]:
+        store.observe(wallet, fp)
+    restored = DeviceBaselineStore.restore(store.snapshot())
+    assert restored.snapshot() == store.snapshot()
+    assert restored.devices("w1") == ["b", "a"]
+
+    with pytest.raises(ValueError):
+        DeviceBaselineStore.restore({"version": 99})
+
+
+def test_gate_feeds_device_mismatch_and_records_audit():
+    gw = GuardianWalletV3(devices=DeviceBaselineStore())
+    first = gw.evaluate(_request({"device_fingerprint": "phone"}), wallet_id="w1")
+    assert "DEVICE_MISMATCH" not in first["reason_codes"]
+    assert first["meta"]["device"] == {"known": False, "mismatch": False}
+
+    out = gw.evaluate(_request({"device_fingerprint": "stolen"}), wallet_id="w1")
+    assert "DEVICE_MISMATCH" in out["reason_codes"]
+    assert out["meta"]["device"] == {"known": False, "mismatch": True}
+    assert out["context_hash"] != first["context_hash"]
+
+    trusted = gw.evaluate(_request({"device_fingerprint": "tablet", "trusted_device": 1}), wallet_id="w1")
+    assert "DEVICE_MISMATCH" not in trusted["reason_codes"]
+
+
+def test_gate_without_wallet_id_is_unchanged():
+    plain = GuardianWalletV3().evaluate(_request({"device_fingerprint": "phone"}))
+    gw = GuardianWalletV3(devices=DeviceBaselineStore())
+    assert gw.evaluate(_request({"device_fingerprint": "phone"})) == plain
+    assert len(gw.devices) == 0
+
+
+def test_rescoring_reuses_first_device_check():
+    store = DeviceBaselineStore(learn_untrusted=True)
+    gw = GuardianWalletV3(devices=store)
+    gw.evaluate(_request({"device_fingerprint": "phone"}), wallet_id="w1")
+    first, handle = gw.evaluate_with_handle(_request({"device_fingerprint": "stolen"}), wallet_id="w1")
+    assert first["meta"]["device"] == {"known": False, "mismatch": True}
+
+    # The first pass learned "stolen"; re-scoring must not see it as known.
+    again = gw.reevaluate_signals(handle, {"device_fingerprint": "stolen"})
+    assert again == first
+    assert "DEVICE_MISMATCH" in gw.reevaluate_signals(handle, {"device_fingerprint": "stolen", "sentinel_status": "HIGH"})["reason_codes"]
+    assert store.devices("w1") == ["phone", "stolen"]
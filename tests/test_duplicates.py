@@ -0,0 +1,142 @@
+import json
+import time
+
+import pytest
+
+from dgb_wallet_guardian.duplicates import DuplicateSendIndex, benchmark, fingerprint, main
+from dgb_wallet_guardian.enrichment import EnrichmentProvider, EnrichmentStage
+from dgb_wallet_guardian.v3 import GuardianWalletV3
+
+
+class FakeClock:
+    def __init__(self, now=1_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _request(request_id="r1", amount=5.0, to_address="DGB_DEST", **tx):
+    return {
+        "contract_version": 3,
+        "component": "guardian_wallet",
+        "request_id": request_id,
+        "wallet_ctx": {"balance": 100.0, "typical_amount": 1.0, "wallet_age_days": 400, "tx_count_24h": 1},
+        "tx_ctx": dict({"to_address": to_address, "amount": amount, "fee": 0.1}, **tx),
+        "extra_signals": {},
+    }
+
+
+def test_fingerprint_fields():
+    base = fingerprint("w1", "A", 1.5)
+    assert fingerprint("w1", "A", 1.5, None) == base
+    assert fingerprint("w1", "A", 2, None) == fingerprint("w1", "A", 2.0)
+    assert len({base, fingerprint("w2", "A", 1.5), fingerprint("w1", "B", 1.5), fingerprint("w1", "A", 1.6), fingerprint("w1", "A", 1.5, "tok")}) == 5
+
+
+def test_repeat_inside_window_matches_original():
+    clock = FakeClock()
+    index = DuplicateSendIndex(window_seconds=10, clock=clock)
+    assert index.check("w1", "A", 1.5, request_id="r1") is None
+    clock.now += 4
+    match = index.check("w1", "A", 1.5, request_id="r2")
+    assert match is not None and match.request_id == "r1" and match.age_seconds == 4.0
+    assert index.check("w1", "A", 1.6, request_id="r3") is None
+    assert index.check("w1", "A", 1.5, asset_id="tok") is None
+
+    clock.now += 6  # repeats do not extend the window
+    assert index.check("w1", "A", 1.5, request_id="r4").request_id == "r1"
+    clock.now += 0.5
+    assert index.check("w1", "A", 1.5, request_id="r5") is None
+    clock.now += 1
+    assert index.check("w1", "A", 1.5).request_id == "r5"
+
+
+def test_memory_bounded_by_window():
+    clock = FakeClock()
+    index = DuplicateSendIndex(window_seconds=5, bucket_seconds=1, clock=clock)
+    for second in range(60):
+        for i in range(100):
+            index.check(f"w{i}", f"dest{second}", 1.0)
+        clock.now += 1
+        assert len(index) <= 100 * 7
+    clock.now += 10
+    assert index.expire() == 0
+    assert len(index._buckets) == 0
+
+
+def test_validation():
+    with pytest.raises(ValueError):
+        DuplicateSendIndex(window_seconds=0)
+    with pytest.raises(ValueError):
+        DuplicateSendIndex(bucket_seconds=-1)
+
+
+def test_gate_denies_duplicate_before_engine(monkeypatch):
+    clock = FakeClock()
+    gate = GuardianWalletV3(duplicates=DuplicateSendIndex(window_seconds=10, clock=clock))
+    first = gate.evaluate(_request("r1"), wallet_id="w1")
+    assert first["reason_codes"][0] != "GW_DENY_DUPLICATE_SEND"
+
+    def boom():
+        raise AssertionError("engine must not run for a duplicate")
+
+    monkeypatch.setattr("dgb_wallet_guardian.v3._default_guardian", boom)
+    env = gate.evaluate(_request("r2"), wallet_id="w1")
+    assert env["outcome"] == "deny"
+    assert env["reason_codes"] == ["GW_DENY_DUPLICATE_SEND"]
+    assert env["request_id"] == "r2"
+    monkeypatch.undo()
+
+    # Other wallets, amounts, assets and calls without wallet_id are scored as usual.
+    assert gate.evaluate(_request("r3"), wallet_id="w2")["reason_codes"][0] != "GW_DENY_DUPLICATE_SEND"
+    assert gate.evaluate(_request("r4", amount=6.0), wallet_id="w1")["reason_codes"][0] != "GW_DENY_DUPLICATE_SEND"
+    assert gate.evaluate(_request("r5", asset_id="tok"), wallet_id="w1")["reason_codes"][0] != "GW_DENY_DUPLICATE_SEND"
+    assert gate.evaluate(_request("r6"))["reason_codes"][0] != "GW_DENY_DUPLICATE_SEND"
+    clock.now += 11
+    assert gate.evaluate(_request("r7"), wallet_id="w1")["reason_codes"][0] != "GW_DENY_DUPLICATE_SEND"
+
+
+def test_release_forgets_only_that_request():
+    index = DuplicateSendIndex(clock=FakeClock())
+    assert index.check("w1", "A", 1.5, request_id="r1") is None
+    assert not index.release("w1", "A", 1.5, request_id="other")
+    assert index.release("w1", "A", 1.5, request_id="r1")
+    assert index.check("w1", "A", 1.5, request_id="r2") is None
+    assert index.check("w1", "A", 1.5, request_id="r3").request_id == "r2"
+
+
+def test_retry_after_timeout_is_not_a_duplicate():
+    gate = GuardianWalletV3(duplicates=DuplicateSendIndex(window_seconds=10, clock=FakeClock()))
+    late = gate.evaluate(_request("r1"), wallet_id="w1", deadline=time.monotonic() - 1)
+    assert late["reason_codes"] == ["GW_ERROR_TIMEOUT"]
+    retry = gate.evaluate(_request("r2"), wallet_id="w1")
+    assert retry["reason_codes"][0] != "GW_DENY_DUPLICATE_SEND"
+    assert gate.evaluate(_request("r3"), wallet_id="w1")["reason_codes"] == ["GW_DENY_DUPLICATE_SEND"]
+
+
+def test_retry_after_enrichment_error_is_not_a_duplicate():
+    up = []
+
+    def flaky(query):
+        if not up:
+            raise RuntimeError("down")
+        return {"tx": {"destination_risk_score": 0.1}}
+
+    gate = GuardianWalletV3(
+        duplicates=DuplicateSendIndex(window_seconds=10, clock=FakeClock()),
+        enrichment=EnrichmentStage([EnrichmentProvider("dest_risk", flaky, ttl_seconds=0)]),
+    )
+    assert gate.evaluate(_request("r1"), wallet_id="w1")["reason_codes"] == ["GW_ERROR_ENRICHMENT_UNAVAILABLE"]
+    up.append(True)
+    retry = gate.evaluate(_request("r2"), wallet_id="w1")
+    assert retry["reason_codes"][0] not in ("GW_DENY_DUPLICATE_SEND", "GW_ERROR_ENRICHMENT_UNAVAILABLE")
+    assert gate.evaluate(_request("r3"), wallet_id="w1")["reason_codes"] == ["GW_DENY_DUPLICATE_SEND"]
+
+
+def test_benchmark_and_cli(capsys):
+    result = benchmark(20_000)
+    assert result["duplicates"] == 200
+    assert result["peak_tracked"] <= 12 * 10_000
+    assert main(["--bench", "1000"]) == 0
+    assert json.loads(capsys.readouterr().out)["sends"] == 1000
@@ -0,0 +1,223 @@
+import threading
+import time
+
+import pytest
+
+from dgb_wallet_guardian.deadline import deadline_in
+from dgb_wallet_guardian.enrichment import EnrichmentProvider, EnrichmentStage
+from dgb_wallet_guardian.v3 import GuardianWalletV3
+
+
+class FakeClock:
+    def __init__(self, now=1_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _request(request_id="r1", to_address="DGB_DEST"):
+    return {
+        "contract_version": 3,
+        "component": "guardian_wallet",
+        "request_id": request_id,
+        "wallet_ctx": {"balance": 100.0, "typical_amount": 1.0, "wallet_age_days": 400, "tx_count_24h": 1},
+        "tx_ctx": {"to_address": to_address, "amount": 1.0, "fee": 0.1},
+        "extra_signals": {},
+    }
+
+
+def _const(result, calls=None, delay=0.0):
+    def fetch(query):
+        if calls is not None:
+            calls.append(query.tx_ctx.get("to_address"))
+        if delay:
+            time.sleep(delay)
+        return result
+
+    return fetch
+
+
+def test_providers_run_concurrently():
+    stage = EnrichmentStage(
+        [
+            EnrichmentProvider("a", _const({"tx": {"destination_risk_score": 0.1}}, delay=0.1), timeout_seconds=1),
+            EnrichmentProvider("b", _const({"wallet": {"typical_fee": 0.01}}, delay=0.1), timeout_seconds=1),
+        ]
+    )
+    start = time.perf_counter()
+    result = stage.run("w1", {}, {"to_address": "A"})
+    assert time.perf_counter() - start < 0.19
+    assert result.failed is None and result.versions == {"a": "1", "b": "1"}
+    assert result.merge({"balance": 1.0}, {"to_address": "A"}) == (
+        {"typical_fee": 0.01, "balance": 1.0},
+        {"destination_risk_score": 0.1, "to_address": "A"},
+    )
+    stage.close()
+
+
+def test_merge_is_deterministic():
+    providers = [
+        EnrichmentProvider("zeta", _const({"tx": {"destination_risk_score": 0.9}, "wallet": {"typical_fee": 0.5}})),
+        EnrichmentProvider("alpha", _const({"tx": {"destination_risk_score": 0.2, "fee": 7.0}})),
+    ]
+    for order in (providers, providers[::-1]):
+        result = EnrichmentStage(order).run("w1", {}, {"to_address": "A"})
+        wallet, tx = result.merge({}, {"to_address": "A", "fee": 0.1})
+        assert tx == {"destination_risk_score": 0.2, "fee": 0.1, "to_address": "A"}  # first by name, request wins
+        assert wallet == {"typical_fee": 0.5}
+        assert list(result.versions) == ["alpha", "zeta"]
+
+
+def test_ttl_cache_per_provider():
+    clock = FakeClock()
+    calls = []
+    stage = EnrichmentStage(
+        [
+            EnrichmentProvider("dest", _const({"tx": {"destination_risk_score": 0.3}}, calls), ttl_seconds=30, cache_key=lambda q: q.tx_ctx["to_address"]),
+        ],
+        clock=clock,
+    )
+    stage.run("w1", {}, {"to_address": "A"})
+    stage.run("w2", {}, {"to_address": "A"})
+    stage.run("w1", {}, {"to_address": "B"})
+    assert calls == ["A", "B"]
+    clock.now += 31
+    stage.run("w1", {}, {"to_address": "A"})
+    assert calls == ["A", "B", "A"]
+    assert stage.stats()["dest"] == {"hits": 1, "misses": 3, "errors": 0, "timeouts": 0, "cached": 2}
+
+
+def test_failure_policy_and_late_results():
+    release = threading.Event()
+
+    def slow(query):
+        release.wait(5)
+        return {"tx": {"destination_risk_score": 0.5}}
+
+    def broken(query):
+        raise RuntimeError("down")
+
+    stage = EnrichmentStage(
+        [
+            EnrichmentProvider("slow", slow, timeout_seconds=0.02, required=False),
+            EnrichmentProvider("broken", broken, required=False),
+            EnrichmentProvider("bad", _const({"tx": {"amount": 1e9}}), required=False),
+            EnrichmentProvider("ok", _const({"wallet": {"typical_fee": 0.01}}), version="v7"),
+        ]
+    )
+    result = stage.run("w1", {}, {"to_address": "A"})
+    assert result.failed is None
+    assert result.skipped == ("bad", "broken", "slow")
+    assert result.audit_dict() == {"versions": {"ok": "v7"}, "skipped": ["bad", "broken", "slow"]}
+    assert stage.stats()["slow"]["timeouts"] == 1 and stage.stats()["broken"]["errors"] == 1
+
+    release.set()  # the late result still fills the cache
+    deadline = time.monotonic() + 2
+    while stage.stats()["slow"]["cached"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert stage.run("w1", {}, {"to_address": "A"}).versions == {"ok": "v7", "slow": "1"}
+
+    required = EnrichmentStage([EnrichmentProvider("broken", broken)])
+    assert required.run("w1", {}, {"to_address": "A"}).failed == "broken"
+
+
+@pytest.mark.parametrize(
+    "result",
+    [
+        {"tx": {"destination_risk_score": "0.9"}},
+        {"tx": {"destination_risk_score": True}},
+        {"tx": {"fee": float("inf")}},
+        {"tx": {"created_at": 1.5}},
+        {"wallet": {"recent_send_count": None}},
+        {"wallet": {"known_addresses": ["A", 3]}},
+        {"wallet": {"known_addresses": "A"}},
+    ],
+)
+def test_mistyped_fields_fail_closed(result):
+    gate = GuardianWalletV3(enrichment=EnrichmentStage([EnrichmentProvider("dest_risk", _const(result))]))
+    env = gate.evaluate(_request(), wallet_id="w1")
+    assert env["reason_codes"] == ["GW_ERROR_ENRICHMENT_UNAVAILABLE"]
+
+
+def test_well_typed_fields_are_accepted():
+    result = {"wallet": {"recent_send_count": 3, "known_addresses": ["DGB_DEST"], "typical_fee": 1}, "tx": {"created_at": 1_700_000_000}}
+    gate = GuardianWalletV3(enrichment=EnrichmentStage([EnrichmentProvider("ctx", _const(result))]))
+    env = gate.evaluate(_request(), wallet_id="w1")
+    assert env["meta"]["enrichment"] == {"versions": {"ctx": "1"}}
+    assert "DEST_NEW_ADDRESS" not in env["reason_codes"]
+
+
+def test_validation():
+    fetch = _const({})
+    with pytest.raises(ValueError):
+        EnrichmentProvider("x", fetch, timeout_seconds=0)
+    with pytest.raises(ValueError):
+        EnrichmentStage([EnrichmentProvider("x", fetch), EnrichmentProvider("x", fetch)])
+    with pytest.raises(ValueError):
+        EnrichmentStage([])
+
+
+def test_gate_merges_fields_and_hashes_versions():
+    def risk(version):
+        return EnrichmentProvider("dest_risk", _const({"tx": {"destination_risk_score": 0.95}}), version=version)
+
+    gate = GuardianWalletV3(enrichment=EnrichmentStage([risk("2024-06")]))
+    env = gate.evaluate(_request(), wallet_id="w1")
+    assert "DEST_HIGH_RISK" in env["reason_codes"]
+    assert env["meta"]["enrichment"] == {"versions": {"dest_risk": "2024-06"}}
+
+    other = GuardianWalletV3(enrichment=EnrichmentStage([risk("2024-07")])).evaluate(_request(), wallet_id="w1")
+    assert other["context_hash"] != env["context_hash"]
+    assert env == gate.evaluate(_request(), wallet_id="w1")
+
+    # Without wallet_id providers are not consulted.
+    assert gate.evaluate(_request()) == GuardianWalletV3().evaluate(_request())
+
+
+def test_gate_fails_closed_on_required_provider():
+    def broken(query):
+        raise RuntimeError("down")
+
+    gate = GuardianWalletV3(enrichment=EnrichmentStage([EnrichmentProvider("dest_risk", broken)]))
+    env = gate.evaluate(_request(), wallet_id="w1")
+    assert env["reason_codes"] == ["GW_ERROR_ENRICHMENT_UNAVAILABLE"]
+    assert env["outcome"] == "deny"
+
+    optional = GuardianWalletV3(enrichment=EnrichmentStage([EnrichmentProvider("dest_risk", broken, required=False)]))
+    env = optional.evaluate(_request(), wallet_id="w1")
+    assert env["meta"]["enrichment"] == {"versions": {}, "skipped": ["dest_risk"]}
+
+
+def test_gate_caps_provider_wait_by_deadline():
+    slow = EnrichmentProvider("slow", _const({}, delay=0.5), timeout_seconds=5, required=False)
+    gate = GuardianWalletV3(enrichment=EnrichmentStage([slow]))
+    start = time.perf_counter()
+    env = gate.evaluate(_request(), wallet_id="w1", deadline=deadline_in(0.05))
+    assert time.perf_counter() - start < 0.4
+    assert env["reason_codes"][0] != "GW_ERROR_TIMEOUT"
+    assert env["meta"]["enrichment"]["skipped"] == ["slow"]
+
+
+@pytest.mark.parametrize(
+    "result",
+    [
+        {"wallet": {"typical_fee": 0.5}},
+        {"wallet": {"daily_sent_amount": 12.0}},
+        {"wallet": {"typical_amount": -1}},
+        {"tx": {"fee": 10**20}},
+    ],
+)
+def test_satoshi_gate_rejects_provider_amounts_that_are_not_sats(result):
+    request = dict(
+        _request(),
+        wallet_ctx={"balance": 10_000_000_000, "wallet_age_days": 400, "tx_count_24h": 1},
+        tx_ctx={"to_address": "DGB_DEST", "amount": 100_000_000},
+    )
+    gate = GuardianWalletV3(AMOUNT_UNITS="sat", enrichment=EnrichmentStage([EnrichmentProvider("ledger", _const(result))]))
+    env = gate.evaluate(request, wallet_id="w1")
+    assert env["reason_codes"] == ["GW_ERROR_ENRICHMENT_UNAVAILABLE"]
+
+    fixed = {section: {key: 1_000 for key in values} for section, values in result.items()}
+    ok = GuardianWalletV3(AMOUNT_UNITS="sat", enrichment=EnrichmentStage([EnrichmentProvider("ledger", _const(fixed))]))
+    assert ok.evaluate(request, wallet_id="w1")["reason_codes"] != ["GW_ERROR_ENRICHMENT_UNAVAILABLE"]
@@ -0,0 +1,196 @@
+import json
+
+import pytest
+
+from dgb_wallet_guardian.fanin import FanInDetector, benchmark, main
+from dgb_wallet_guardian.policies import PolicyStore
+from dgb_wallet_guardian.v3 import GuardianWalletV3
+
+
+class FakeClock:
+    def __init__(self, now=6_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _request(request_id="r1", to_address="DGB_DEST"):
+    return {
+        "contract_version": 3,
+        "component": "guardian_wallet",
+        "request_id": request_id,
+        "wallet_ctx": {"balance": 100.0, "typical_amount": 1.0, "wallet_age_days": 400, "tx_count_24h": 1},
+        "tx_ctx": {"to_address": to_address, "amount": 1.0, "fee": 0.1},
+        "extra_signals": {},
+    }
+
+
+def test_spike_counts_distinct_wallets_once():
+    d = FanInDetector(min_wallets=5, clock=FakeClock())
+    for _ in range(10):
+        check = d.observe("w1", "DRAIN")
+    assert (check.wallets, check.baseline, check.spike) == (1, 0, False)
+
+    checks = [d.observe(f"w{i}", "DRAIN") for i in range(2, 6)]
+    assert [c.wallets for c in checks] == [2, 3, 4, 5]
+    assert checks[-1].spike and not checks[-2].spike
+    assert d.estimate("DRAIN") == 5 and d.estimate("elsewhere") == 0
+    assert checks[-1].audit_dict() == {"wallets": 5, "baseline": 0, "spike": True}
+
+
+def test_window_slides_into_baseline():
+    clock = FakeClock()
+    d = FanInDetector(window_seconds=60, sub_windows=6, min_wallets=4, growth=2.0, clock=clock)
+    for i in range(4):
+        d.observe(f"w{i}", "POPULAR")
+
+    clock.now += 60  # last window becomes the baseline
+    assert d.estimate("POPULAR") == 0
+    checks = [d.observe(f"v{i}", "POPULAR") for i in range(7)]
+    assert checks[-1].baseline == 4
+    assert not checks[3].spike  # 4 wallets, baseline 4: steady traffic
+    assert checks[-1].wallets == 7 and not checks[-1].spike  # 7 < 2 x 4
+
+    d.observe("v7", "POPULAR")
+    assert d.observe("v7", "POPULAR").spike  # 8 >= 2 x 4
+
+    clock.now += 10_000  # idle gap clears everything
+    check = d.observe("v0", "POPULAR")
+    assert (check.wallets, check.baseline) == (1, 0)
+
+
+def test_partial_slide_keeps_recent_slices():
+    clock = FakeClock()
+    d = FanInDetector(window_seconds=60, sub_windows=6, clock=clock)
+    d.observe("w1", "A")
+    clock.now += 30
+    d.observe("w2", "A")
+    d.observe("w1", "A")  # already seen in this window
+    assert d.estimate("A") == 2
+    clock.now += 30  # first slice left the window; w1 is kept by its later send
+    assert d.estimate("A") == 2
+    assert d.observe("w1", "A").wallets == 2
+    clock.now += 30  # now only this slice's w1 remains
+    assert d.estimate("A") == 1
+
+
+def _background(d, clock, seconds, rate, salt=""):
+    # Distinct wallets paying distinct merchants: rate x seconds live pairs.
+    for i in range(int(seconds * rate)):
+        clock.now += 1.0 / rate
+        d.observe(f"bg{salt}{i}", f"shop{salt}{i % 997}")
+
+
+def test_background_load_never_hides_a_drain():
+    clock = FakeClock()
+    d = FanInDetector(window_seconds=60, pair_slots=1 << 10, min_wallets=20, clock=clock)
+    _background(d, clock, 55, 100)  # ~5x more live pairs than the pair table holds
+    for i in range(30):
+        check = d.observe(f"victim{i}", "DRAIN")
+    assert check.wallets >= 30 and check.spike
+    assert d.estimate("DRAIN") >= 30
+
+
+def test_repeats_are_not_recounted_within_capacity():
+    clock = FakeClock()
+    d = FanInDetector(window_seconds=60, pair_slots=1 << 14, clock=clock)
+    for i in range(10):
+        d.observe(f"w{i}", "EXCHANGE")
+    _background(d, clock, 30, 100)
+    for i in range(10):
+        check = d.observe(f"w{i}", "EXCHANGE")
+    assert check.wallets == 10
+
+
+def test_forget_undoes_one_observation():
+    clock = FakeClock()
+    d = FanInDetector(window_seconds=60, sub_windows=6, clock=clock)
+    d.observe("w1", "A")
+    check = d.observe("w2", "A")
+    assert d.forget("A", check) and d.estimate("A") == 1
+    assert not d.forget("A", check)  # already undone
+    assert d.observe("w2", "A").wallets == 2  # a retry is counted afresh
+
+    clock.now += 30
+    moved = d.observe("w1", "A")  # repeat: w1's count moves to this slice
+    assert d.forget("A", moved)
+    clock.now += 30  # so undoing it puts w1 back in the slice that has now expired
+    assert d.estimate("A") == 0
+
+    superseded = d.observe("w3", "B")
+    clock.now += 10
+    d.observe("w3", "B")
+    assert not d.forget("B", superseded) and d.estimate("B") == 1
+    assert not d.forget("B", d.observe("w3", "B"))  # a repeat in the same slice changed nothing
+
+
+def test_top_k_tracks_heaviest_destinations():
+    d = FanInDetector(top_k=3, clock=FakeClock())
+    for dest, n in (("A", 5), ("B", 2), ("C", 8), ("D", 1), ("E", 6)):
+        for i in range(n):
+            d.observe(f"w{i}", dest)
+    assert d.top() == [("C", 8), ("E", 6), ("A", 5)]
+    assert d.top(1) == [("C", 8)]
+
+
+def test_memory_is_fixed():
+    d = FanInDetector(clock=FakeClock())
+    size = d.memory_bytes()
+    for i in range(20_000):
+        d.observe(f"w{i}", f"dest{i}")
+    assert d.memory_bytes() == size
+    assert len(d.top(100)) <= d.top_k
+
+
+def test_validation():
+    with pytest.raises(ValueError):
+        FanInDetector(width=1000)
+    with pytest.raises(ValueError):
+        FanInDetector(window_seconds=0)
+    with pytest.raises(ValueError):
+        FanInDetector(growth=0.5)
+    with pytest.raises(ValueError):
+        FanInDetector(pair_slots=1 << 10, pair_ways=3)
+
+
+def test_gate_feeds_fanin_rule_and_policy():
+    fanin = FanInDetector(min_wallets=3, growth=2.0, clock=FakeClock())
+    gw = GuardianWalletV3(fanin=fanin, policies=PolicyStore())
+    outs = [gw.evaluate(_request(f"r{i}", "DRAIN"), wallet_id=f"w{i}") for i in range(3)]
+    assert outs[0]["meta"]["fanin"] == {"wallets": 1, "baseline": 0, "spike": False}
+    assert "DEST_FANIN_SPIKE" not in outs[1]["reason_codes"]
+    assert "DEST_FANIN_SPIKE" in outs[2]["reason_codes"]
+    assert "destination_risk" in outs[2]["meta"]["policy"]["reason"]
+
+    # Re-observing the same wallet / destination does not inflate the count.
+    again = gw.evaluate(_request("r9", "DRAIN"), wallet_id="w2")
+    assert again["meta"]["fanin"]["wallets"] == 3
+
+    # Without wallet_id the detector is not consulted.
+    plain = gw.evaluate(_request("r1", "DRAIN"))
+    assert plain == GuardianWalletV3(policies=PolicyStore()).evaluate(_request("r1", "DRAIN"))
+
+
+def test_rescoring_reuses_first_fanin_check():
+    fanin = FanInDetector(min_wallets=3, growth=2.0, clock=FakeClock())
+    gw = GuardianWalletV3(fanin=fanin)
+    gw.evaluate(_request("r0", "DRAIN"), wallet_id="w0")
+    first, handle = gw.evaluate_with_handle(_request("r1", "DRAIN"), wallet_id="w1")
+    assert first["meta"]["fanin"] == {"wallets": 2, "baseline": 0, "spike": False}
+
+    # Other wallets pile in afterwards; re-scoring this send keeps its own verdict.
+    gw.evaluate(_request("r2", "DRAIN"), wallet_id="w2")
+    again = gw.reevaluate_signals(handle, {})
+    assert again == first
+    assert "DEST_FANIN_SPIKE" not in gw.reevaluate_signals(handle, {"sentinel_status": "HIGH"})["reason_codes"]
+    assert fanin.estimate("DRAIN") == 3
+
+
+def test_benchmark_and_cli(capsys):
+    result = benchmark(50_000)
+    assert result["updates"] == 50_000
+    # Target is a few microseconds per update on a quiet machine; keep CI headroom.
+    assert result["us_per_update"] < 60
+    assert main(["--bench", "1000"]) == 0
+    assert json.loads(capsys.readouterr().out)["updates"] == 1000
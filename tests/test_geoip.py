@@ -0,0 +1,171 @@
+import ipaddress
+import random
+import time
+
+import pytest
+
+from dgb_wallet_guardian.geoip import GeoIPIndex, TravelTracker, main
+from dgb_wallet_guardian.v3 import GuardianWalletV3
+
+CSV = """start,end,country,region
+# comment
+1.0.0.0,1.0.0.255,AU,NSW
+8.8.8.0,8.8.8.255,us,ca
+8.8.9.0,8.8.9.255,US,NY
+81.2.69.0,81.2.69.255,GB
+2001:db8::,2001:db8::ffff,DE,BE
+2a00::,2a00:ffff:ffff:ffff:ffff:ffff:ffff:ffff,FR
+"""
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    p = tmp_path / "ranges.csv"
+    p.write_text(CSV, encoding="utf-8")
+    return str(p)
+
+
+def _check_lookups(index):
+    assert index.lookup("1.0.0.17") == "AU-NSW"
+    assert index.lookup("8.8.8.8") == "US-CA"
+    assert index.lookup("8.8.9.0") == "US-NY"
+    assert index.lookup("81.2.69.255") == "GB"
+    assert index.lookup("::ffff:81.2.69.1") == "GB"
+    assert index.lookup("2001:db8::42") == "DE-BE"
+    assert index.lookup("2a00:1450::1") == "FR"
+    for miss in ["0.255.255.255", "8.8.10.0", "255.255.255.255", "2001:db9::", "::1", "nope", "1.2.3", None, 42, "1.2.3.4\x00", "8.8.8.8\ud800", "::1\x00"]:
+        assert index.lookup(miss) is None
+
+
+def test_csv_and_mmap_roundtrip(csv_path, tmp_path):
+    index = GeoIPIndex.from_csv(csv_path)
+    assert len(index) == 6
+    _check_lookups(index)
+
+    out = str(tmp_path / "ranges.geo")
+    assert main([csv_path, out]) == 0
+    with GeoIPIndex.open(out) as mapped:
+        _check_lookups(mapped)
+
+
+def test_rejects_overlaps_and_corrupt_files(tmp_path):
+    with pytest.raises(ValueError):
+        GeoIPIndex.from_rows([("1.0.0.0", "1.0.0.10", "AU"), ("1.0.0.5", "1.0.0.20", "NZ")])
+    with pytest.raises(ValueError):
+        GeoIPIndex.from_rows([("1.0.0.9", "1.0.0.1", "AU")])
+    bad = tmp_path / "bad.geo"
+    bad.write_bytes(b"not an index at all, definitely not" * 4)
+    with pytest.raises(ValueError):
+        GeoIPIndex.open(str(bad))
+
+
+def test_travel_tracker_window_and_level():
+    index = GeoIPIndex.from_rows(
+        [("8.8.8.0", "8.8.8.255", "US-CA"), ("8.8.9.0", "8.8.9.255", "US-NY"), ("81.2.69.0", "81.2.69.255", "GB")]
+    )
+    now = [1000.0]
+    tracker = TravelTracker(index, window_seconds=600, clock=lambda: now[0])
+
+    assert tracker.observe("w1", "10.0.0.1") is None  # unmapped: not checked, not recorded
+    assert tracker.observe("w1", "8.8.8.8").impossible is False
+    now[0] += 60
+    assert tracker.observe("w1", "8.8.9.9").impossible is False  # same country
+    now[0] += 60
+    check = tracker.observe("w1", "81.2.69.1")
+    assert check.impossible is True and check.previous == "US-NY"
+    now[0] += 601
+    assert tracker.observe("w1", "8.8.8.8").impossible is False  # window elapsed
+
+    regional = TravelTracker(index, window_seconds=600, level="region", clock=lambda: now[0])
+    regional.observe("w2", "8.8.8.8")
+    assert regional.observe("w2", "8.8.9.9").impossible is True
+
+
+def test_travel_tracker_forget_restores_previous_send():
+    index = GeoIPIndex.from_rows([("8.8.8.0", "8.8.8.255", "US"), ("81.2.69.0", "81.2.69.255", "GB")])
+    now = [0.0]
+    tracker = TravelTracker(index, clock=lambda: now[0])
+    tracker.observe("w1", "8.8.8.8")
+    now[0] = 60.0
+    check = tracker.observe("w1", "81.2.69.1")
+    assert tracker.forget("w1", check) and not tracker.forget("w1", check)
+    assert tracker.observe("w1", "81.2.69.1").impossible  # still compared with the US send
+
+    first = TravelTracker(index)
+    assert first.forget("w2", first.observe("w2", "8.8.8.8")) and len(first) == 0
+
+
+def test_gate_feeds_impossible_travel_rule():
+    index = GeoIPIndex.from_rows([("8.8.8.0", "8.8.8.255", "US"), ("81.2.69.0", "81.2.69.255", "GB")])
+    gw = GuardianWalletV3(travel=TravelTracker(index))
+
+    def request(ip):
+        return {
+            "contract_version": 3,
+            "component": "guardian_wallet",
+            "request_id": "geo-1",
+            "wallet_ctx": {"balance": 100, "typical_amount": 10},
+            "tx_ctx": {"to_address": "A", "amount": 5},
+            "extra_signals": {"geo_ip": ip},
+        }
+
+    first = gw.evaluate(request("8.8.8.8"), wallet_id="w1")
+    assert first["meta"]["geo"] == {"location": "US", "previous": None, "impossible": False}
+    out = gw.evaluate(request("81.2.69.1"), wallet_id="w1")
+    assert "GEO_IMPOSSIBLE_TRAVEL" in out["reason_codes"]
+    assert gw.evaluate(request("81.2.69.1")) == GuardianWalletV3().evaluate(request("81.2.69.1"))
+
+    # Malformed addresses from the request are simply not located.
+    for ip in ["8.8.8.8\x00", "81.2.69.1\ud800"]:
+        assert "geo" not in gw.evaluate(request(ip), wallet_id="w2")["meta"]
+
+
+def test_rescoring_impossible_travel_keeps_first_observation():
+    index = GeoIPIndex.from_rows([("8.8.8.0", "8.8.8.255", "US"), ("81.2.69.0", "81.2.69.255", "GB"), ("1.0.0.0", "1.0.0.255", "AU")])
+    tracker = TravelTracker(index)
+    gw = GuardianWalletV3(travel=tracker)
+
+    def request(ip):
+        return {
+            "contract_version": 3,
+            "component": "guardian_wallet",
+            "request_id": "geo-2",
+            "wallet_ctx": {"balance": 100, "typical_amount": 10},
+            "tx_ctx": {"to_address": "A", "amount": 5},
+            "extra_signals": {"geo_ip": ip},
+        }
+
+    gw.evaluate(request("8.8.8.8"), wallet_id="w1")
+    first, handle = gw.evaluate_with_handle(request("81.2.69.1"), wallet_id="w1")
+    assert first["meta"]["geo"] == {"location": "GB", "previous": "US", "impossible": True}
+
+    again = gw.reevaluate_signals(handle, {"geo_ip": "81.2.69.1"})
+    assert again == first
+    assert gw.reevaluate_signals(handle, {"geo_ip": "81.2.69.1", "sentinel_status": "HIGH"})["meta"]["geo"] == first["meta"]["geo"]
+
+    # A changed geo_ip is compared with the location before the first pass, and replaces its record.
+    moved = gw.reevaluate_signals(handle, {"geo_ip": "1.0.0.1"})
+    assert moved["meta"]["geo"] == {"location": "AU", "previous": "US", "impossible": True}
+    assert gw.reevaluate_signals(handle, {"geo_ip": "8.8.8.9"})["meta"]["geo"] == {"location": "US", "previous": "US", "impossible": False}
+    assert tracker.observe("w1", "8.8.8.10").previous == "US"
+
+
+def test_lookup_throughput(tmp_path):
+    rng = random.Random(7)
+    bounds = sorted(rng.sample(range(1, 2**32 - 1), 200_000))
+    rows = [
+        (str(ipaddress.IPv4Address(lo)), str(ipaddress.IPv4Address(hi - 1)), f"C{i % 250}")
+        for i, (lo, hi) in enumerate(zip(bounds[::2], bounds[1::2]))
+    ]
+    path = str(tmp_path / "big.geo")
+    GeoIPIndex.from_rows(rows).save(path)
+    ips = [str(ipaddress.IPv4Address(rng.getrandbits(32))) for _ in range(200_000)]
+
+    with GeoIPIndex.open(path) as index:
+        lookup = index.lookup
+        start = time.perf_counter()
+        for ip in ips:
+            lookup(ip)
+        rate = len(ips) / (time.perf_counter() - start)
+    # Target is 1M+/s on a quiet machine; keep CI headroom.
+    assert rate > 250_000
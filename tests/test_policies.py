@@ -1,4 +1,13 @@
-from dgb_wallet_guardian.policies import GuardianPolicy
+import json
+import time
+
+import pytest
+
+from dgb_wallet_guardian.decisions import GuardianDecisionType
+from dgb_wallet_guardian.enrichment import EnrichmentProvider, EnrichmentStage
+from dgb_wallet_guardian.models import RiskLevel
+from dgb_wallet_guardian.policies import GuardianPolicy, PolicyStore, compile_policy, rule_ids
+from dgb_wallet_guardian.v3 import GuardianWalletV3
 
 
 def test_policy_defaults():
@@ -7,3 +16,103 @@ def test_policy_defaults():
     assert p.max_tx_ratio == 0.5
     assert p.max_daily_amount == 50_000.0
     assert p.threshold_extra_auth == 10_000.0
+
+
+def test_compiled_table_maps_level_and_triggers():
+    p = compile_policy()
+    assert p.resolve(RiskLevel.NORMAL, (), amount=5, balance=100).decision is GuardianDecisionType.ALLOW
+    assert p.resolve(RiskLevel.ELEVATED, (), amount=5, balance=100).decision is GuardianDecisionType.WARN
+    assert p.resolve(RiskLevel.CRITICAL, (), amount=5, balance=100).decision is GuardianDecisionType.BLOCK
+
+    large = p.resolve(RiskLevel.NORMAL, (), amount=60, balance=100)  # > max_tx_ratio
+    assert (large.decision, large.require_second_factor, large.reason) == (
+        GuardianDecisionType.REQUIRE_EXTRA_AUTH, True, "NORMAL: large_tx")
+
+    wipe = p.resolve(RiskLevel.NORMAL, {"BALANCE_FULL_WIPE"}, amount=95, balance=100)
+    assert wipe.decision is GuardianDecisionType.BLOCK and not wipe.require_second_factor
+
+    daily = p.resolve(RiskLevel.NORMAL, (), amount=5, balance=10**9, daily_sent=49_999)
+    assert (daily.decision, daily.cooldown_seconds) == (GuardianDecisionType.DELAY, 3600)
+    assert p.resolve(RiskLevel.CRITICAL, (), amount=5, balance=10**9, daily_sent=49_999).cooldown_seconds == 0
+
+    lenient = compile_policy(overrides={"block_full_balance_tx": False})
+    assert lenient.resolve(RiskLevel.NORMAL, {"BALANCE_FULL_WIPE"}, 95, 100).decision is GuardianDecisionType.REQUIRE_EXTRA_AUTH
+    assert lenient.digest != p.digest
+    assert rule_ids(["DEVICE_MISMATCH: x", "junk"]) == {"DEVICE_MISMATCH"}
+
+
+def test_store_interns_overrides_and_resolves_in_constant_time():
+    store = PolicyStore(default={"max_daily_amount": 1000})
+    for i in range(200_000):
+        store.set_override(f"w{i}", {"max_daily_amount": 10.0 * (i % 3)})
+    assert len(store) == 200_000 and store.distinct_policies() == 3
+    assert store.get("w1") is store.get("w4")
+    assert store.get("unknown") is store.default
+    assert store.resolve(RiskLevel.NORMAL, (), 5, 100, wallet_id="w0").decision is GuardianDecisionType.DELAY
+    assert store.resolve(RiskLevel.NORMAL, (), 5, 100).decision is GuardianDecisionType.ALLOW
+    assert store.remove_override("w0") and not store.remove_override("w0")
+
+    start = time.perf_counter()
+    for i in range(100_000):
+        store.resolve(RiskLevel.ELEVATED, ("DEST_NEW_ADDRESS",), 5.0, 100.0, wallet_id=f"w{i}")
+    assert time.perf_counter() - start < 2.0
+
+
+def test_validation_and_file(tmp_path):
+    for bad in [{"nope": 1}, {"max_tx_ratio": -1}, {"max_tx_ratio": float("nan")}, {"block_full_balance_tx": 1}, {"delay_seconds": True}]:
+        with pytest.raises(ValueError):
+            compile_policy(overrides=bad)
+    with pytest.raises(ValueError):
+        PolicyStore().set_override("", {})
+
+    path = tmp_path / "policies.json"
+    path.write_text(json.dumps({"default": {"threshold_extra_auth": 50}, "wallets": {"vip": {"threshold_extra_auth": 1e6}}}))
+    store = PolicyStore.from_file(str(path))
+    assert store.resolve(RiskLevel.NORMAL, (), 40, 1000, wallet_id="vip").decision is GuardianDecisionType.ALLOW
+    assert store.resolve(RiskLevel.NORMAL, (), 60, 1000).decision is GuardianDecisionType.REQUIRE_EXTRA_AUTH
+    path.write_text(json.dumps({"tenants": {}}))
+    with pytest.raises(ValueError):
+        PolicyStore.from_file(str(path))
+
+
+def test_gate_records_policy_result():
+    request = {
+        "contract_version": 3,
+        "component": "guardian_wallet",
+        "request_id": "pol-1",
+        "wallet_ctx": {"balance": 100, "typical_amount": 50},
+        "tx_ctx": {"to_address": "A", "amount": 60},
+    }
+    plain = GuardianWalletV3().evaluate(request)
+    gw = GuardianWalletV3(policies=PolicyStore(wallets={"trusted": {"max_tx_ratio": 1.0}}))
+    env = gw.evaluate(request)
+    assert env["outcome"] == plain["outcome"]  # the v3 outcome stays authoritative
+    assert env["meta"]["policy"]["decision"] == "require_extra_auth"
+    assert env["context_hash"] != plain["context_hash"]
+    assert gw.evaluate(request, wallet_id="trusted")["meta"]["policy"]["decision"] == "warn"
+
+    sat = GuardianWalletV3(AMOUNT_UNITS="sat", policies=PolicyStore(default={"threshold_extra_auth": 50}))
+    sat_req = dict(request, wallet_ctx={"balance": 10_000_000_000}, tx_ctx={"to_address": "A", "amount": 4_000_000_000})
+    assert sat.evaluate(sat_req)["meta"]["policy"]["reason"] == "ELEVATED"
+
+
+@pytest.mark.parametrize("units, scale", [("dgb", 1), ("sat", 10**8)])
+def test_gate_delays_on_accumulated_daily_total(units, scale):
+    def daily(query):
+        return {"wallet": {"daily_sent_amount": 990 * scale}}
+
+    request = {
+        "contract_version": 3,
+        "component": "guardian_wallet",
+        "request_id": "pol-2",
+        "wallet_ctx": {"balance": 100_000 * scale, "typical_amount": 20 * scale},
+        "tx_ctx": {"to_address": "A", "amount": 20 * scale},
+    }
+    gw = GuardianWalletV3(
+        AMOUNT_UNITS=units,
+        policies=PolicyStore(default={"max_daily_amount": 1000}),
+        enrichment=EnrichmentStage([EnrichmentProvider("ledger", daily)]),
+    )
+    policy = gw.evaluate(request, wallet_id="w1")["meta"]["policy"]
+    assert policy["decision"] == "delay" and policy["cooldown_seconds"] == 3600  # 990 + 20 > 1000
+    assert gw.evaluate(request)["meta"]["policy"]["decision"] != "delay"  # no provider total without wallet_id
@@ -0,0 +1,72 @@
+import json
+import time
+
+import pytest
+
+from dgb_wallet_guardian.client import WalletGuardian
+from dgb_wallet_guardian.profiler import GROUPS, RuleProfiler
+
+
+def _send(guardian, amount, status="NORMAL"):
+    return guardian.evaluate_transaction(
+        wallet_ctx={"balance": 100.0, "typical_amount": 10.0},
+        tx_ctx={"to_address": "A", "amount": amount},
+        extra_signals={"sentinel_status": status},
+    )
+
+
+def test_profiled_and_plain_decisions_are_identical():
+    plain = WalletGuardian()
+    profiled = WalletGuardian(profiler=RuleProfiler(sample_every=1))
+    for amount, status in [(5, "NORMAL"), (60, "HIGH"), (95, "CRITICAL"), (95, "NORMAL")]:
+        assert _send(profiled, amount, status) == _send(plain, amount, status)
+
+
+def test_report_counts_hits_per_rule_and_cost_per_group(tmp_path):
+    ticks = iter(range(0, 10**9, 1000))  # every clock read advances 1us
+    profiler = RuleProfiler(sample_every=1, clock=lambda: next(ticks))
+    guardian = WalletGuardian(profiler=profiler)
+    for _ in range(3):
+        _send(guardian, 95, "CRITICAL")
+    _send(guardian, 5)
+
+    report = profiler.report()
+    assert set(report["groups"]) == set(GROUPS)
+    balance = report["groups"]["balance"]
+    assert balance["samples"] == 4 and balance["mean_us"] == 1.0
+    assert balance["rules"][0] == {"rule_id": "BALANCE_FULL_WIPE", "hits": 3, "hit_rate": 0.75}
+    assert report["groups"]["destination"]["rules"] == [{"rule_id": "DEST_NEW_ADDRESS", "hits": 4, "hit_rate": 1.0}]
+    assert report["groups"]["external_signals"]["rules"][0]["rule_id"] == "SENTINEL_ALERT"
+    assert sum(g["time_share"] for g in report["groups"].values()) == pytest.approx(1.0)
+    # wipe + unusual size + new address = 5.0 >= threshold_critical before any signal
+    assert report["decided_by_context"] == 0.75
+
+    path = tmp_path / "profile.json"
+    profiler.dump_json(str(path))
+    assert json.loads(path.read_text()) == json.loads(json.dumps(report))
+
+    profiler.reset()
+    assert profiler.report()["groups"]["balance"]["samples"] == 0
+
+
+def test_sampling_every_nth_call():
+    profiler = RuleProfiler(sample_every=10)
+    guardian = WalletGuardian(profiler=profiler)
+    for _ in range(95):
+        _send(guardian, 5)
+    assert profiler.report()["groups"]["balance"]["samples"] == 10
+    assert profiler.report()["groups"]["external_signals"]["samples"] == 10
+    with pytest.raises(ValueError):
+        RuleProfiler(sample_every=0)
+
+
+def test_sampled_overhead_is_small():
+    def run(guardian, n=3000):
+        start = time.perf_counter()
+        for _ in range(n):
+            _send(guardian, 5)
+        return time.perf_counter() - start
+
+    plain, profiled = WalletGuardian(), WalletGuardian(profiler=RuleProfiler(sample_every=100))
+    run(plain, 300), run(profiled, 300)
+    assert min(run(profiled) for _ in range(3)) < 1.5 * min(run(plain) for _ in range(3))
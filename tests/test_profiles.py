@@ -0,0 +1,123 @@
+import json
+import threading
+
+import pytest
+
+from dgb_wallet_guardian.config import GuardianConfig
+from dgb_wallet_guardian.profiles import ProfileRegistry, compile_profile
+from dgb_wallet_guardian.v3 import GuardianWalletV3
+
+
+def _request(amount=85.0):
+    return {
+        "contract_version": 3,
+        "component": "guardian_wallet",
+        "request_id": "t1",
+        "wallet_ctx": {"balance": 100.0},
+        "tx_ctx": {"to_address": "A", "amount": amount},
+    }
+
+
+def test_compile_profile_validates_and_copies_config():
+    cfg = GuardianConfig(full_wipe_ratio=0.5)
+    prof = compile_profile(" retail ", cfg)
+    cfg.full_wipe_ratio = 0.99  # caller mutation must not leak into the profile
+    assert prof.tenant == "retail"
+    assert prof.config.full_wipe_ratio == 0.5
+    assert prof.guardian.config is prof.config
+    assert compile_profile("x", {"full_wipe_ratio": 0.5}).digest == prof.digest
+
+    typed = compile_profile("t", {"max_sends_per_window": 7.0})
+    assert typed.config.max_sends_per_window == 7
+    assert isinstance(typed.config.max_sends_per_window, int)
+    with pytest.raises(AttributeError):
+        typed.config.max_sends_per_window = 8  # shared by every request of the tenant
+
+    for bad in [
+        {"nope": 1},
+        {"full_wipe_ratio": "0.5"},
+        {"full_wipe_ratio": True},
+        {"full_wipe_ratio": float("nan")},
+        {"max_sends_per_window": 1.9},
+        {"send_window_seconds": float("inf")},
+        GuardianConfig(max_sends_per_window=2.5),  # type: ignore[arg-type]
+        {"threshold_high": 5.0},  # high > critical
+        [("full_wipe_ratio", 0.5)],
+    ]:
+        with pytest.raises(ValueError):
+            compile_profile("t", bad)
+    with pytest.raises(ValueError):
+        compile_profile("  ", {})
+
+
+def test_gate_selects_tenant_profile_and_records_it():
+    registry = ProfileRegistry({"strict": {"full_wipe_ratio": 0.8}, "loose": {}})
+    gw = GuardianWalletV3(profiles=registry)
+
+    strict = gw.evaluate(_request(), tenant="strict")
+    loose = gw.evaluate(_request(), tenant="loose")
+    assert "BALANCE_FULL_WIPE" in strict["reason_codes"]
+    assert "BALANCE_FULL_WIPE" not in loose["reason_codes"]
+    assert strict["meta"]["profile"] == {"tenant": "strict", "digest": registry.get("strict").digest}
+    assert strict["context_hash"] != gw.evaluate(_request())["context_hash"]
+
+    # No tenant -> legacy path, envelope unchanged
+    assert gw.evaluate(_request()) == GuardianWalletV3().evaluate(_request())
+
+    missing = gw.evaluate(_request(), tenant="ghost")
+    assert missing["outcome"] == "deny"
+    assert missing["request_id"] == "t1"
+    assert missing["reason_codes"] == ["GW_ERROR_UNKNOWN_TENANT"]
+    assert GuardianWalletV3().evaluate(_request(), tenant="strict")["reason_codes"] == ["GW_ERROR_UNKNOWN_TENANT"]
+
+    raw = json.dumps(_request()).encode()
+    assert json.loads(gw.evaluate_bytes(raw, tenant="strict")) == strict
+
+
+def test_file_reload_swaps_atomically_and_keeps_old_table_on_error(tmp_path):
+    path = tmp_path / "profiles.json"
+    path.write_text(json.dumps({"tenants": {"a": {"full_wipe_ratio": 0.95}}}))
+    registry = ProfileRegistry.from_file(str(path))
+    assert registry.version == 1
+    old = registry.get("a")
+
+    path.write_text(json.dumps({"tenants": {"a": {"full_wipe_ratio": 0.8}, "b": {}}}))
+    assert registry.reload() == 2
+    assert registry.tenants() == ("a", "b")
+    assert registry.get("a").config.full_wipe_ratio == 0.8
+    assert old.config.full_wipe_ratio == 0.95  # in-flight holders keep their profile
+
+    path.write_text(json.dumps({"tenants": {"a": {"bogus": 1}}}))
+    with pytest.raises(ValueError):
+        registry.reload()
+    assert registry.version == 2
+    assert registry.get("b") is not None
+
+    path.write_text(json.dumps({"a": {}}))
+    with pytest.raises(ValueError):
+        registry.reload()
+    with pytest.raises(ValueError):
+        ProfileRegistry().reload()
+
+
+def test_readers_never_block_during_swaps():
+    registry = ProfileRegistry({"a": {"full_wipe_ratio": 0.8}})
+    gw = GuardianWalletV3(profiles=registry)
+    errors = []
+    stop = threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            out = gw.evaluate(_request(), tenant="a")
+            if out["outcome"] == "deny" and out["risk"]["level"] == "unknown":
+                errors.append(out)
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for i in range(50):
+        registry.replace({"a": {"full_wipe_ratio": 0.8 if i % 2 else 0.9}})
+    stop.set()
+    for t in threads:
+        t.join()
+    assert errors == []
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from dgb_wallet_guardian.replay import DEFAULT_BASELINE, main, replay
+
+
+def _line(i, amount):
+    return json.dumps(
+        {
+            "contract_version": 3,
+            "component": "guardian_wallet",
+            "request_id": f"r{i}",
+            "wallet_ctx": {"balance": 100.0},
+            "tx_ctx": {"to_address": "A", "amount": amount},
+        }
+    ).encode() + b"\n"
+
+
+def _corpus():
+    lines = [_line(i, float(50 + i % 50)) for i in range(300)]
+    lines += [b"{broken\n", b"[1]\n", b"\n"]
+    return lines
+
+
+CANDIDATES = {"wipe80": {"full_wipe_ratio": 0.8}, "same": {}}
+
+
+def test_replay_counts_flips_against_default_baseline():
+    report = replay(_corpus(), CANDIDATES, chunk_lines=64, sample_size=5)
+    d = report.to_dict()
+
+    assert d["baseline"] == DEFAULT_BASELINE
+    assert d["lines"] == 302
+    assert d["invalid_lines"] == 2
+
+    same = d["configs"]["same"]
+    assert same["flipped"] == 0 and same["flip_sample"] == []
+    assert sum(same["matrix"][o][o] for o in same["matrix"]) == 300
+
+    wipe = d["configs"]["wipe80"]
+    # amounts 80..89 cross the 0.8 wipe ratio but not 0.9: DEST_NEW_ADDRESS + BALANCE_FULL_WIPE
+    assert wipe["matrix"]["escalate"]["deny"] == 60
+    assert wipe["flipped"] == 60
+    assert len(wipe["flip_sample"]) == 5
+    assert all(rid.startswith("r") for rid in wipe["flip_sample"])
+
+
+def test_parallel_replay_matches_in_process():
+    serial = replay(_corpus(), CANDIDATES, chunk_lines=17, sample_size=7).to_dict()
+    parallel = replay(iter(_corpus()), CANDIDATES, workers=2, chunk_lines=17, sample_size=7).to_dict()
+    assert parallel == serial
+
+
+def test_replay_rejects_bad_arguments():
+    with pytest.raises(ValueError):
+        replay([], CANDIDATES, chunk_lines=0)
+    with pytest.raises(ValueError):
+        replay([], {DEFAULT_BASELINE: {}})
+    with pytest.raises(ValueError):
+        replay([], {"bad": {"nope": 1}})
+
+
+def test_cli_writes_report_with_named_baseline(tmp_path):
+    corpus = tmp_path / "corpus.jsonl"
+    corpus.write_bytes(b"".join(_corpus()))
+    configs = tmp_path / "configs.json"
+    configs.write_text(json.dumps({"tenants": dict(CANDIDATES, base={})}))
+    out = tmp_path / "report.json"
+
+    assert main([str(corpus), "--configs", str(configs), "--baseline", "base", "--out", str(out)]) == 0
+    report = json.loads(out.read_text())
+    assert report["baseline"] == "base"
+    assert set(report["configs"]) == {"wipe80", "same"}
+    assert report["configs"]["wipe80"]["flipped"] == 60
@@ -0,0 +1,119 @@
+import pytest
+
+from dgb_wallet_guardian.contracts.v3_codec import canonical_json_bytes
+from dgb_wallet_guardian.satoshi import (
+    MAX_SATS,
+    at_least,
+    dgb_to_sats,
+    is_sats,
+    ratio_fraction,
+    sats_to_dgb,
+)
+from dgb_wallet_guardian.v3 import GuardianWalletV3
+
+
+def _request(wallet_ctx, tx_ctx):
+    return {
+        "contract_version": 3,
+        "component": "guardian_wallet",
+        "request_id": "sat-1",
+        "wallet_ctx": wallet_ctx,
+        "tx_ctx": tx_ctx,
+    }
+
+
+def test_conversions_are_exact():
+    assert dgb_to_sats(0.1) == 10_000_000
+    assert dgb_to_sats(1) == 100_000_000
+    assert dgb_to_sats("21000000000") == MAX_SATS
+    assert sats_to_dgb(12_345_678_900) == 123.456789
+    for bad in [0.000000001, -1, float("nan"), float("inf"), True, "abc", 21_000_000_001]:
+        with pytest.raises(ValueError):
+            dgb_to_sats(bad)
+
+    assert is_sats(0) and is_sats(MAX_SATS)
+    assert not is_sats(MAX_SATS + 1) and not is_sats(-1) and not is_sats(1.0) and not is_sats(True)
+    assert ratio_fraction(0.9) == (9, 10)
+
+
+def test_ratio_compare_has_no_float_edge():
+    # Exactly 90% of the balance: the float product rounds up and misses it.
+    balance, amount = 1_037_455_824_602_328_900, 933_710_242_142_096_010
+    assert amount * 10 == balance * 9
+    assert not amount >= balance * 0.9
+    assert at_least(amount, balance, 0.9)
+    assert not at_least(amount - 1, balance, 0.9)
+
+
+def test_gate_in_satoshi_mode():
+    gw = GuardianWalletV3(AMOUNT_UNITS="sat")
+    wipe = _request({"balance": 10_000_000_000, "typical_amount": 100_000_000}, {"to_address": "A", "amount": 9_000_000_000})
+    env = gw.evaluate(wipe)
+    assert env["outcome"] == "deny"
+    assert "BALANCE_FULL_WIPE" in env["reason_codes"]
+    assert env["meta"]["amount_units"] == "sat"
+    assert "9000000000 out of 10000000000 sat" in " ".join(env["evidence"]["reasons"])
+
+    # Floats (even integral ones), negatives and out-of-range amounts fail closed.
+    for tx in [{"to_address": "A", "amount": 9_000_000_000.0}, {"to_address": "A", "amount": -1}, {"to_address": "A", "amount": 1, "fee": MAX_SATS + 1}]:
+        bad = gw.evaluate(_request({"balance": 10_000_000_000}, tx))
+        assert bad["reason_codes"] == ["GW_ERROR_BAD_NUMBER"]
+
+    with pytest.raises(ValueError):
+        GuardianWalletV3(AMOUNT_UNITS="mdgb")
+
+
+def test_float_hashes_unchanged_and_forms_never_collide():
+    dgb = GuardianWalletV3()
+    sat = GuardianWalletV3(AMOUNT_UNITS="sat")
+    float_env = dgb.evaluate(_request({"balance": 100.0, "typical_amount": 1.0}, {"to_address": "A", "amount": 95.0, "fee": 0.1}))
+    assert "amount_units" not in float_env["meta"]
+
+    sat_req = _request(
+        {"balance": dgb_to_sats(100.0), "typical_amount": dgb_to_sats(1.0)},
+        {"to_address": "A", "amount": dgb_to_sats(95.0), "fee": dgb_to_sats(0.1)},
+    )
+    sat_env = sat.evaluate(sat_req)
+    assert (sat_env["outcome"], sat_env["reason_codes"]) == (float_env["outcome"], float_env["reason_codes"])
+    assert sat_env["context_hash"] != float_env["context_hash"]
+    assert sat.evaluate(sat_req)["context_hash"] == sat_env["context_hash"]
+    assert sat.evaluate_bytes(canonical_json_bytes(sat_req)) == canonical_json_bytes(sat_env)
+
+
+def test_int64_columns_match_scalar_rule():
+    np = pytest.importorskip("numpy")
+    from dgb_wallet_guardian.satoshi import at_least_array, sats_array
+
+    assert sats_array([0.1, 1.0]).tolist() == [10_000_000, 100_000_000]
+    assert sats_array(np.array([1, MAX_SATS])).dtype == np.int64
+    with pytest.raises(ValueError):
+        sats_array([MAX_SATS + 1])
+    with pytest.raises(ValueError):
+        sats_array([0.000000001])
+
+    rng = np.random.default_rng(3)
+    balances = rng.integers(1, MAX_SATS, size=20_000, dtype=np.int64)
+    amounts = np.concatenate([(balances[:10_000] // 10) * 9 + rng.integers(-2, 3, size=10_000), rng.integers(0, MAX_SATS, size=10_000)])
+    amounts = np.clip(amounts, 0, MAX_SATS)
+    for ratio in (0.9, 5.0, 3.0, 0.0, 0.01):
+        got = at_least_array(amounts, balances, ratio)
+        want = [at_least(int(a), int(b), ratio) for a, b in zip(amounts.tolist(), balances.tolist())]
+        assert got.tolist() == want
+
+
+@pytest.mark.parametrize("ratio", [1 / 3, 2 / 3, 0.1 + 0.2, 1.1, 0.123456789, 1e-300, 1e300])
+def test_int64_columns_match_scalar_rule_for_wide_fractions(ratio):
+    np = pytest.importorskip("numpy")
+    from dgb_wallet_guardian.satoshi import at_least_array, ratio_fraction
+
+    num, den = ratio_fraction(ratio)
+    rng = np.random.default_rng(7)
+    balances = np.concatenate([rng.integers(1, MAX_SATS, size=5_000, dtype=np.int64), [1, 3, MAX_SATS, MAX_SATS]])
+    # Amounts straddling balance * ratio, plus random and extreme ones.
+    near = np.array([min(b * num // den, MAX_SATS) for b in balances.tolist()], dtype=np.int64)
+    amounts = np.clip(near + rng.integers(-2, 3, size=near.size), 0, MAX_SATS)
+    amounts[-4:] = [0, 1, MAX_SATS, MAX_SATS - 1]
+    for a_col in (amounts, rng.integers(0, MAX_SATS, size=amounts.size, dtype=np.int64)):
+        got = at_least_array(a_col, balances, ratio)
+        want = [at_least(int(a), int(b), ratio) for a, b in zip(a_col.tolist(), balances.tolist())]
+        assert got.tolist() == want
@@ -0,0 +1,127 @@
+import json
+
+import pytest
+
+from dgb_wallet_guardian.client import WalletGuardian
+from dgb_wallet_guardian.sentinel_feed import (
+    EscalationRescorer,
+    SentinelFileFeed,
+    SentinelStatusBoard,
+)
+from dgb_wallet_guardian.v3 import GuardianWalletV3
+
+
+def _request(rid="s1", signals=None):
+    return {
+        "contract_version": 3,
+        "component": "guardian_wallet",
+        "request_id": rid,
+        "wallet_ctx": {"balance": 1000.0},
+        "tx_ctx": {"to_address": "NEW", "amount": 1.0},
+        "extra_signals": signals if signals is not None else {"trusted_device": True},
+    }
+
+
+def test_board_versions_and_escalation_listeners():
+    board = SentinelStatusBoard()
+    seen = []
+    unsubscribe = board.on_escalation(lambda old, new: seen.append((old.status, new.status, new.version)))
+    board.on_escalation(lambda old, new: 1 / 0)  # broken hook is ignored
+
+    assert board.current().version == 0
+    assert board.publish("elevated").version == 1
+    assert board.publish("ELEVATED").version == 1  # unchanged status: same snapshot
+    board.publish("NORMAL")  # de-escalation: no callback
+    board.publish("CRITICAL")
+    assert seen == [("NORMAL", "ELEVATED", 1), ("NORMAL", "CRITICAL", 3)]
+
+    unsubscribe()
+    board.publish("NORMAL")
+    board.publish("HIGH")
+    assert len(seen) == 2
+    with pytest.raises(ValueError):
+        board.publish("PANIC")
+    with pytest.raises(ValueError):
+        SentinelStatusBoard("PANIC")
+
+
+def test_engine_uses_board_only_when_signal_omitted():
+    board = SentinelStatusBoard("CRITICAL")
+    guardian = WalletGuardian(sentinel_board=board)
+    wallet, tx = {"balance": 1000.0, "known_addresses": ["A"]}, {"to_address": "A", "amount": 1.0}
+
+    assert any("SENTINEL_ALERT" in r for r in guardian.evaluate_transaction(wallet, tx, {}).reasons)
+    explicit = guardian.evaluate_transaction(wallet, tx, {"sentinel_status": "NORMAL"})
+    assert explicit.reasons == []
+
+
+def test_gate_records_snapshot_version_and_stays_deterministic():
+    board = SentinelStatusBoard()
+    gw = GuardianWalletV3(sentinel=board)
+
+    calm = gw.evaluate(_request())
+    assert calm["meta"]["sentinel"] == {"status": "NORMAL", "version": 0}
+    assert calm == gw.evaluate(_request())
+
+    board.publish("HIGH")
+    alert = gw.evaluate(_request())
+    assert alert["meta"]["sentinel"] == {"status": "HIGH", "version": 1}
+    assert "SENTINEL_ALERT" in alert["reason_codes"]
+    assert alert["context_hash"] != calm["context_hash"]
+
+    # Explicit request signal wins and no snapshot is recorded
+    pinned = gw.evaluate(_request(signals={"sentinel_status": "NORMAL"}))
+    assert "sentinel" not in pinned["meta"]
+    assert pinned == GuardianWalletV3().evaluate(_request(signals={"sentinel_status": "NORMAL"}))
+
+
+def test_file_feed_publishes_changes(tmp_path):
+    board = SentinelStatusBoard()
+    path = tmp_path / "sentinel.status"
+    feed = SentinelFileFeed(board, str(path), interval=0.01)
+
+    assert feed.poll_once() is None  # missing file
+    path.write_text("HIGH\n")
+    assert feed.poll_once().status == "HIGH"
+    assert feed.poll_once() is None  # unchanged file
+    path.write_text(json.dumps({"status": "CRITICAL", "source": "sentinel"}))
+    assert feed.poll_once().version == 2
+    path.write_text("garbage!")
+    assert feed.poll_once() is None
+    assert board.current().status == "CRITICAL"
+
+    feed.start()
+    feed.start()
+    feed.stop()
+
+
+def test_rescorer_bulk_rescores_pending_escalations_on_escalation():
+    board = SentinelStatusBoard()
+    gw = GuardianWalletV3(sentinel=board)
+    batches = []
+    rescorer = EscalationRescorer(gw, board, batches.append, max_pending=2)
+
+    assert rescorer.evaluate(_request("a"))["outcome"] == "escalate"  # DEST_NEW_ADDRESS only
+    assert rescorer.evaluate(_request("b"))["outcome"] == "escalate"
+    rescorer.evaluate(_request("d", {"sentinel_status": "NORMAL"}))
+    assert len(rescorer) == 2  # bounded: "a" evicted
+    assert rescorer.resolve("b") is True
+    assert rescorer.resolve("b") is False
+    rescorer.evaluate(_request("e"))
+
+    board.publish("ELEVATED")  # no alert rule for ELEVATED: still escalate
+    assert [[e["outcome"] for e in batch] for batch in batches] == [["escalate", "escalate"]]
+    assert len(rescorer) == 2
+
+    board.publish("CRITICAL")
+    last = batches[-1]
+    assert {e["request_id"]: e["outcome"] for e in last} == {"d": "escalate", "e": "deny"}
+    assert last[1] == gw.evaluate(_request("e"))
+    assert len(rescorer) == 1  # "e" left the pending set
+
+    rescorer.close()
+    board.publish("NORMAL")
+    board.publish("HIGH")
+    assert len(batches) == 2
+    with pytest.raises(ValueError):
+        EscalationRescorer(gw, board, batches.append, max_pending=0)
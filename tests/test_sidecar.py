@@ -0,0 +1,196 @@
+import json
+import os
+import shutil
+import socket
+import struct
+import tempfile
+import threading
+
+import pytest
+
+from dgb_wallet_guardian.sidecar import (
+    HEADER,
+    KIND_ERROR,
+    KIND_EVALUATE_ROUTED,
+    RESPONSE_BIT,
+    SidecarClient,
+    SidecarError,
+    SidecarServer,
+    encode_frame,
+    encode_routed,
+    loadtest,
+)
+from dgb_wallet_guardian.v3 import GuardianWalletV3
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix domain sockets required")
+
+
+def _request(i, amount=5):
+    return {
+        "contract_version": 3,
+        "component": "guardian_wallet",
+        "request_id": f"r-{i}",
+        "wallet_ctx": {"balance": 100, "typical_amount": 10},
+        "tx_ctx": {"to_address": "A", "amount": amount},
+    }
+
+
+@pytest.fixture
+def sock_path():
+    d = tempfile.mkdtemp(prefix="gw")  # short path: AF_UNIX paths are limited to ~100 bytes
+    yield os.path.join(d, "g.sock")
+    shutil.rmtree(d, ignore_errors=True)
+
+
+@pytest.fixture
+def server(sock_path):
+    srv = SidecarServer(sock_path, batch_window_ms=20.0, max_batch=64, max_frame_bytes=256_000)
+    srv.start_in_thread()
+    yield srv
+    srv.stop()
+
+
+def test_roundtrip_matches_evaluate_bytes(server, sock_path):
+    gw = GuardianWalletV3()
+    with SidecarClient(sock_path) as client:
+        for i, amount in enumerate([5, 95, 30]):
+            body = json.dumps(_request(i, amount)).encode()
+            assert client.evaluate_bytes(body, timeout=5) == gw.evaluate_bytes(body)
+        assert client.evaluate_bytes(b"[]", timeout=5) == gw.evaluate_bytes(b"[]")
+        assert client.evaluate(_request(9), timeout=5) == gw.evaluate(_request(9))
+
+
+def test_multiplexed_requests_are_micro_batched(server, sock_path):
+    with SidecarClient(sock_path) as client:
+        futures = {i: client.submit(json.dumps(_request(i)).encode()) for i in range(40)}
+
+        results = {}
+
+        def other_thread():
+            results["x"] = client.evaluate(_request("x"), timeout=5)
+
+        t = threading.Thread(target=other_thread)
+        t.start()
+        t.join()
+        for i, fut in futures.items():
+            assert json.loads(fut.result(timeout=5))["request_id"] == f"r-{i}"
+        assert results["x"]["request_id"] == "r-x"
+
+        stats = client.stats(timeout=5)
+    assert stats["requests"] == 41
+    assert stats["max_batch_seen"] > 1
+    assert stats["batches"] < 41
+
+
+def test_protocol_errors_and_failing_requests(server, sock_path):
+    with SidecarClient(sock_path) as client:
+        with pytest.raises(SidecarError, match="unknown kind"):
+            client.submit(b"", kind=0x33).result(timeout=5)
+
+        # An evaluation that raises is reported per request; the scheduler keeps going.
+        broken = dict(_request(1), wallet_ctx={})
+        with pytest.raises(SidecarError, match="evaluation failed"):
+            client.evaluate(broken, timeout=5)
+        assert client.evaluate(_request(2), timeout=5)["request_id"] == "r-2"
+        assert client.stats(timeout=5)["evaluation_errors"] == 1
+
+    raw = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    raw.connect(sock_path)
+    raw.sendall(struct.pack(">IIB", 10_000_000, 7, 1))
+    header = raw.recv(HEADER.size)
+    length, tag, kind = HEADER.unpack(header)
+    assert (tag, kind) == (7, KIND_ERROR | RESPONSE_BIT)
+    assert raw.recv(length) == b"frame too large"
+    assert raw.recv(1) == b""  # connection closed
+    raw.close()
+    assert encode_frame(1, 1, b"x")[HEADER.size:] == b"x"
+
+
+def test_stop_removes_socket_and_fails_pending(sock_path):
+    srv = SidecarServer(sock_path)
+    srv.start_in_thread()
+    client = SidecarClient(sock_path)
+    assert client.stats(timeout=5)["connections"] == 1
+    srv.stop()
+    assert not os.path.exists(sock_path)
+    with pytest.raises(SidecarError):
+        client.submit(b"{}").result(timeout=5)
+    client.close()
+
+
+def test_routed_frames_carry_source_tenant_and_wallet(sock_path):
+    seen = []
+
+    class _Recording(GuardianWalletV3):
+        def evaluate_bytes(self, buf, **routing):
+            seen.append(routing)
+            return super().evaluate_bytes(buf, **routing)
+
+    srv = SidecarServer(sock_path, _Recording())
+    srv.start_in_thread()
+    try:
+        with SidecarClient(sock_path) as client:
+            env = client.evaluate(_request(1), timeout=5, source="api", wallet_id="w-1")
+            assert env["request_id"] == "r-1"
+            client.evaluate(_request(2), timeout=5)
+            with pytest.raises(SidecarError, match="routing header"):
+                client.submit(encode_routed(b"{}", tenant="t")[:3], KIND_EVALUATE_ROUTED).result(timeout=5)
+            with pytest.raises(SidecarError, match="routing header"):
+                client.submit(b"\x00\x09" + b'{"x":"y"}' + b"{}", KIND_EVALUATE_ROUTED).result(timeout=5)
+    finally:
+        srv.stop()
+    assert seen == [{"source": "api", "wallet_id": "w-1"}, {}]
+    with pytest.raises(ValueError, match="unknown routing keys"):
+        encode_routed(b"{}", user="u")
+
+
+def test_stop_leaves_a_replaced_socket_path_alone(sock_path):
+    srv = SidecarServer(sock_path)
+    srv.start_in_thread()
+    os.unlink(sock_path)
+    other = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    other.bind(sock_path)  # another server took the path over
+    try:
+        srv.stop()
+        assert os.path.exists(sock_path)
+    finally:
+        other.close()
+    os.unlink(sock_path)
+
+    srv = SidecarServer(sock_path)
+    srv.start_in_thread()
+    os.unlink(sock_path)
+    with open(sock_path, "w") as f:
+        f.write("keep me")
+    srv.stop()
+    with open(sock_path) as f:
+        assert f.read() == "keep me"
+
+
+def test_start_only_replaces_a_stale_socket(sock_path):
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(sock_path)  # bound but never listening, like a crashed server's leftover
+    stale.close()
+    srv = SidecarServer(sock_path)
+    srv.start_in_thread()
+    try:
+        with pytest.raises(FileExistsError, match="in use"):
+            SidecarServer(sock_path).start_in_thread()
+        with SidecarClient(sock_path) as client:
+            assert client.stats(timeout=5)["connections"] == 1
+    finally:
+        srv.stop()
+
+    with open(sock_path, "w") as f:
+        f.write("keep me")
+    with pytest.raises(FileExistsError, match="not a socket"):
+        SidecarServer(sock_path).start_in_thread()
+    with open(sock_path) as f:
+        assert f.read() == "keep me"
+
+
+def test_loadtest_reports_throughput(server, sock_path):
+    report = loadtest(sock_path, connections=2, inflight=16, requests=400)
+    assert report["requests"] == 400
+    assert report["server"]["requests"] >= 400
+    assert report["latency_ms"]["p50"] <= report["latency_ms"]["p99"]
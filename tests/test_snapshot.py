@@ -0,0 +1,190 @@
+import json
+import threading
+import time
+
+import pytest
+
+from dgb_wallet_guardian.cooldown import CooldownTracker
+from dgb_wallet_guardian.device_baseline import DeviceBaselineStore, DeviceCheck
+from dgb_wallet_guardian.geoip import GeoIPIndex, TravelTracker
+from dgb_wallet_guardian.snapshot import SnapshotFile, SnapshotScheduler, benchmark, main, write_snapshot
+
+
+def _devices(n=5, **kwargs):
+    store = DeviceBaselineStore(**kwargs)
+    for i in range(n):
+        store.enroll(f"w{i}", "phone")
+        store.enroll(f"w{i}", f"laptop{i}")
+    return store
+
+
+def test_device_roundtrip_is_lazy_and_preserves_lru(tmp_path):
+    path = str(tmp_path / "devices.snap")
+    store = _devices(per_wallet=3)
+    assert store.save_snapshot(path) == 5
+
+    restored = DeviceBaselineStore.open_snapshot(path)
+    assert len(restored) == 5 and len(restored._wallets) == 0
+    assert restored.snapshot() == store.snapshot()
+    assert restored.devices("w3") == ["phone", "laptop3"] and len(restored._wallets) == 0  # peek only
+
+    assert restored.observe("w3", "laptop3") == DeviceCheck(known=True, mismatch=False)
+    assert restored.observe("w1", "stolen") == DeviceCheck(known=False, mismatch=True)
+    assert restored.observe("new", "x") == DeviceCheck(known=False, mismatch=False)
+    assert len(restored) == 6 and len(restored._wallets) == 3
+    assert [w for w, _ in restored.snapshot()["wallets"]] == ["w0", "w2", "w4", "w3", "w1", "new"]
+
+
+def test_device_eviction_takes_cold_wallets_first(tmp_path):
+    path = str(tmp_path / "devices.snap")
+    _devices().save_snapshot(path)
+
+    restored = DeviceBaselineStore.open_snapshot(path, max_wallets=3)  # keeps the newest three
+    assert len(restored) == 3 and restored.devices("w1") == []
+    restored.observe("w2", "phone")  # w2 is now the most recent
+    restored.enroll("fresh", "a")
+    assert len(restored) == 3
+    assert restored.devices("w3") == []  # oldest cold wallet went first
+    assert restored.devices("w4") == ["phone", "laptop4"]
+    assert restored.devices("w2") == ["laptop2", "phone"]
+
+
+def test_resave_from_restored_store_to_same_path(tmp_path):
+    path = str(tmp_path / "devices.snap")
+    _devices().save_snapshot(path)
+    restored = DeviceBaselineStore.open_snapshot(path)
+    restored.observe("w0", "phone")
+    restored.enroll("w9", "tablet")
+    expected = restored.snapshot()
+    assert restored.save_snapshot(path) == 6  # replaces the file still mapped by `restored`
+
+    again = DeviceBaselineStore.open_snapshot(path)
+    assert again.snapshot() == expected
+    assert restored.devices("w4") == ["phone", "laptop4"]
+
+
+def test_duplicate_keys_keep_the_last_record(tmp_path):
+    path = str(tmp_path / "dup.snap")
+    chunks = [[("a", b"1"), ("b", b"2")], [("a", b"3")]]
+    assert write_snapshot(path, {"kind": "test"}, chunks) == 2
+    with SnapshotFile(path) as snap:
+        assert [snap.record(n) for n in range(len(snap))] == [("b", b"2"), ("a", b"3")]
+        assert snap.find("a") == 1 and snap.find("zz") == -1
+
+
+def test_travel_roundtrip(tmp_path):
+    index = GeoIPIndex.from_rows([("1.0.0.0", "1.0.0.255", "AU"), ("8.8.8.0", "8.8.8.255", "US")])
+    now = [1_000.0]
+    tracker = TravelTracker(index, window_seconds=600, clock=lambda: now[0])
+    tracker.observe("w1", "1.0.0.1")
+    path = str(tmp_path / "travel.snap")
+    assert tracker.save_snapshot(path) == 1
+
+    now[0] += 60
+    restored = TravelTracker.open_snapshot(path, index, window_seconds=600, clock=lambda: now[0])
+    check = restored.observe("w1", "8.8.8.8")
+    assert (check.previous, check.impossible) == ("AU", True)
+    with pytest.raises(ValueError):
+        DeviceBaselineStore.open_snapshot(path)
+
+
+def test_cooldown_roundtrip(tmp_path):
+    now = [1_000.0]
+    clock = lambda: now[0]  # noqa: E731
+    tracker = CooldownTracker(clock=clock)
+    tracker.arm("short", 10)
+    tracker.arm("long", 600)
+    tracker.arm("released", 600)
+    path = str(tmp_path / "cooldowns.snap")
+    assert tracker.save_snapshot(path) == 3
+
+    now[0] += 30
+    restored = CooldownTracker.open_snapshot(path, clock=clock)
+    assert restored.expiries() == tracker.expiries()
+    assert not restored.is_locked("short")
+    assert restored.remaining("long") == 570.0
+    assert restored.arm("long", 60) == 1_600.0  # longer snapshot lock wins
+    assert restored.release("released") and not restored.is_locked("released")
+    now[0] += 600
+    assert restored.expire() == 0
+
+
+def test_corrupt_files_are_rejected(tmp_path):
+    path = tmp_path / "devices.snap"
+    _devices().save_snapshot(str(path))
+    raw = bytearray(path.read_bytes())
+
+    flipped = bytearray(raw)
+    flipped[-30] ^= 0xFF
+    (tmp_path / "flipped").write_bytes(bytes(flipped))
+    with pytest.raises(ValueError, match="checksum"):
+        DeviceBaselineStore.open_snapshot(str(tmp_path / "flipped"))
+    DeviceBaselineStore.open_snapshot(str(tmp_path / "flipped"), verify=False)  # caller's choice
+
+    (tmp_path / "short").write_bytes(bytes(raw[:-7]))
+    with pytest.raises(ValueError, match="truncated"):
+        SnapshotFile(str(tmp_path / "short"))
+    (tmp_path / "junk").write_bytes(b"not a snapshot" * 8)
+    with pytest.raises(ValueError):
+        SnapshotFile(str(tmp_path / "junk"))
+    newer = bytearray(raw)
+    newer[8] = 2
+    (tmp_path / "newer").write_bytes(bytes(newer))
+    with pytest.raises(ValueError, match="version"):
+        SnapshotFile(str(tmp_path / "newer"))
+
+
+def test_background_snapshot_does_not_pause_observers(tmp_path):
+    store = _devices(n=60_000)
+    path = str(tmp_path / "devices.snap")
+    done = threading.Event()
+    worst = [0.0]
+
+    def observe():
+        i = 0
+        while not done.is_set():
+            start = time.perf_counter()
+            store.observe(f"w{i % 60_000}", "phone")
+            worst[0] = max(worst[0], time.perf_counter() - start)
+            i += 1
+
+    thread = threading.Thread(target=observe)
+    thread.start()
+    try:
+        scheduler = SnapshotScheduler({path: store}, interval_seconds=3600)
+        assert scheduler.run_once() == {path: 60_000}
+    finally:
+        done.set()
+        thread.join()
+    assert worst[0] < 0.25
+    assert len(DeviceBaselineStore.open_snapshot(path)) == 60_000
+
+
+def test_scheduler_thread_and_errors(tmp_path):
+    store = _devices(n=3)
+    good = str(tmp_path / "devices.snap")
+    bad = str(tmp_path / "missing-dir" / "devices.snap")
+    scheduler = SnapshotScheduler({good: store, bad: store}, interval_seconds=0.01)
+    scheduler.start()
+    deadline = time.monotonic() + 5
+    while good not in scheduler.last_run and time.monotonic() < deadline:
+        time.sleep(0.01)
+    scheduler.stop()
+    assert scheduler.last_run[good]["records"] == 3
+    assert "FileNotFoundError" in scheduler.last_errors[bad]
+    with pytest.raises(ValueError):
+        SnapshotScheduler({}, interval_seconds=0)
+
+
+def test_restore_benchmark_is_fast(tmp_path):
+    result = benchmark(100_000, directory=str(tmp_path))
+    assert result["wallets"] == 100_000 and result["hits"] == 10_000
+    assert result["open_s"] < 0.5
+
+
+def test_main_inspects_snapshot(tmp_path, capsys):
+    path = str(tmp_path / "devices.snap")
+    _devices().save_snapshot(path)
+    assert main([path]) == 0
+    out = json.loads(capsys.readouterr().out)
+    assert out == {"records": 5, "meta": {"kind": "device_baseline", "per_wallet": 4}}
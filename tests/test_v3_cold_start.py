@@ -0,0 +1,79 @@
+import json
+import os
+import subprocess
+import sys
+
+import dgb_wallet_guardian
+from dgb_wallet_guardian.v3 import GuardianWalletV3
+
+# Budgets leave headroom for shared CI runners; the module list below is the
+# exact guard, since one eager heavy import costs less than the noise.
+IMPORT_BUDGET_S = 0.15
+FIRST_CALL_BUDGET_S = 0.010
+
+LAZY_MODULES = [
+    "dgb_wallet_guardian.client",
+    "dgb_wallet_guardian.guardian_engine",
+    "dgb_wallet_guardian.adaptive_bridge",
+    "dgb_wallet_guardian.profiles",
+    "dgb_wallet_guardian.geoip",
+    "dgb_wallet_guardian.sentinel_feed",
+    "socket",
+    # optional JSON backend (pulls in datetime/uuid/zoneinfo) and the satoshi helpers' deps
+    "orjson",
+    "uuid",
+    "zoneinfo",
+    "decimal",
+    "fractions",
+]
+
+PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import dgb_wallet_guardian.v3 as v3
+t1 = time.perf_counter()
+loaded = sorted(m for m in sys.modules if m in set(json.loads(sys.argv[1])))
+gw = v3.GuardianWalletV3()
+gw.warmup()
+request = dict(v3._WARMUP_REQUEST, request_id="first")
+t2 = time.perf_counter()
+out = gw.evaluate(request)
+t3 = time.perf_counter()
+print(json.dumps({"import_s": t1 - t0, "first_call_s": t3 - t2, "loaded": loaded, "outcome": out["outcome"]}))
+"""
+
+
+def _probe():
+    env = dict(os.environ)
+    src = os.path.dirname(os.path.dirname(os.path.abspath(dgb_wallet_guardian.__file__)))
+    env["PYTHONPATH"] = src + os.pathsep + env.get("PYTHONPATH", "")
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE, json.dumps(LAZY_MODULES)],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    return json.loads(proc.stdout)
+
+
+def test_cold_import_is_lazy_and_within_budget():
+    # best of three cold processes, to ride out scheduler noise
+    runs = [_probe() for _ in range(3)]
+    assert all(r["loaded"] == [] for r in runs)
+    assert min(r["import_s"] for r in runs) < IMPORT_BUDGET_S
+    assert min(r["first_call_s"] for r in runs) < FIRST_CALL_BUDGET_S
+    assert runs[0]["outcome"] == "deny"
+
+
+def test_lazy_reexport_and_warmup_is_side_effect_free():
+    assert dgb_wallet_guardian.WalletGuardian.__name__ == "WalletGuardian"
+    assert "WalletGuardian" in dir(dgb_wallet_guardian)
+
+    gw = GuardianWalletV3()
+    gw.warmup()
+    request = {
+        "contract_version": 3,
+        "component": "guardian_wallet",
+        "request_id": "r1",
+        "wallet_ctx": {"balance": 10},
+        "tx_ctx": {"to_address": "A", "amount": 1},
+    }
+    assert gw.evaluate(request) == GuardianWalletV3().evaluate(request)
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from dgb_wallet_guardian.contracts import v3_codec
+from dgb_wallet_guardian.v3 import GuardianWalletV3
+
+
+def _request(**tx):
+    tx_ctx = {"to_address": "DGB_ADDR", "amount": 95.0, "fee": 0.1}
+    tx_ctx.update(tx)
+    return {
+        "contract_version": 3,
+        "component": "guardian_wallet",
+        "request_id": "rb",
+        "wallet_ctx": {"balance": 100.0, "typical_amount": 1.0},
+        "tx_ctx": tx_ctx,
+        "extra_signals": {"sentinel_status": "HIGH", "trusted_device": True},
+    }
+
+
+def _stdlib(obj):
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+@pytest.fixture(params=["fast", "stdlib"])
+def backend(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(v3_codec, "_orjson", None)
+    elif not v3_codec.HAS_FAST_JSON:
+        pytest.skip("orjson not installed")
+    return request.param
+
+
+@pytest.mark.parametrize("memo", ["x", "zażółć   \x1f \"q\""])
+def test_bytes_path_matches_dict_path_byte_for_byte(backend, memo):
+    gw = GuardianWalletV3()
+    req = _request(memo=memo)
+    raw = json.dumps(req).encode("utf-8")
+
+    out = gw.evaluate_bytes(raw)
+    assert out == _stdlib(gw.evaluate(req))
+    assert gw.evaluate_bytes(memoryview(raw)) == out
+    assert gw.evaluate_bytes(bytearray(raw)) == out
+
+
+def test_oversize_rejected_on_raw_length_before_parsing(backend):
+    gw = GuardianWalletV3()
+    raw = b" " * (gw.MAX_PAYLOAD_BYTES + 1)  # not even valid JSON
+    out = json.loads(gw.evaluate_bytes(raw))
+    assert out["outcome"] == "deny"
+    assert out["request_id"] == "unknown"
+    assert out["reason_codes"] == ["GW_ERROR_OVERSIZE"]
+
+
+def test_invalid_json_and_nan_literals_fail_closed(backend):
+    gw = GuardianWalletV3()
+    bad = json.loads(gw.evaluate_bytes(b"{not json"))
+    assert bad["reason_codes"] == ["GW_ERROR_INVALID_REQUEST"]
+    assert bad["meta"]["fail_closed"] is True
+
+    # Stdlib accepts NaN literals, so the bytes path must reach the number check too.
+    raw = json.dumps(_request(amount=float("nan"))).encode("utf-8")
+    nan = json.loads(gw.evaluate_bytes(raw))
+    assert nan["reason_codes"] == ["GW_ERROR_BAD_NUMBER"]
+
+
+def test_codec_falls_back_for_non_portable_values(backend):
+    for obj in [{"b": 1e16, "a": 1e-5}, {"x": [2**70, 0.5, None, True]}, {"n": float("nan")}]:
+        assert v3_codec.canonical_json_bytes(obj) == _stdlib(obj)
+    assert v3_codec.canonical_json_bytes({"s": 1e-7}, floats=[1e-7]) == _stdlib({"s": 1e-7})
+    assert v3_codec.loads_json(b'{"big": 123456789012345678901234567890}')["big"] == 123456789012345678901234567890
+
+
+def test_lone_surrogate_fails_closed_like_dict_path(backend):
+    gw = GuardianWalletV3()
+    raw = json.dumps(_request(memo="\ud800")).encode("utf-8")
+    assert b"\\ud800" in raw
+    out = json.loads(gw.evaluate_bytes(raw))
+    assert out["reason_codes"] == ["GW_ERROR_OVERSIZE"]
+    assert out == gw.evaluate(_request(memo="\ud800"))
+
+    # A proper surrogate pair is fine and matches the dict path.
+    pair = _request(memo="\U0001f600")
+    assert gw.evaluate_bytes(json.dumps(pair).encode("utf-8")) == _stdlib(gw.evaluate(pair))
+
+
+@pytest.mark.parametrize("version", [3, 2])
+def test_lone_surrogate_request_id_fails_closed_as_unknown(backend, version):
+    gw = GuardianWalletV3()
+    req = dict(_request(), request_id="a\ud800", contract_version=version)
+    env = gw.evaluate(req)
+    assert env["request_id"] == "unknown" and env["outcome"] == "deny"
+    assert gw.evaluate_bytes(json.dumps(req).encode("utf-8")) == _stdlib(env)
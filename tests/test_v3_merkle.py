@@ -0,0 +1,118 @@
+import hashlib
+
+import pytest
+
+from dgb_wallet_guardian.contracts.v3_merkle import (
+    ContextHashBatcher,
+    ContextHashTree,
+    merkle_leaf_hash,
+    verify_inclusion,
+)
+from dgb_wallet_guardian.v3 import GuardianWalletV3
+
+
+def _naive_root(leaves):
+    # Reference: pair left to right, promote an odd tail unchanged.
+    level = list(leaves)
+    if not level:
+        return hashlib.sha256(b"").hexdigest()
+    while len(level) > 1:
+        nxt = [
+            hashlib.sha256(b"\x01" + level[i] + level[i + 1]).digest()
+            for i in range(0, len(level) - 1, 2)
+        ]
+        if len(level) % 2:
+            nxt.append(level[-1])
+        level = nxt
+    return level[0].hex()
+
+
+def _h(i):
+    return hashlib.sha256(str(i).encode()).hexdigest()
+
+
+def test_incremental_root_matches_reference_and_all_proofs_verify():
+    tree = ContextHashTree()
+    leaves = []
+    for n in range(1, 40):
+        rid = f"r{n}"
+        tree.append(rid, _h(n))
+        leaves.append(merkle_leaf_hash(rid, _h(n)))
+        root = tree.root()
+        assert root == _naive_root(leaves)
+        for i in range(1, n + 1):
+            proof = tree.proof(f"r{i}")
+            assert proof.tree_size == n
+            assert len(proof.path) <= n.bit_length()
+            assert verify_inclusion(proof, root)
+
+
+def test_tampered_proof_and_duplicates_are_rejected():
+    tree = ContextHashTree()
+    for i in range(5):
+        tree.append(f"r{i}", _h(i))
+    proof = tree.proof("r3")
+
+    forged = type(proof)(proof.request_id, _h(99), proof.leaf_index, proof.tree_size, proof.path)
+    assert not verify_inclusion(forged, tree.root())
+    bad_side = type(proof)(proof.request_id, proof.context_hash, 0, 5, (("X", "00"),))
+    assert not verify_inclusion(bad_side, tree.root())
+
+    with pytest.raises(ValueError):
+        tree.append("r3", _h(3))
+    with pytest.raises(KeyError):
+        tree.proof("missing")
+    assert proof.to_dict()["path"] == [list(p) for p in proof.path]
+
+
+def test_batcher_seals_by_size_and_window_and_serves_proofs():
+    now = [1000.0]
+    published = []
+    batcher = ContextHashBatcher(
+        max_leaves=3, window_seconds=10.0, keep_batches=2, on_seal=published.append, clock=lambda: now[0]
+    )
+
+    gw = GuardianWalletV3()
+    for i in range(3):
+        env = gw.evaluate(
+            {
+                "contract_version": 3,
+                "component": "guardian_wallet",
+                "request_id": f"e{i}",
+                "tx_ctx": {"to_address": "A", "amount": 1.0},
+                "wallet_ctx": {"balance": 100.0},
+            }
+        )
+        batcher.add_envelope(env)
+    assert [b.size for b in published] == [3]
+
+    batch_id, proof = batcher.proof("e1")
+    assert batch_id == 0
+    assert verify_inclusion(proof, published[0].root)
+
+    batcher.add("late", _h(1))
+    now[0] += 10.0
+    batcher.add("next", _h(2))  # window expired -> "late" sealed alone
+    assert published[-1].size == 1
+    assert batcher.current_batch_id == 2
+
+    assert batcher.seal() is not None
+    assert batcher.seal() is None
+    # keep_batches=2 evicted batch 0
+    assert batcher.sealed_batch(0) is None
+    with pytest.raises(KeyError):
+        batcher.proof("e1")
+
+
+def test_batcher_rejects_request_id_reused_across_retained_batches():
+    batcher = ContextHashBatcher(max_leaves=1, keep_batches=1)
+    batcher.add("r", _h(1))  # sealed at once as batch 0
+    with pytest.raises(ValueError, match="duplicate"):
+        batcher.add("r", _h(2))
+    batch_id, proof = batcher.proof("r")
+    assert batch_id == 0
+    assert verify_inclusion(proof, batcher.sealed_batch(0).root)
+
+    batcher.add("s", _h(3))  # batch 1 evicts batch 0, freeing "r"
+    assert batcher.add("r", _h(4)) == 2
+    assert batcher.proof("r")[0] == 2
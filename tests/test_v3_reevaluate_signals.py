@@ -0,0 +1,90 @@
+import pytest
+
+from dgb_wallet_guardian.enrichment import EnrichmentProvider, EnrichmentStage
+from dgb_wallet_guardian.guardian_engine import GuardianEngine
+from dgb_wallet_guardian.models import TransactionContext, WalletContext
+from dgb_wallet_guardian.profiles import ProfileRegistry
+from dgb_wallet_guardian.v3 import GuardianWalletV3
+
+
+def _request(signals):
+    return {
+        "contract_version": 3,
+        "component": "guardian_wallet",
+        "request_id": " sess-1 ",
+        "wallet_ctx": {"balance": 100, "typical_amount": 10},
+        "tx_ctx": {"to_address": "A", "amount": 30, "fee": 0.1},
+        "extra_signals": signals,
+    }
+
+
+SIGNAL_SEQUENCE = [
+    {"sentinel_status": "NORMAL"},
+    {"sentinel_status": "HIGH", "trusted_device": 1},
+    {"sentinel_status": "CRITICAL", "geo_ip": "1.2.3.4"},
+    {},
+]
+
+
+def test_engine_reevaluation_matches_full_evaluation():
+    eng = GuardianEngine()
+    wallet = WalletContext(balance=100.0, typical_amount=1.0)
+    tx = TransactionContext(to_address="NEW", amount=95.0)
+    handle = eng.prepare_context(wallet, tx)
+    assert [m.rule_id for m in handle.context_matches] == [
+        "BALANCE_FULL_WIPE",
+        "BALANCE_UNUSUAL_SIZE",
+        "DEST_NEW_ADDRESS",
+    ]
+
+    for signals in SIGNAL_SEQUENCE + [{"device_mismatch": True}]:
+        assert eng.reevaluate_signals(handle, signals) == GuardianEngine().evaluate_transaction(wallet, tx, signals)
+    # handle is reusable and untouched by reevaluation
+    assert len(handle.context_matches) == 3
+
+
+@pytest.mark.parametrize("tenant", [None, "strict"])
+def test_gate_reevaluation_is_identical_to_full_evaluation(tenant):
+    gw = GuardianWalletV3(profiles=ProfileRegistry({"strict": {"large_tx_multiplier": 2.0}}))
+    first, handle = gw.evaluate_with_handle(_request(SIGNAL_SEQUENCE[0]), tenant=tenant)
+    assert handle is not None
+    assert first == gw.evaluate(_request(SIGNAL_SEQUENCE[0]), tenant=tenant)
+
+    for signals in SIGNAL_SEQUENCE[1:]:
+        assert gw.reevaluate_signals(handle, signals) == gw.evaluate(_request(signals), tenant=tenant)
+
+
+def test_gate_reevaluation_keeps_enrichment_audit():
+    def broken(query):
+        raise RuntimeError("down")
+
+    stage = EnrichmentStage(
+        [
+            EnrichmentProvider("dest_risk", lambda q: {"tx": {"destination_risk_score": 0.4}}, version="2024-06"),
+            EnrichmentProvider("fees", broken, required=False),
+        ]
+    )
+    gw = GuardianWalletV3(enrichment=stage)
+    first, handle = gw.evaluate_with_handle(_request(SIGNAL_SEQUENCE[0]), wallet_id="w1")
+    assert first["meta"]["enrichment"] == {"versions": {"dest_risk": "2024-06"}, "skipped": ["fees"]}
+
+    for signals in SIGNAL_SEQUENCE:
+        again = gw.reevaluate_signals(handle, signals)
+        assert again == gw.evaluate(_request(signals), wallet_id="w1")
+        assert again["context_hash"] == gw.evaluate(_request(signals), wallet_id="w1")["context_hash"]
+
+
+def test_gate_reevaluation_fails_closed_like_full_evaluation():
+    gw = GuardianWalletV3()
+    _, handle = gw.evaluate_with_handle(_request({}))
+
+    for signals in [{"evil": 1}, {"session": "x" * GuardianWalletV3.MAX_PAYLOAD_BYTES}]:
+        assert gw.reevaluate_signals(handle, signals) == gw.evaluate(_request(signals))
+
+    bad = gw.reevaluate_signals(handle, ["not", "a", "dict"])  # type: ignore[arg-type]
+    assert bad["outcome"] == "deny"
+    assert bad["reason_codes"] == ["GW_ERROR_INVALID_REQUEST"]
+
+    out, none_handle = gw.evaluate_with_handle(dict(_request({}), contract_version=2))
+    assert none_handle is None
+    assert out["reason_codes"] == ["GW_ERROR_SCHEMA_VERSION"]
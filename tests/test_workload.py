@@ -0,0 +1,85 @@
+import collections
+import hashlib
+import io
+import itertools
+import json
+
+import pytest
+
+from dgb_wallet_guardian.replay import replay
+from dgb_wallet_guardian.v3 import GuardianWalletV3
+from dgb_wallet_guardian.workload import (
+    DEFAULT_MIX,
+    SCENARIOS,
+    generate,
+    main,
+    parse_mix,
+    scenario_of,
+    write_lines,
+)
+
+
+def _digest(lines):
+    h = hashlib.sha256()
+    for line in lines:
+        h.update(line)
+    return h.hexdigest()
+
+
+def test_output_is_a_pure_function_of_seed_and_mix():
+    assert _digest(generate(3000, seed=11)) == _digest(generate(3000, seed=11))
+    assert _digest(generate(3000, seed=11)) != _digest(generate(3000, seed=12))
+    mix = {"normal": 1, "oversize": 1}
+    assert _digest(generate(500, seed=1, mix=mix)) == _digest(generate(500, seed=1, mix=mix))
+
+
+def test_exact_count_and_one_request_per_line():
+    lines = list(generate(1234, seed=5))
+    assert len(lines) == 1234
+    assert all(line.endswith(b"\n") and line.count(b"\n") == 1 for line in lines)
+
+
+def test_mix_proportions_and_validation():
+    counts = collections.Counter()
+    for line in generate(20_000, seed=2, mix={"normal": 3, "full_wipe": 1}):
+        counts[scenario_of(json.loads(line)["request_id"])] += 1
+    assert set(counts) == {"normal", "full_wipe"}
+    assert 0.2 < counts["full_wipe"] / 20_000 < 0.3
+
+    assert parse_mix("normal=0.9, rate_spike=0.1") == {"normal": 0.9, "rate_spike": 0.1}
+    assert set(DEFAULT_MIX) == set(SCENARIOS)
+    for bad in [{"bogus": 1}, {"normal": 0}, {"normal": -1, "full_wipe": 1}]:
+        with pytest.raises(ValueError):
+            next(generate(1, mix=bad))
+
+
+def test_scenarios_drive_the_expected_gate_paths():
+    gw = GuardianWalletV3()
+    seen = collections.defaultdict(collections.Counter)
+    for line in generate(4000, seed=3):
+        out = gw.evaluate_bytes(line.rstrip(b"\n"))
+        env = json.loads(out)
+        scenario = scenario_of(env["request_id"]) or "unparsed"
+        seen[scenario][env["reason_codes"][0]] += 1
+
+    assert set(seen["full_wipe"]) == {"GW_DENY_HIGH_OR_CRITICAL"}
+    assert set(seen["sentinel_escalation"]) == {"GW_DENY_HIGH_OR_CRITICAL"}
+    assert all(code.startswith("GW_ERROR_") for code in seen["malformed"])
+    assert seen["unparsed"]["GW_ERROR_OVERSIZE"] > 0  # oversize bodies never get parsed
+    assert seen["rate_spike"] and seen["fee_manipulation"] and seen["normal"]
+
+
+def test_streams_lazily_and_feeds_replay(tmp_path):
+    # a billion-line corpus is fine as long as nobody materialises it
+    head = list(itertools.islice(generate(10**9, seed=9), 10))
+    assert len(head) == 10
+
+    report = replay(generate(600, seed=4), {"strict": {"threshold_high": 1.0}})
+    assert report.lines == 600
+    assert sum(sum(row.values()) for row in report.configs["strict"].matrix.values()) + report.invalid_lines == 600
+
+    buf = io.BytesIO()
+    assert write_lines(generate(50, seed=4), buf) == len(buf.getvalue())
+    out = tmp_path / "corpus.jsonl"
+    assert main(["--count", "50", "--seed", "4", "--out", str(out)]) == 0
+    assert out.read_bytes() == buf.getvalue()